@@ -1,10 +1,15 @@
+import gc
+
 from flask import Flask
 from flask_cors import CORS
 from pydantic import ValidationError
 from werkzeug.exceptions import HTTPException
 
+from app.controllers import warm_up
 from app.data_exchange import bp as data_exchange_bp
-from app.extensions import storage, spec
+from app.extensions import (storage, spec, render_pool, plot_cache, report_cache, export_cache, report_jobs,
+                            dataset_profiler, metrics, request_profiler, admission, batch_pool)
+from app.extensions.request_profiler import PROFILE_ID_HEADER
 from app.handlers import handle_validation_error, handle_http_exception, handle_unexpected_error, handle_spec_422
 from app.system import bp as system_bp
 from app.preprocessing import bp as preprocessing_bp
@@ -18,16 +23,33 @@ def create_app(config_class: object = Config) -> Flask:
 
     CORS(app, resources={r"/*": {
         "origins": "*",
-        "allow_headers": ["Content-Type", config_class.ACCESS_KEY_HEADER],  # noqa
-        "methods": ["GET", "POST"]
+        "allow_headers": ["Content-Type", config_class.ACCESS_KEY_HEADER, config_class.PROFILING_HEADER],  # noqa
+        "expose_headers": [PROFILE_ID_HEADER],
+        "methods": ["GET", "POST", "DELETE"]
     }})
     storage.init_app(app)
+    render_pool.init_app(app)
+    batch_pool.init_app(app)
+    plot_cache.init_app(app)
+    report_cache.init_app(app)
+    export_cache.init_app(app)
+    report_jobs.init_app(app)
+    dataset_profiler.init_app(app)
+    metrics.init_app(app)
+    request_profiler.init_app(app)
+    admission.init_app(app)
     spec.register(app)
     spec.before = handle_spec_422
 
     @app.cli.command("cleanup")
     def cleanup_command():
         storage.cleanup()
+        report_jobs.cleanup()
+        request_profiler.cleanup()
+
+    @app.cli.command("report-workers")
+    def report_workers_command():
+        report_jobs.run_pool()
 
     app.register_blueprint(system_bp)
     app.register_blueprint(data_exchange_bp)
@@ -38,6 +60,10 @@ def create_app(config_class: object = Config) -> Flask:
     app.register_error_handler(ValidationError, handle_validation_error)
     app.register_error_handler(Exception, handle_unexpected_error)
 
+    if app.config["WARM_START"]:
+        warm_up()
+        gc.freeze()  # keep the collector from touching preloaded objects, which would copy their pages in workers
+
     return app
 
 
@@ -1,5 +1,9 @@
-from .dataframe_analyzer import DataFrameAnalyzer
+from .dataframe_analyzer import DataFrameAnalyzer, DatasetProfile
+from .dataframe_batch import DataFrameBatch
+from .dataframe_exporter import DataFrameExporter
 from .dataframe_loader import DataFrameLoader
 from .dataframe_preprocessor import DataFramePreprocessor
+from .warm_up import warm_up
 
-__all__ = ["DataFrameLoader", "DataFramePreprocessor", "DataFrameAnalyzer"]
+__all__ = ["DataFrameLoader", "DataFramePreprocessor", "DataFrameAnalyzer", "DatasetProfile", "DataFrameExporter",
+           "DataFrameBatch", "warm_up"]
@@ -0,0 +1,97 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+import numpy as np
+import pandas as pd
+
+PandasObject = TypeVar("PandasObject", pd.DataFrame, pd.Series)
+
+CONVERTED_KINDS = "biufO"  # kinds of NumPy dtypes kept Arrow-backed (objects only when all strings), datetimes stay
+                           # NumPy-backed so they are exported and described as with the NumPy engine
+
+
+def is_arrow(dtype: np.dtype | pd.api.extensions.ExtensionDtype) -> bool:
+    return isinstance(dtype, pd.ArrowDtype)
+
+
+def is_arrow_string(dtype: np.dtype | pd.api.extensions.ExtensionDtype) -> bool:
+    if not is_arrow(dtype):
+        return False
+    import pyarrow as pa
+
+    return pa.types.is_string(dtype.pyarrow_dtype) or pa.types.is_large_string(dtype.pyarrow_dtype)
+
+
+def _numpy_backed(column: pd.Series) -> pd.Series:
+    import pyarrow as pa
+
+    array = pa.array(column.array)
+    converted = array.to_pandas()
+    if converted.dtype == object and array.null_count:
+        converted = converted.where(converted.notna(), np.nan)  # missing as pandas readers leave them
+    converted.index, converted.name = column.index, column.name
+    return converted
+
+
+def _arrow_backed(column: pd.Series) -> pd.Series | None:
+    import pyarrow as pa
+
+    try:
+        array = pa.array(column, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):  # objects of mixed types
+        return None
+    if column.dtype == object and not (pa.types.is_string(array.type) or pa.types.is_large_string(array.type)):
+        return None
+    return pd.Series(pd.arrays.ArrowExtensionArray(array), index=column.index, name=column.name)
+
+
+def to_numpy_backed(data: PandasObject, strings: bool = True) -> PandasObject:
+    """
+    Data with Arrow-backed columns converted to the NumPy-backed dtypes pandas reads the same values into:
+    integers with missing values become floats, strings and booleans with missing values become objects.
+    With `strings=False` string columns stay Arrow-backed.
+    """
+    def converted(dtype: np.dtype | pd.api.extensions.ExtensionDtype) -> bool:
+        return is_arrow(dtype) and (strings or not is_arrow_string(dtype))
+
+    if isinstance(data, pd.Series):
+        return _numpy_backed(data) if converted(data.dtype) else data
+    positions = [i for i, dtype in enumerate(data.dtypes) if converted(dtype)]
+    if not positions:
+        return data
+    data = data.copy(deep=False)
+    for i in positions:
+        data.isetitem(i, _numpy_backed(data.iloc[:, i]))
+    return data
+
+
+def to_arrow_backed(data: pd.DataFrame, kinds: str = CONVERTED_KINDS) -> pd.DataFrame:
+    """
+    Data with NumPy-backed columns of the given dtype kinds converted to Arrow-backed dtypes, missing values
+    becoming nulls. Categorical columns and object columns not made of strings are kept as they are.
+    """
+    converted = data
+    for i, dtype in enumerate(data.dtypes):
+        if is_arrow(dtype) or isinstance(dtype, pd.CategoricalDtype) or dtype.kind not in kinds:
+            continue
+        column = _arrow_backed(data.iloc[:, i])
+        if column is None:
+            continue
+        if converted is data:
+            converted = data.copy(deep=False)
+        converted.isetitem(i, column)
+    return converted
+
+
+def map_columns(data: pd.DataFrame, columns: list[str], func: Callable[[pd.Series], pd.Series]) -> None:
+    """
+    Replace the columns with `func` applied to each of them, in threads: Arrow compute kernels release the GIL,
+    so columns are transformed in parallel.
+    """
+    if len(columns) == 1:
+        data[columns[0]] = func(data[columns[0]])
+        return
+    with ThreadPoolExecutor(max_workers=len(columns), thread_name_prefix="arrow-engine") as executor:
+        results = list(executor.map(func, (data[col] for col in columns)))
+    for col, result in zip(columns, results):
+        data[col] = result
@@ -1,283 +1,462 @@
 import sys
-from contextlib import nullcontext
-from dataclasses import dataclass
-from typing import Callable
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from functools import cached_property
+from typing import TYPE_CHECKING, Callable
 
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
-import seaborn as sns
-from sklearn.decomposition import PCA
-from sklearn.feature_selection import mutual_info_classif
 
 from app.errors import ColumnNotFound
-from app.models import MetadataResponse
-from app.models.request.analysis_params import AnalysisParams, AnalysisTask, DocumentTheme
-from .dataframe_report import DataFrameReport
-
-sns.set_style("darkgrid")
+from app.extensions import metrics
+from app.lazy_import import import_module
+from app.models import MetadataResponse, AnalysisResponse
+from app.models.request.analysis_params import AnalysisParams, AnalysisTarget, AnalysisTask
+from app.models.request.engine_params import ARROW_ENGINE, NUMPY_ENGINE
+from app.models.response.analysis_response import (DatasetSummary, TargetDiagnostics, FeatureGroup, FeatureSelection,
+                                                   TaskAnalysis)
+from .arrow_engine import to_numpy_backed
+from .dataset_statistics import DatasetStatistics
+from .report_figures import FigureSpec, PlotSpec, histplot_kde, stacked_barh
+
+if TYPE_CHECKING:
+    from .dataframe_report import DataFrameReport, FigureCache
+
+
+@dataclass(frozen=True)
+class DatasetProfile:
+    """
+    Column profile of a stored dataset, computed once (in background after upload) and reused by later requests.
+    Field names match the analyzer properties they replace. `statistics` keep the sums the profile is derived from,
+    so it can be updated when rows are appended (profiles stored by earlier versions have none).
+    """
+    content_hash: str
+    _dtypes: pd.Series
+    _row_hashes: np.ndarray
+    _missing: pd.Series
+    _int_nunique: pd.Series
+    _float_skew: pd.Series
+    _correlations: pd.DataFrame
+    _pca_importance: pd.Series | None
+    statistics: DatasetStatistics | None = None
+
+    def append(self, rows: pd.DataFrame, content_hash: str) -> "DatasetProfile | None":
+        """
+        Profile of the dataset with `rows` appended, computed without the rows stored before.
+        None if the profile has no statistics to update.
+        """
+        if self.statistics is None:
+            return None
+        try:
+            rows = to_numpy_backed(rows).astype(self._dtypes.to_dict())
+        except (TypeError, ValueError):
+            return None
+        statistics = self.statistics.update(rows)
+        row_hashes = pd.util.hash_pandas_object(rows, index=False).to_numpy()
+        return DatasetProfile(content_hash, self._dtypes, np.concatenate([self._row_hashes, row_hashes]),
+                              statistics.missing, statistics.int_nunique(), statistics.float_skew(),
+                              statistics.correlations(), statistics.pca_importance(), statistics)
 
 
 class DataFrameAnalyzer:
+    """
+    `analyze` computes the numbers behind the recommendations as an `AnalysisResponse`;
+    `generate_report` renders that result into a PDF report with charts.
+    Column profiles are computed once per analyzer (or taken from a stored `DatasetProfile`)
+    and shared by all requested tasks. Columns are analyzed NumPy-backed, except that the Arrow engine
+    keeps string columns Arrow-backed; results are the same with either engine.
+    """
 
     @dataclass(frozen=True)
     class FeatureSelectionParams:
         metrics: pd.Series
         levels: dict[str, tuple[float, float]]
         name: str
-        task: str
-        plot_func: Callable[..., plt.Axes]
-        plot_feature_wise: bool = True
 
-    def __init__(self, data: pd.DataFrame) -> None:
-        self._data = data
+    FEATURE_ENGINEERING_STRATEGIES: dict[str, str] = {
+        'bool': "Encode boolean features as 0/1 if needed:",
+        'int': "Bin or treat small-cardinality integer features (having few unique values) as categorical:",
+        'float': "Transform highly skewed (|skewness| > 1) float features (log, sqrt, Box-Cox):",
+        'datetime64[ns]': "Extract useful date parts (year, month, day, weekday etc) from datetime features:",
+        'category': "Encode category features using One-Hot, Target, Frequency or Ordinal Encoding methods."
+                    "Group rare categories to avoid sparsity:",
+        'object': "Convert string features to categorical ones, apply text transformations or drop:"
+    }
+    SELECTION_TASK_NAMES: dict[AnalysisTask, str] = {
+        AnalysisTask.REGRESSION: 'regression',
+        AnalysisTask.CLASSIFICATION: 'classification',
+        AnalysisTask.CLUSTERIZATION: 'clustering'
+    }
+
+    def __init__(self, data: pd.DataFrame, profile: DatasetProfile = None, engine: str = NUMPY_ENGINE) -> None:
+        self._data = to_numpy_backed(data, strings=engine != ARROW_ENGINE)
         self._report = None
         self._include_visualizations = True
+        if profile is not None:
+            self.__dict__.update((field.name, getattr(profile, field.name)) for field in fields(profile)
+                                 if field.name.startswith('_'))
+
+    # ========== Shared column profiles ==========
+    @cached_property
+    def _numeric(self) -> pd.DataFrame:
+        return self._data.select_dtypes('number')
+
+    @cached_property
+    def _correlations(self) -> pd.DataFrame:
+        return self._data.corr(numeric_only=True)
+
+    @cached_property
+    def _missing(self) -> pd.Series:
+        return self._data.isna().sum()
+
+    @cached_property
+    def _int_nunique(self) -> pd.Series:
+        return self._data.loc[:, self._data.dtypes == 'int'].nunique()
+
+    @cached_property
+    def _float_skew(self) -> pd.Series:
+        return self._data.loc[:, self._data.dtypes == 'float'].skew()
+
+    @cached_property
+    def _dtypes(self) -> pd.Series:
+        return to_numpy_backed(self._data.iloc[:0]).dtypes
+
+    @cached_property
+    def _row_hashes(self) -> np.ndarray:
+        return pd.util.hash_pandas_object(self._data, index=False).to_numpy()
+
+    @cached_property
+    def _pca_importance(self) -> pd.Series | None:
+        """
+        Weighted PCA score of all numeric columns, or None when there are none.
+        """
+        return self.__weighted_pca(self._numeric.dropna())
+
+    @staticmethod
+    def __weighted_pca(nums: pd.DataFrame) -> pd.Series | None:
+        if nums.shape[1] == 0:
+            return None
+        pca = import_module("sklearn.decomposition").PCA(random_state=42)
+        pca.fit_transform(nums)
+        weighted_pca = abs(pca.components_).T.dot(pca.explained_variance_ratio_)
+        return pd.Series(weighted_pca, index=nums.columns).sort_values(ascending=False)
 
-    def __validate_target(self, col: str) -> pd.Series:
+    def profile(self, content_hash: str) -> DatasetProfile:
+        return DatasetProfile(content_hash, **{field.name: getattr(self, field.name) for field in fields(DatasetProfile)
+                                               if field.name.startswith('_')},
+                              statistics=DatasetStatistics.of(self._data))
+
+    # ========== Analysis ==========
+    def __validate_target(self, col: str) -> tuple[pd.Series, TargetDiagnostics]:
         if col not in self._data:
             raise ColumnNotFound([col], list(self._data.columns))
-        series = self._data[col]
-        missing = series.isna().sum()
-        if missing:
-            pct = round(missing / len(series) * 100, 2)
+        series = to_numpy_backed(self._data[col])
+        missing = int(series.isna().sum())
+        return series, TargetDiagnostics(
+            column=col,
+            suitable=False,
+            dtype=str(series.dtype),
+            missing=missing,
+            missing_pct=round(missing / len(series) * 100, 2) if missing else 0.0
+        )
+
+    def __select_features(self, params: FeatureSelectionParams) -> FeatureSelection:
+        groups = []
+        for label, (low, high) in params.levels.items():
+            group = params.metrics[(params.metrics.abs() >= low) & (params.metrics.abs() < high)]
+            groups.append(FeatureGroup(label=label, low=low, high=high, features=group.to_dict()))
+        rest = params.metrics[params.metrics.abs() < min(l[0] for l in params.levels.values())]
+        return FeatureSelection(metric=params.name, groups=groups, remaining=rest.to_dict())
+
+    def __regression_analysis(self, target: str) -> tuple[TargetDiagnostics, FeatureSelectionParams | None]:
+        y, diagnostics = self.__validate_target(target)
+        if not pd.api.types.is_numeric_dtype(y) or pd.api.types.is_bool_dtype(y):
+            return diagnostics, None
+        diagnostics.suitable = True
+        # Outliers
+        q1, q3 = y.quantile([0.25, 0.75])
+        iqr = q3 - q1
+        diagnostics.outliers = int(((y < q1 - 1.5 * iqr) | (y > q3 + 1.5 * iqr)).sum())
+        # Correlation
+        return diagnostics, self.FeatureSelectionParams(
+            metrics=self._correlations[target],
+            levels={'highly': (0.7, 1.0), 'moderately': (0.5, 0.7), 'low': (0.3, 0.5)},
+            name='correlation'
+        )
+
+    def __classification_analysis(self, target: str) -> tuple[TargetDiagnostics, FeatureSelectionParams | None]:
+        y, diagnostics = self.__validate_target(target)
+        diagnostics.unique_values = y.nunique(True)
+        if not (pd.api.types.is_bool_dtype(y) or y.dtype == 'category' or (y.dtype == 'object' and diagnostics.unique_values <= 10)):
+            return diagnostics, None
+        diagnostics.suitable = True
+        y = y.astype('category')
+        # Class balance
+        counts = y.value_counts(normalize=True)
+        diagnostics.imbalance_ratio = counts.max() / counts.min()
+        diagnostics.rare_classes = {str(cls): share for cls, share in counts[counts < 0.01].items()}
+        # Mutual info
+        nums = self._numeric
+        if nums.shape[1] == 0:
+            return diagnostics, None
+
+        mutual_info_classif = import_module("sklearn.feature_selection").mutual_info_classif
+        valid_idx = pd.concat([nums, y], axis=1).dropna().index
+
+        return diagnostics, self.FeatureSelectionParams(
+            metrics=pd.Series(mutual_info_classif(nums.loc[valid_idx], y.loc[valid_idx], random_state=42), index=nums.columns, name=target),
+            levels={'highly': (0.1, 1.0), 'moderately': (0.05, 0.1), 'low': (0.01, 0.05)},
+            name='mutual information'
+        )
+
+    def __clustering_analysis(self, target: str) -> tuple[TargetDiagnostics, FeatureSelectionParams | None]:
+        # target is the column for future cluster labels, so it is never a feature
+        nums = self._numeric.drop(columns=[target], errors='ignore').dropna()
+        diagnostics = TargetDiagnostics(column=target, suitable=nums.shape[1] > 0, rows=len(self._data),
+                                        numeric_columns=nums.shape[1])
+        if nums.shape[1] == 0:
+            return diagnostics, None
+        # Weighted PCA score
+        imp = self.__weighted_pca(nums) if target in self._numeric else self._pca_importance
+        imp = imp.rename(target)
+        return diagnostics, self.FeatureSelectionParams(
+            metrics=imp,
+            levels={'highly': (0.01 * imp.sum(), imp.sum() + sys.float_info.epsilon)},
+            name='weighted PCA score'
+        )
+
+    def __feature_engineering(self, target: str) -> dict[str, list[str]]:
+        dtypes = self._dtypes.drop(target, errors='ignore')
+        recs = {}
+        for dt in self.FEATURE_ENGINEERING_STRATEGIES:
+            cols = dtypes[dtypes == dt].index.tolist()
+            if dt == 'int':
+                cols = [c for c in cols if (self._int_nunique[c] <= 20)]
+            if dt == 'float':
+                cols = [c for c in cols if abs(self._float_skew[c]) > 1]
+            if cols:
+                recs[dt] = cols
+        return recs
+
+    def _basic_stats(self) -> DatasetSummary:
+        with metrics.stage("analyze.basic_stats"):
+            df = self._data
+            types = to_numpy_backed(df.iloc[:0])
+            missing = self._missing
+            return DatasetSummary(
+                rows=len(df),
+                columns=len(df.columns),
+                numeric=self._numeric.shape[1],
+                categorical=types.select_dtypes('category').shape[1],
+                boolean=types.select_dtypes('bool').shape[1],
+                datetime=types.select_dtypes('datetime').shape[1],
+                string=types.select_dtypes('object').shape[1],
+                duplicates=pd.Series(self._row_hashes).duplicated().any(),
+                missing_pct=round(missing.sum() / df.size * 100, 2),
+                column_types=self._dtypes.astype(str).to_dict(),
+                missing_values=missing.to_dict()
+            )
+
+    def __analyze_task(self, task: AnalysisTarget) -> TaskAnalysis:
+        TASK_ANALYZERS: dict[str, Callable[[str], tuple]] = {
+            AnalysisTask.REGRESSION: self.__regression_analysis,
+            AnalysisTask.CLASSIFICATION: self.__classification_analysis,
+            AnalysisTask.CLUSTERIZATION: self.__clustering_analysis
+        }
+        with metrics.stage(f"analyze.{task.analysis_task.value}"):
+            target, selection_params = TASK_ANALYZERS[task.analysis_task](task.target_col)
+            section = TaskAnalysis(analysis_task=task.analysis_task, target_col=task.target_col, target=target)
+            if selection_params:
+                section.feature_selection = self.__select_features(selection_params)
+                section.feature_engineering = self.__feature_engineering(task.target_col)
+        return section
+
+    def analyze(self, params: AnalysisParams) -> AnalysisResponse:
+        with metrics.stage("analyze"):
+            summary = self._basic_stats() if params.include_basic_stats else None
+            if len(params.tasks) == 1:
+                tasks = [self.__analyze_task(params.tasks[0])]
+            else:  # task sections are independent and spend most of the time in numpy / scikit-learn
+                with ThreadPoolExecutor(max_workers=len(params.tasks)) as pool:
+                    tasks = list(pool.map(self.__analyze_task, params.tasks))
+        return AnalysisResponse(summary=summary, tasks=tasks)
+
+    # ========== Report rendering ==========
+    def __render_target_missing(self, target: TargetDiagnostics) -> None:
+        if target.missing:
             self._report.add_text(
-                f"* Target column '{col}' has {missing} missing values ({pct}% of all):\n"
+                f"* Target column '{target.column}' has {target.missing} missing values ({target.missing_pct}% of all):\n"
                 f"    - if missing values share is not too significant - "
                 f"consider removal or using median/mode/mean value for imputation.\n"
                 f"    - else - consider special methods of imputation "
                 f"(Forward Fill, Backward Fill, using exact value or based on other columns)."
             )
         else:
-            self._report.add_text(f"* Target column '{col}' has no missing values.")
-        return series
-
-    def __select_features(self, params: FeatureSelectionParams, target: str) -> None:
-        self._report.add_heading("Feature Selection Recommendations:")
-        significant_features = 0
-        for label, (low, high) in params.levels.items():
-            group = params.metrics[(params.metrics.abs() >= low) & (params.metrics.abs() < high)]
-            if group.empty:
-                self._report.add_text(f"* No {label} meaningful features found based on {params.name}.")
-                continue
-            significant_features += len(group)
-            self._report.add_text(f"* {len(group)} {label} meaningful features were found. Consider using them in {params.task}:")
-            # Visual summary
-            if 3 <= len(group) <= 7 and self._include_visualizations:
-                sns.heatmap(pd.DataFrame(group).T, annot=True, square=True, cbar=False, vmin=low, vmax=high, cmap='coolwarm', linewidth=.5)
-                self._report.add_plot(title=params.name.title())
-            else:
-                self._report.add_series(group)
-            # Pairwise plots
-            if self._include_visualizations:
-                if params.plot_feature_wise:
-                    plotters = [lambda ax, f=feat: params.plot_func(ax, f) for feat in group.index]
-                    self._report.add_subplots(plotters, suptitle=f"Dependency between '{target}' and {label} meaningful features")
-                else:
-                    params.plot_func(group.index)
-                    self._report.add_plot(title=f"{label.title()} meaningful features chart")
-        # Note on rest
-        rest = params.metrics[params.metrics.abs() < min(l[0] for l in params.levels.values())]
-        if significant_features == 0:
-            self._report.add_text(
-                f"* None of the features show significant relationship with target '{target}'.\n"
-                f"- You might want to collect more informative features, engineer new ones, or reassess data quality."
-            )
-        elif not rest.empty:
-            self._report.add_text("* Remaining features have low relevance.")
+            self._report.add_text(f"* Target column '{target.column}' has no missing values.")
 
-    def __regression_recs(self, target: str) -> FeatureSelectionParams | None:
-        y = self.__validate_target(target)
-        if pd.api.types.is_numeric_dtype(y) and not pd.api.types.is_bool_dtype(y):
-            self._report.add_text(f"* Target column '{target}' is numeric ({y.dtype}).")
+    def __render_regression(self, target: TargetDiagnostics) -> None:
+        col = target.column
+        self.__render_target_missing(target)
+        if target.suitable:
+            self._report.add_text(f"* Target column '{col}' is numeric ({target.dtype}).")
         else:
-            self._report.add_text(f"* Target column '{target}' is not numeric.\n"
+            self._report.add_text(f"* Target column '{col}' is not numeric.\n"
                                   f"* No further reporting can be performed. Consider encoding or converting it.")
             return
 
         if self._include_visualizations:
+            sns = import_module("seaborn")
+
+            y = to_numpy_backed(self._data[col])
             self._report.add_subplots([
-                lambda ax: sns.boxplot(x=y, ax=ax),
-                lambda ax: sns.histplot(y, kde=True, ax=ax).lines[0].set_color('crimson')
-            ], suptitle=f"'{target}' values distribution")
+                PlotSpec(sns.boxplot, {'x': y}),
+                PlotSpec(histplot_kde, {'data': y})
+            ], suptitle=f"'{col}' values distribution")
         # Outliers
-        q1, q3 = y.quantile([0.25, 0.75])
-        iqr = q3 - q1
-        out = ((y < q1 - 1.5 * iqr) | (y > q3 + 1.5 * iqr)).sum()
-        if out:
-            self._report.add_text(f"* {out} potential outliers detected in '{target}'.\n"
-                                 f"* Consider handling them or leave these values as-is if they are important.\n")
+        if target.outliers:
+            self._report.add_text(f"* {target.outliers} potential outliers detected in '{col}'.\n"
+                                  f"* Consider handling them or leave these values as-is if they are important.\n")
         else:
             self._report.add_text("* No potential outliers were detected in target column, which is perfect for building a "
-                                 "stable predictive model and indicates good data quality!\n")
-        self._report.add_text(f"* If the distribution of '{target}' is not normal (look at the chart above), consider "
-                             f"applying transformations such as log or Box-Cox to make the data more suitable for reporting.\n"
-                             f"A transformation can sometimes help stabilize variance and improve the model's performance.")
-        # Correlation
-
-        def plot_corr(ax: plt.Axes, feature: str) -> plt.Axes:
-            sns.regplot(x=y, y=self._data[feature], line_kws={"color": "orange"}, ax=ax)
-
-        return self.FeatureSelectionParams(
-            metrics=self._data.corr(numeric_only=True)[target],
-            levels={'highly': (0.7, 1.0), 'moderately': (0.5, 0.7), 'low': (0.3, 0.5)},
-            name='correlation',
-            task='regression',
-            plot_func=plot_corr
-        )
-
-    def __classification_recs(self, target: str) -> FeatureSelectionParams | None:
-        y = self.__validate_target(target)
-        if pd.api.types.is_bool_dtype(y) or y.dtype == 'category' or (y.dtype == 'object' and y.nunique(True) <= 10):
-            self._report.add_text(f"* Target column '{target}' seems to be discrete ({y.dtype}).")
-            y = y.astype('category')
+                                  "stable predictive model and indicates good data quality!\n")
+        self._report.add_text(f"* If the distribution of '{col}' is not normal (look at the chart above), consider "
+                              f"applying transformations such as log or Box-Cox to make the data more suitable for reporting.\n"
+                              f"A transformation can sometimes help stabilize variance and improve the model's performance.")
+
+    def __render_classification(self, target: TargetDiagnostics) -> None:
+        col = target.column
+        self.__render_target_missing(target)
+        if target.suitable:
+            self._report.add_text(f"* Target column '{col}' seems to be discrete ({target.dtype}).")
         else:
-            self._report.add_text(f"* Target column '{target}' seems to be continuous or containing raw text data.\n"
-                                  f"- No classification analysis can be performed.\n* Number of unique values: {y.nunique(True)}.")
+            self._report.add_text(f"* Target column '{col}' seems to be continuous or containing raw text data.\n"
+                                  f"- No classification analysis can be performed.\n* Number of unique values: {target.unique_values}.")
             return
 
         if self._include_visualizations:
-            sns.countplot(x=y, hue=y, legend=False)
-            self._report.add_plot(f"'{target}' class distribution")
+            sns = import_module("seaborn")
+
+            y = to_numpy_backed(self._data[col]).astype('category')
+            self._report.add_plot(FigureSpec.single(sns.countplot, title=f"'{col}' class distribution",
+                                                    x=y, hue=y, legend=False))
         # Class balance
-        counts = y.value_counts(normalize=True)
-        min_class, max_class = counts.min(), counts.max()
-        if max_class / min_class > 3:
+        if target.imbalance_ratio > 3:
             self._report.add_text(
                 f"* Target column is imbalanced:\n"
-                f"    - the most frequent class appears {round(max_class / min_class, 2)}x more often than the least frequent.\n"
+                f"    - the most frequent class appears {round(target.imbalance_ratio, 2)}x more often than the least frequent.\n"
                 f"    - consider using techniques like oversampling (SMOTE), undersampling, or class weighting in your model.")
         else:
             self._report.add_text("* Target column has a balanced distribution of classes.")
         # Rare categories
-        rare_categories = counts[counts < 0.01]
-        if not rare_categories.empty:
+        if target.rare_classes:
             self._report.add_text("* Some target classes are very rare (<1% of total data):")
-            self._report.add_series(rare_categories)
+            self._report.add_series(pd.Series(target.rare_classes, dtype=float).rename_axis(col))
             self._report.add_text("* Consider:\n"
-                                 "    - grouping rare classes into an 'Other' category (if appropriate)\n"
-                                 "    - collecting more data\n"
-                                 "    - using stratified sampling during training.")
-        # Mutual info
-
-        def plot_mi(ax: plt.Axes, feature: str) -> plt.Axes:
-            sns.boxplot(x=self._data[feature], y=y, hue=y, ax=ax, legend=False)
-
-        nums = self._data.select_dtypes('number')
-        if nums.shape[1] == 0:
-            return
-
-        valid_idx = pd.concat([nums, y], axis=1).dropna().index
+                                  "    - grouping rare classes into an 'Other' category (if appropriate)\n"
+                                  "    - collecting more data\n"
+                                  "    - using stratified sampling during training.")
 
-        return self.FeatureSelectionParams(
-            metrics=pd.Series(mutual_info_classif(nums.loc[valid_idx], y.loc[valid_idx], random_state=42), index=nums.columns, name=target),
-            levels={'highly': (0.1, 1.0), 'moderately': (0.05, 0.1), 'low': (0.01, 0.05)},
-            name='mutual information',
-            task='classification',
-            plot_func=plot_mi
-        )
-
-    def __clustering_recs(self, target: str) -> FeatureSelectionParams | None:
-        self._data.loc[:, target] = None
-        n = len(self._data)
+    def __render_clustering(self, target: TargetDiagnostics) -> None:
+        n = target.rows
         if n < 100:
             self._report.add_text(f"* Small data ({n} rows): clustering may be unreliable.")
         else:
             self._report.add_text(
-                f"* Considering your dataset size ({len(self._data)} rows), expected number of clusters should not be"
+                f"* Considering your dataset size ({n} rows), expected number of clusters should not be"
                 f" more than {n // 10}.\n    - Otherwise, clustering algorithms would have low performance.")
-        nums = self._data.select_dtypes('number').dropna()
-        if nums.shape[1] > 3:
+        if target.numeric_columns > 3:
             self._report.add_text(
-                f"\n* The dataset consists of {nums.shape[1]} numeric columns:\n    - To facilitate clustering "
+                f"\n* The dataset consists of {target.numeric_columns} numeric columns:\n    - To facilitate clustering "
                 f"and improve visualization, dimensionality reduction techniques like PCA or t-SNE should be applied."
             )
-        if nums.shape[1] == 0:
+        if not target.suitable:
             return
-        # Weighted PCA score
-        pca = PCA(random_state=42)
-        pca.fit_transform(nums)
-        weighted_pca = abs(pca.components_).T.dot(pca.explained_variance_ratio_)
-        imp = pd.Series(weighted_pca, index=nums.columns, name=target).sort_values(ascending=False)
         self._report.add_text(
             "\n* In the next section, looking at the feature distribution chart, consider preprocessing decisions:\n"
             "    1) whether scaling should be applied, as most clustering algorithms are distance-based;\n"
             "        - actually, scaling can result in a completely different set of important features.\n"
             "    2) whether outliers should be handled properly, as they can significantly impact the results;\n"
             "        - this operation can also significantly impact the feature importance.")
-        return self.FeatureSelectionParams(
-            metrics=imp,
-            levels={'highly': (0.01 * imp.sum(), imp.sum() + sys.float_info.epsilon)},
-            name='weighted PCA score',
-            task='clustering',
-            plot_func=lambda features: sns.boxplot(self._data[features], orient='h'),
-            plot_feature_wise=False
-        )
 
-    def __feature_engineering(self, target: str) -> None:
-        self._report.add_heading("Feature Engineering Recommendations:")
-        dtypes = self._data.drop(columns=[target]).dtypes
-        recs_given = False
-
-        strategies = {
-            'bool': "Encode boolean features as 0/1 if needed:",
-            'int': "Bin or treat small-cardinality integer features (having few unique values) as categorical:",
-            'float': "Transform highly skewed (|skewness| > 1) float features (log, sqrt, Box-Cox):",
-            'datetime64[ns]': "Extract useful date parts (year, month, day, weekday etc) from datetime features:",
-            'category': "Encode category features using One-Hot, Target, Frequency or Ordinal Encoding methods."
-                        "Group rare categories to avoid sparsity:",
-            'object': "Convert string features to categorical ones, apply text transformations or drop:"
-        }
-        for dt, msg in strategies.items():
-            cols = dtypes[dtypes == dt].index.tolist()
-            if not cols:
+    def __feature_plot(self, task: AnalysisTask, target: str, features: str | list[str]) -> PlotSpec:
+        sns = import_module("seaborn")
+
+        if task == AnalysisTask.REGRESSION:
+            return PlotSpec(sns.regplot, {'x': to_numpy_backed(self._data[target]), 'y': self._data[features],
+                                          'line_kws': {"color": "orange"}})
+        if task == AnalysisTask.CLASSIFICATION:
+            y = to_numpy_backed(self._data[target]).astype('category')
+            return PlotSpec(sns.boxplot, {'x': self._data[features], 'y': y, 'hue': y, 'legend': False})
+        return PlotSpec(sns.boxplot, {'data': self._data[features], 'orient': 'h'})
+
+    def __render_feature_selection(self, selection: FeatureSelection, task: AnalysisTask, target: str) -> None:
+        self._report.add_heading("Feature Selection Recommendations:")
+        for group in selection.groups:
+            if not group.features:
+                self._report.add_text(f"* No {group.label} meaningful features found based on {selection.metric}.")
                 continue
-            if dt == 'int':
-                cols = [c for c in cols if (self._data[c].nunique() <= 20)]
-            if dt == 'float':
-                cols = [c for c in cols if abs(self._data[c].skew()) > 1]
-            if cols:
-                recs_given = True
-                self._report.add_text(f"* {msg}")
-                self._report.add_series(cols)
+            self._report.add_text(f"* {len(group.features)} {group.label} meaningful features were found. "
+                                  f"Consider using them in {self.SELECTION_TASK_NAMES[task]}:")
+            metrics = pd.Series(group.features, name=target, dtype=float)
+            # Visual summary
+            if 3 <= len(metrics) <= 7 and self._include_visualizations:
+                sns = import_module("seaborn")
 
-        if not recs_given:
+                self._report.add_plot(FigureSpec.single(
+                    sns.heatmap, title=selection.metric.title(), data=pd.DataFrame(metrics).T, annot=True, square=True,
+                    cbar=False, vmin=group.low, vmax=group.high, cmap='coolwarm', linewidth=.5
+                ))
+            else:
+                self._report.add_series(metrics)
+            # Pairwise plots
+            if self._include_visualizations:
+                if task != AnalysisTask.CLUSTERIZATION:
+                    plots = [self.__feature_plot(task, target, feat) for feat in metrics.index]
+                    self._report.add_subplots(plots, suptitle=f"Dependency between '{target}' and {group.label} meaningful features")
+                else:
+                    self._report.add_plot(FigureSpec(plots=(self.__feature_plot(task, target, list(metrics.index)),),
+                                                     title=f"{group.label.title()} meaningful features chart"))
+        # Note on rest
+        if not any(group.features for group in selection.groups):
+            self._report.add_text(
+                f"* None of the features show significant relationship with target '{target}'.\n"
+                f"- You might want to collect more informative features, engineer new ones, or reassess data quality."
+            )
+        elif selection.remaining:
+            self._report.add_text("* Remaining features have low relevance.")
+
+    def __render_feature_engineering(self, recs: dict[str, list[str]]) -> None:
+        self._report.add_heading("Feature Engineering Recommendations:")
+        for dt, cols in recs.items():
+            self._report.add_text(f"* {self.FEATURE_ENGINEERING_STRATEGIES[dt]}")
+            self._report.add_series(cols)
+
+        if not recs:
             self._report.add_text("* All the features seem to be prepared for further analysis.")
 
-    def _basic_stats(self) -> None:
-        df = self._data
+    def __render_basic_stats(self, summary: DatasetSummary) -> None:
+        df = to_numpy_backed(self._data)
         self._report.add_heading("Overall dataset summary:")
 
         # Basic counts
-        missing_cells = df.isna().sum().sum()
-        counts = {
-            'rows': len(df),
-            'columns': len(df.columns),
-            'numeric': df.select_dtypes('number').shape[1],
-            'categorical': df.select_dtypes('category').shape[1],
-            'boolean': df.select_dtypes('bool').shape[1],
-            'datetime': df.select_dtypes('datetime').shape[1],
-            'string': df.select_dtypes('object').shape[1],
-            'duplicates': int(df.duplicated().any()),
-            'missing_pct': round(missing_cells / df.size * 100, 2),
-        }
-        summary = f"* Dataset contains {counts['rows']} rows, {counts['columns']} columns\n" \
-                  f"({counts['numeric']} numeric, {counts['categorical']} categorical, {counts['boolean']} boolean, " \
-                  f"{counts['datetime']} datetime, {counts['string']} string).\n" \
-                  f"* Duplicated rows {'found' if counts['duplicates'] else 'not found'}.\n" \
-                  f"* Missing values: {counts['missing_pct']}% ."
-        self._report.add_text(summary)
+        summary_text = f"* Dataset contains {summary.rows} rows, {summary.columns} columns\n" \
+                       f"({summary.numeric} numeric, {summary.categorical} categorical, {summary.boolean} boolean, " \
+                       f"{summary.datetime} datetime, {summary.string} string).\n" \
+                       f"* Duplicated rows {'found' if summary.duplicates else 'not found'}.\n" \
+                       f"* Missing values: {summary.missing_pct}% ."
+        self._report.add_text(summary_text)
 
         # Data types series
-        self._report.add_series(self._data.dtypes, title="Column Types:")
+        self._report.add_series(df.dtypes, title="Column Types:")
 
         # Missing value plot
-        if missing_cells > 0 and self._include_visualizations:
+        if any(summary.missing_values.values()) and self._include_visualizations:
             missing_df = pd.DataFrame({
-                'Missing': df.isna().sum(),
-                'Non-missing': df.notna().sum()
+                'Missing': self._missing,
+                'Non-missing': len(df) - self._missing
             })
-            missing_df.plot(kind='barh', stacked=True, title="Missing values by column", xlabel="Count")
-            self._report.add_plot()
+            self._report.add_plot(FigureSpec.single(stacked_barh, data=missing_df, title="Missing values by column",
+                                                    xlabel="Count"))
 
         # Descriptive statistics
         num_desc = df.describe()
@@ -290,27 +469,35 @@ class DataFrameAnalyzer:
         if not category_columns.empty:
             self._report.add_dataframe(category_columns.describe(), title="Non-numeric Stats:")
 
-    def _task_based_recs(self, analysis_task: AnalysisTask, target_column: str) -> None:
-        TASK_RECOMMENDERS: dict[str, Callable[..., None]] = {
-            AnalysisTask.REGRESSION: self.__regression_recs,
-            AnalysisTask.CLASSIFICATION: self.__classification_recs,
-            AnalysisTask.CLUSTERIZATION: self.__clustering_recs
+    def __render_task_based_recs(self, section: TaskAnalysis) -> None:
+        TASK_RENDERERS: dict[str, Callable[[TargetDiagnostics], None]] = {
+            AnalysisTask.REGRESSION: self.__render_regression,
+            AnalysisTask.CLASSIFICATION: self.__render_classification,
+            AnalysisTask.CLUSTERIZATION: self.__render_clustering
         }
-        self._report.add_heading(f"{analysis_task.title()} Recommendations for '{target_column}'")
-        selection_params = TASK_RECOMMENDERS[analysis_task](target_column)
-        if selection_params:
-            self.__select_features(selection_params, target_column)
-            self.__feature_engineering(target_column)
-        self._report.add_text(f"\n|====<   {analysis_task.title()} preparation completed !   >====|", monospaced=True, style="B")
-
-    def generate_report(self, params: AnalysisParams) -> DataFrameReport:
-        with plt.style.context('dark_background') if params.theme == DocumentTheme.DARK else nullcontext():
-            self._report = DataFrameReport(dpi=params.dpi, theme=params.theme, show_time=params.show_time)
-            self._include_visualizations = params.include_visualizations
-            if params.include_basic_stats:
-                self._basic_stats()
-            self._task_based_recs(params.analysis_task, params.target_col)
-            return self._report
+        task, target = section.analysis_task, section.target_col
+        self._report.add_heading(f"{task.title()} Recommendations for '{target}'")
+        TASK_RENDERERS[task](section.target)
+        if section.feature_selection:
+            self.__render_feature_selection(section.feature_selection, task, target)
+            self.__render_feature_engineering(section.feature_engineering)
+        self._report.add_text(f"\n|====<   {task.title()} preparation completed !   >====|", monospaced=True, style="B")
+
+    def generate_report(self, params: AnalysisParams, executor: Executor = None,
+                        figure_cache: "FigureCache" = None) -> "DataFrameReport":
+        from .dataframe_report import DataFrameReport
+
+        result = self.analyze(params)
+        self._report = DataFrameReport(dpi=params.dpi, theme=params.theme, show_time=params.show_time,
+                                       image_format=params.image_format, image_quality=params.image_quality,
+                                       executor=executor, figure_cache=figure_cache)
+        self._include_visualizations = params.include_visualizations
+        with metrics.stage("report.layout"):
+            if result.summary:
+                self.__render_basic_stats(result.summary)
+            for section in result.tasks:
+                self.__render_task_based_recs(section)
+        return self._report
 
     @staticmethod
     def get_metadata(data: pd.DataFrame) -> MetadataResponse:
@@ -0,0 +1,315 @@
+import os
+import time
+import traceback
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from io import BytesIO
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+
+from pydantic import ValidationError
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import HTTPException, InternalServerError
+from werkzeug.utils import secure_filename
+
+from app.errors import ParameterError, ReadingError, ValidationFailed
+from app.extensions import metrics
+from app.models import BatchFileResult, BatchFileStatus, BatchManifest, BatchPipelineParams, FullPipelineParams
+from .dataframe_analyzer import DataFrameAnalyzer
+from .dataframe_loader import DataFrameLoader
+from .dataframe_preprocessor import DataFramePreprocessor
+
+if TYPE_CHECKING:
+    from app.extensions.process_pool import ProcessPool
+
+ARCHIVE_EXTENSION = "zip"
+MANIFEST_NAME = "manifest.json"
+TASK_PARAMS = {"analysis_task", "target_col", "tasks"}
+
+PipelineResult = tuple[BatchFileResult, bytes | None]  # result of a file, with its PDF report when it succeeded
+
+
+def _error(e: HTTPException) -> dict[str, Any]:
+    return {"error": e.name, "code": e.code, "description": e.description}
+
+
+def _failed(filename: str, e: HTTPException, seconds: float = 0.0, stages: dict[str, float] = None) -> PipelineResult:
+    return BatchFileResult(filename=filename, status=BatchFileStatus.FAILED, error=_error(e), seconds=seconds,
+                           stages=stages or {}), None
+
+
+def run_pipeline(filename: str, content: bytes, params: FullPipelineParams) -> PipelineResult:
+    """
+    Full pipeline of one batch file, run in a batch pool process. Errors are returned instead of raised,
+    so a file never fails the others.
+    """
+    stages = {}
+    start = time.perf_counter()
+
+    def timed(stage: str, func: Callable[[], Any]) -> Any:
+        stage_start = time.perf_counter()
+        value = func()
+        stages[stage] = time.perf_counter() - stage_start
+        return value
+
+    try:
+        file = FileStorage(BytesIO(content), filename=filename)
+        data = timed("load", lambda: DataFrameLoader(file, params).load_data())
+        data = timed("preprocess", lambda: DataFramePreprocessor(data).preprocess(params))
+        report = timed("analyze", lambda: DataFrameAnalyzer(data, engine=params.engine).generate_report(params))
+        pdf = timed("report", lambda: report.to_bytes().getvalue())
+    except HTTPException as e:
+        return _failed(filename, e, time.perf_counter() - start, stages)
+    except Exception as e:
+        tb_str = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
+        print(f"[BATCH] Unexpected error processing '{filename}':\n{tb_str}")
+        return _failed(filename, InternalServerError(), time.perf_counter() - start, stages)
+    return BatchFileResult(filename=filename, status=BatchFileStatus.DONE, seconds=time.perf_counter() - start,
+                           stages=stages), pdf
+
+
+@dataclass(frozen=True)
+class BatchFile:
+    """
+    An uploaded file or a member of an uploaded archive, read when it is sent to processing. Files whose
+    parameters are invalid carry the error instead.
+    """
+    filename: str
+    size: int
+    read: Callable[[], bytes]
+    params: FullPipelineParams | None = None
+    error: HTTPException | None = None
+
+
+class _InThreadExecutor(Executor):
+    """
+    Executor running submitted calls right away in the calling thread.
+    """
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+class _ChunkBuffer:
+    """
+    Write-only file object the zip archive is written to, handing out what was written so far.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        chunks, self._chunks = self._chunks, []
+        return iter(chunks)
+
+
+class DataFrameBatch:
+    """
+    Full pipeline for many files at once. Files are processed concurrently on the batch process pool (or one by one
+    in the request thread without one) and `stream` produces a zip archive with a PDF report of every successfully
+    processed file, in completion order, followed by `manifest.json` with the status and timings of every file.
+    A file crashing a pool process fails alone: the files that were running next to it are retried one at a time.
+    """
+
+    def __init__(self, files: list[BatchFile], pool: "ProcessPool") -> None:
+        self.files = files
+        self.pool = pool
+
+    @classmethod
+    def from_uploads(cls, uploads: list[FileStorage], params: BatchPipelineParams, max_files: int,
+                     max_member_size: int, max_expanded_size: int, pool: "ProcessPool") -> "DataFrameBatch":
+        """
+        Expand uploaded zip archives into their files and resolve the parameters of every file: the shared ones
+        updated with `file_params` given for its name (a member name for files from archives). `analysis_task` and
+        `target_col` given for a file update the shared ones, `tasks` given for a file replace all shared tasks.
+        Members larger than `max_member_size` bytes fail, batches larger than `max_expanded_size` bytes
+        in total are rejected (sizes declared by archives, members are also read no further than the limit).
+        """
+        files = []
+        for upload in uploads:
+            if upload.filename.split('.')[-1].lower() != ARCHIVE_EXTENSION:
+                files.append(BatchFile(upload.filename, upload.stream.seek(0, os.SEEK_END), cls._reader(upload)))
+                continue
+            try:
+                archive = zipfile.ZipFile(upload.stream)
+                members = [info for info in archive.infolist() if not info.is_dir()
+                           and not any(part.startswith(('.', '__')) for part in info.filename.split('/'))]
+            except (zipfile.BadZipFile, OSError):
+                error = ReadingError(upload.filename, "The archive is corrupted or not a zip file")
+                files.append(BatchFile(upload.filename, 0, bytes, error=error))
+                continue
+            for info in members:
+                if info.file_size > max_member_size:
+                    error = ReadingError(info.filename, f"The file is larger than {max_member_size} bytes extracted")
+                    files.append(BatchFile(info.filename, 0, bytes, error=error))
+                else:
+                    files.append(BatchFile(info.filename, info.file_size,
+                                           cls._member_reader(archive, info, max_member_size)))
+        if len(files) > max_files:
+            raise ParameterError("file", f"{len(files)} files", f"at most {max_files} files (archives expanded)")
+        expanded_size = sum(file.size for file in files)
+        if expanded_size > max_expanded_size:
+            raise ParameterError("file", f"{expanded_size} bytes in total",
+                                 f"at most {max_expanded_size} bytes (archives expanded)")
+        unknown = set(params.file_params) - {file.filename for file in files}
+        if unknown:
+            raise ParameterError("file_params", sorted(unknown), [file.filename for file in files])
+
+        shared = params.model_dump(exclude={"file_params", *TASK_PARAMS}, exclude_unset=True)
+        shared_tasks = cls._shared_tasks(params)
+        for i, file in enumerate(files):
+            if file.error is not None:
+                continue
+            overrides = params.file_params.get(file.filename, {})
+            tasks = {} if "tasks" in overrides else shared_tasks
+            try:
+                file_params = FullPipelineParams.model_validate({**shared, **tasks, **overrides})
+                files[i] = BatchFile(file.filename, file.size, file.read, params=file_params)
+            except ValidationError as e:
+                error = ValidationFailed.from_validation_error(e)
+                files[i] = BatchFile(file.filename, file.size, file.read, error=error)
+            except HTTPException as e:
+                files[i] = BatchFile(file.filename, file.size, file.read, error=e)
+        return cls(files, pool)
+
+    @staticmethod
+    def _shared_tasks(params: BatchPipelineParams) -> dict[str, Any]:
+        """
+        Shared task params as given: validation moves `analysis_task` and `target_col` to the front of `tasks`,
+        they are taken back so a file can update them separately.
+        """
+        tasks, given = list(params.tasks), params.model_fields_set
+        shared = {}
+        if "analysis_task" in given:
+            task = tasks.pop(0)
+            shared["analysis_task"] = task.analysis_task
+            if "target_col" in given:
+                shared["target_col"] = task.target_col
+        elif params.target_col is not None:
+            shared["target_col"] = params.target_col
+        return {**shared, "tasks": [task.model_dump() for task in tasks]}
+
+    @staticmethod
+    def _reader(upload: FileStorage) -> Callable[[], bytes]:
+        def read() -> bytes:
+            upload.stream.seek(0)  # may have been read by request validation
+            return upload.stream.read()
+        return read
+
+    @staticmethod
+    def _member_reader(archive: zipfile.ZipFile, info: zipfile.ZipInfo, max_size: int) -> Callable[[], bytes]:
+        def read() -> bytes:
+            try:
+                with archive.open(info) as member:
+                    content = member.read(max_size + 1)  # the declared size may be false
+            except (zipfile.BadZipFile, zlib.error, OSError):
+                raise ReadingError(info.filename, "The archive member is corrupted")
+            if len(content) > max_size:
+                raise ReadingError(info.filename, f"The file is larger than {max_size} bytes extracted")
+            return content
+        return read
+
+    def _submit(self, executor: Executor, i: int) -> Future:
+        file = self.files[i]
+        try:
+            content = file.read()
+        except HTTPException as e:  # fails before it is processed
+            future = Future()
+            future.set_result(_failed(file.filename, e))
+            return future
+        return executor.submit(run_pipeline, file.filename, content, file.params)
+
+    def _results(self) -> Iterator[tuple[int, PipelineResult]]:
+        """
+        Results by position of the file in `files`, as they are done.
+        """
+        queue = deque(i for i, file in enumerate(self.files) if file.error is None)
+        for i, file in enumerate(self.files):
+            if file.error is not None:
+                yield i, _failed(file.filename, file.error)
+
+        suspects: deque[int] = deque()  # were running when a pool process crashed
+        pending: dict[Future, tuple[int, bool]] = {}  # future -> file position, whether it ran alone
+        try:
+            while queue or suspects or pending:
+                executor = self.pool.executor
+                if executor is None:
+                    i = (suspects or queue).popleft()
+                    yield i, self._submit(_InThreadExecutor(), i).result()
+                    continue
+
+                try:
+                    if suspects and not pending:
+                        i = suspects.popleft()
+                        pending[self._submit(executor, i)] = i, True
+                    while queue and not suspects and len(pending) < self.pool.workers * 2:
+                        i = queue.popleft()
+                        pending[self._submit(executor, i)] = i, False
+                except BrokenProcessPool:
+                    self.pool.shutdown(executor)
+                    suspects.appendleft(i)
+                    if not pending:
+                        continue
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i, alone = pending.pop(future)
+                    try:
+                        yield i, future.result()
+                    except BrokenProcessPool:
+                        self.pool.shutdown(executor)
+                        if alone:
+                            crash = InternalServerError("Processing the file crashed its worker process.")
+                            yield i, _failed(self.files[i].filename, crash)
+                        else:
+                            suspects.append(i)
+        finally:
+            for future in pending:  # the client went away
+                future.cancel()
+
+    @staticmethod
+    def _report_name(filename: str, taken: set[str]) -> str:
+        stem = secure_filename(os.path.splitext(filename)[0]) or "report"
+        name, n = f"{stem}.pdf", 1
+        while name in taken:
+            n += 1
+            name = f"{stem}_{n}.pdf"
+        taken.add(name)
+        return name
+
+    def stream(self) -> Iterator[bytes]:
+        start = time.perf_counter()
+        buffer = _ChunkBuffer()
+        results, taken = {}, {MANIFEST_NAME}
+        with zipfile.ZipFile(buffer, "w") as archive:
+            for i, (result, pdf) in self._results():
+                metrics.inc("batch_files_total", "Files processed by batch requests", status=result.status.value)
+                for stage, seconds in result.stages.items():
+                    metrics.record_stage(f"batch.{stage}", seconds)
+                if pdf is not None:
+                    result.report = self._report_name(result.filename, taken)
+                    archive.writestr(result.report, pdf)  # PDFs are compressed already
+                results[i] = result
+                yield from buffer.drain()
+
+            files = [results[i] for i in range(len(self.files))]
+            succeeded = sum(result.status == BatchFileStatus.DONE for result in files)
+            manifest = BatchManifest(files=files, succeeded=succeeded, failed=len(files) - succeeded,
+                                     workers=max(self.pool.workers, 1), seconds=time.perf_counter() - start)
+            archive.writestr(MANIFEST_NAME, manifest.model_dump_json(indent=2), compress_type=zipfile.ZIP_DEFLATED)
+        yield from buffer.drain()
@@ -0,0 +1,165 @@
+import pickle
+import zlib
+from importlib.util import find_spec
+from tempfile import SpooledTemporaryFile
+from typing import IO, Any, Callable, Iterator, Iterable
+
+import numpy as np
+import pandas as pd
+
+
+def _gzip_compressor() -> Any:
+    return zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+def _zstd_compressor() -> Any:
+    import zstandard
+    return zstandard.ZstdCompressor(level=3).compressobj()
+
+
+CONTENT_ENCODINGS: dict[str, Callable[[], Any]] = {"gzip": _gzip_compressor}  # in order of preference
+
+if find_spec("zstandard") is not None:  # optional dependency
+    CONTENT_ENCODINGS = {"zstd": _zstd_compressor, **CONTENT_ENCODINGS}
+
+
+class _ChunkSink:
+    """
+    Write-only file object handing written bytes over in chunks, for writers that need a file to write into.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class DataFrameExporter:
+    """
+    Serializes a dataset into export formats as a stream of byte chunks, so a large export never has to be
+    held in memory as a whole. Text formats are written in row chunks, columnar ones in record batches and
+    container formats (Excel, pickle) are spooled to a temporary file first.
+    """
+    CHUNK_ROWS = 10_000                     # rows per CSV / JSON Lines chunk and per Parquet row group
+    READ_CHUNK_BYTES = 1024 * 1024          # chunk size when streaming a spooled file
+    SPOOL_MAX_BYTES = 16 * 1024 * 1024      # spooled exports larger than this are moved from memory to disk
+
+    def __init__(self, data: pd.DataFrame) -> None:
+        self.data = data
+
+    def _row_chunks(self) -> Iterator[pd.DataFrame]:
+        for start in range(0, len(self.data), self.CHUNK_ROWS):
+            yield self.data.iloc[start:start + self.CHUNK_ROWS]
+
+    @staticmethod
+    def _date_format(values: pd.Series) -> str | None:
+        """
+        Format pandas writes naive datetimes without fractional seconds in: dates only when all times are midnight.
+        None for other values, which are left for pandas to format.
+        """
+        if not (isinstance(values.dtype, np.dtype) and values.dtype.kind == "M"):
+            return None
+        values = values.dropna()
+        if (values.dt.floor("s") != values).any():
+            return None
+        return "%Y-%m-%d %H:%M:%S" if (values.dt.normalize() != values).any() else "%Y-%m-%d"
+
+    def _csv(self) -> Iterator[bytes]:
+        if self.data.empty:
+            yield self.data.to_csv().encode()
+            return
+        # pandas picks the datetime format of each chunk from its own values, so chunks of midnight dates
+        # would lose their times: the format is picked over the whole column once and applied to every chunk
+        formats = {i: fmt for i in range(self.data.shape[1]) if (fmt := self._date_format(self.data.iloc[:, i]))}
+        index = self.data.index
+        index_format = None if isinstance(index, pd.MultiIndex) else self._date_format(index.to_series())
+        for i, chunk in enumerate(self._row_chunks()):
+            if formats or index_format:
+                chunk = chunk.copy(deep=False)
+                for j, fmt in formats.items():
+                    chunk.isetitem(j, chunk.iloc[:, j].dt.strftime(fmt))
+                if index_format:
+                    chunk.index = chunk.index.strftime(index_format).rename(chunk.index.name)
+            yield chunk.to_csv(header=i == 0).encode()
+
+    def _jsonl(self) -> Iterator[bytes]:
+        for chunk in self._row_chunks():
+            yield chunk.to_json(orient="records", lines=True).encode()
+
+    def _json(self) -> Iterator[bytes]:
+        if not self.data.columns.is_unique:  # pandas rejects these, keep its error
+            yield self.data.to_json().encode()
+            return
+        # column oriented JSON is an object of columns, so it can be written one column at a time
+        yield b"{"
+        for i in range(self.data.shape[1]):
+            yield (b"," if i else b"") + self.data.iloc[:, [i]].to_json()[1:-1].encode()
+        yield b"}"
+
+    def _parquet(self) -> Iterator[bytes]:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.Schema.from_pandas(self.data)
+        preserve_index = not isinstance(self.data.index, pd.RangeIndex)  # range index is kept in schema metadata
+        sink = _ChunkSink()
+        with pq.ParquetWriter(sink, schema) as writer:
+            for chunk in self._row_chunks():
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=preserve_index))
+                yield sink.drain()
+        yield sink.drain()
+
+    def _spooled(self, write: Callable[[IO[bytes]], None]) -> Iterator[bytes]:
+        with SpooledTemporaryFile(max_size=self.SPOOL_MAX_BYTES) as f:
+            write(f)
+            f.seek(0)
+            while chunk := f.read(self.READ_CHUNK_BYTES):
+                yield chunk
+
+    def _excel(self) -> Iterator[bytes]:
+        return self._spooled(self.data.to_excel)
+
+    def _pickle(self) -> Iterator[bytes]:
+        return self._spooled(lambda f: pickle.dump(self.data, f, protocol=pickle.HIGHEST_PROTOCOL))
+
+    @staticmethod
+    def _compressed(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+        compressor = CONTENT_ENCODINGS[encoding]()
+        for chunk in chunks:
+            if compressed := compressor.compress(chunk):
+                yield compressed
+        yield compressor.flush()
+
+    def stream(self, export_format: str, encoding: str = None) -> Iterator[bytes]:
+        """
+        Chunks of the dataset serialized in `export_format`, compressed with a `CONTENT_ENCODINGS` one if given.
+        """
+        EXPORTERS = {
+            "csv": self._csv,
+            "json": self._json,
+            "jsonl": self._jsonl,
+            "excel": self._excel,
+            "pickle": self._pickle,
+            "parquet": self._parquet,
+        }
+        chunks = (chunk for chunk in EXPORTERS[export_format]() if chunk)
+        return chunks if encoding is None else self._compressed(chunks, encoding)
@@ -7,7 +7,9 @@ import pandas as pd
 from werkzeug.datastructures.file_storage import FileStorage
 
 from app.errors import EmptyDataset, ReadingError
+from app.extensions import metrics
 from app.models import LoadingParams
+from .arrow_engine import to_arrow_backed
 
 
 class DataFrameLoader:
@@ -19,7 +21,33 @@ class DataFrameLoader:
     def __error(self, desc: str) -> ReadingError:
         raise ReadingError(self.file.filename, desc)
 
+    def _load_arrow_csv(self) -> pd.DataFrame:
+        """
+        CSV parsed by the multithreaded Arrow reader into Arrow-backed columns. Dates and times are read as strings,
+        as pandas reads them, and converted by preprocessing instead.
+        """
+        import pyarrow as pa
+
+        start = self.file.stream.tell()
+        options = dict(sep=self.params.separator, decimal=self.params.decimal, engine="pyarrow",
+                       dtype_backend="pyarrow")
+        data = pd.read_csv(self.file.stream, **options)
+        temporal = {col: pd.ArrowDtype(pa.string()) for col, dtype in data.dtypes.items()
+                    if pa.types.is_temporal(dtype.pyarrow_dtype)}
+        if temporal:
+            self.file.stream.seek(start)
+            data = pd.read_csv(self.file.stream, dtype=temporal, **options)
+        return data
+
     def _load_csv(self) -> pd.DataFrame:
+        if self.params.arrow and self.params.thousands is None and len(self.params.separator or ",") == 1:
+            import pyarrow as pa
+
+            start = self.file.stream.tell()
+            try:
+                return self._load_arrow_csv()
+            except (pa.ArrowException, ValueError):  # options or contents the Arrow reader does not support
+                self.file.stream.seek(start)
         return pd.read_csv(self.file.stream, sep=self.params.separator, thousands=self.params.thousands,
                            decimal=self.params.decimal)
 
@@ -68,7 +96,10 @@ class DataFrameLoader:
             raise self.__error(f"Unsupported file extension '{extension}'. Supported types: {list(LOADERS.keys())}")
 
         try:
-            data = LOADERS[extension]()
+            with metrics.stage("load"):
+                data = LOADERS[extension]()
+                if self.params.arrow:
+                    data = to_arrow_backed(data)
         except ReadingError:
             raise
         except Exception:
@@ -78,4 +109,5 @@ class DataFrameLoader:
         if data.empty:
             raise EmptyDataset(f"The uploaded file '{self.file.filename}' contains no data")
 
+        metrics.dataset(*data.shape)
         return data
@@ -1,3 +1,4 @@
+import re
 import string
 from typing import Any, Callable, List
 
@@ -5,7 +6,12 @@ import numpy as np
 import pandas as pd
 
 from app.errors import EmptyDataset, ColumnNotFound, TransformationError
+from app.extensions import metrics
 from app.models.request.preprocessing_params import ColumnList, PreprocessingParams
+from .arrow_engine import is_arrow_string, map_columns, to_arrow_backed, to_numpy_backed
+
+PUNCTUATION_PATTERN = f"[{re.escape(string.punctuation)}]"
+DIGITS_PATTERN = f"[{re.escape(string.digits)}]"
 
 
 class DataFramePreprocessor:
@@ -36,12 +42,34 @@ class DataFramePreprocessor:
             (params.scale_numeric, self._scale_numeric),
         ]
 
-        for condition, action in steps:
-            if condition:
-                action(params)
+        with metrics.stage("preprocess"):
+            self.data = to_arrow_backed(self.data) if params.arrow else to_numpy_backed(self.data)
+            for condition, action in steps:
+                if condition:
+                    with metrics.stage(f"preprocess.{action.__name__.lstrip('_')}"):
+                        self._run(action, params)
+            if params.arrow:
+                self.data = to_arrow_backed(self.data)
 
         return self.data
 
+    def _run(self, action: Callable[[PreprocessingParams], None], params: PreprocessingParams) -> None:
+        """
+        Run a step; with the Arrow engine a step failing on Arrow-backed columns is rerun from the data it started
+        with, NumPy-backed, so it fails only where the NumPy engine fails too.
+        """
+        if not params.arrow:
+            action(params)
+            return
+        import pyarrow as pa
+
+        before = self.data.copy(deep=False)  # the step may fail after replacing some columns or rows
+        try:
+            action(params)
+        except (pa.ArrowException, TypeError, NotImplementedError, TransformationError):
+            self.data = to_numpy_backed(before)
+            action(params)
+
     def _resolve_columns(self, cols: ColumnList) -> List[str]:
         if cols == "*":
             return list(self.data.columns)
@@ -60,13 +88,15 @@ class DataFramePreprocessor:
 
     # ========== String operations ==========
     def _lowercase_columns(self, params: PreprocessingParams) -> None:
-        self._apply_str_op(params.case_insensitive_columns, lambda s: s.lower(), "Lowercasing")
+        self._apply_str_op(params.case_insensitive_columns, lambda s: s.lower(), "Lowercasing",
+                           vectorized=lambda col: col.str.lower())
 
     def _remove_punctuation(self, params: PreprocessingParams) -> None:
         self._apply_str_op(
             params.clear_punct_columns,
             lambda s: s.translate(str.maketrans('', '', string.punctuation)),
-            "Punctuation Removal"
+            "Punctuation Removal",
+            vectorized=lambda col: col.str.replace(PUNCTUATION_PATTERN, '', regex=True)
         )
 
     def _remove_digits(self, params: PreprocessingParams) -> None:
@@ -74,14 +104,28 @@ class DataFramePreprocessor:
             params.clear_digits_columns,
             lambda s: s.translate(str.maketrans('', '', string.digits)),
             "Digits Removal",
+            vectorized=lambda col: col.str.replace(DIGITS_PATTERN, '', regex=True)
         )
 
-    def _apply_str_op(self, cols: ColumnList, func: Callable[[Any], Any], operation: str, el_wise: bool = True) -> None:
+    def _apply_str_op(self, cols: ColumnList, func: Callable[[Any], Any], operation: str, el_wise: bool = True,
+                      vectorized: Callable[[pd.Series], pd.Series] = None) -> None:
+        """
+        Apply `func` to the values (or with `el_wise=False` to the whole) of columns. Arrow-backed string columns
+        are transformed by the `vectorized` equivalent when given, falling back to `func` if it fails.
+        """
         columns = self._resolve_columns(cols)
 
         def elem_func(x: Any) -> Any:
             return func(x) if pd.notna(x) else x
 
+        arrow_columns = [col for col in columns if vectorized is not None and is_arrow_string(self.data[col].dtype)]
+        if arrow_columns:
+            try:
+                map_columns(self.data, arrow_columns, vectorized)
+                columns = [col for col in columns if col not in arrow_columns]
+            except Exception:
+                pass  # transformed value by value below
+
         for col in columns:
             try:
                 self.data[col] = self.data[col].apply(elem_func) if el_wise else func(self.data[col])
@@ -98,6 +142,7 @@ class DataFramePreprocessor:
 
     def _set_index(self, params: PreprocessingParams) -> None:
         cols = self._resolve_columns(params.index_cols)
+        self.data[cols] = to_numpy_backed(self.data[cols])
         self.data.set_index(cols, inplace=True)
         self._ensure_not_empty("index setting")
 
@@ -131,7 +176,7 @@ class DataFramePreprocessor:
 
     # ========== Outliers & duplicates ==========
     def _drop_outliers(self, params: PreprocessingParams) -> None:
-        num = self.data.select_dtypes(include='number')
+        num = to_numpy_backed(self.data.select_dtypes(include='number'))
         z: pd.DataFrame = np.abs((num - num.mean()) / num.std())
         mask = (z > params.outliers_threshold).any(axis=1)
         self.data = self.data.loc[~mask]
@@ -144,10 +189,12 @@ class DataFramePreprocessor:
 
     # ========== Type conversions ==========
     def _convert_datetime(self, params: PreprocessingParams) -> None:
-        self._apply_str_op(params.datetime_columns, pd.to_datetime, "Datetime conversion")
+        self._apply_str_op(params.datetime_columns, pd.to_datetime, "Datetime conversion",
+                           vectorized=lambda col: to_numpy_backed(pd.to_datetime(col)))
 
     def _convert_category(self, params: PreprocessingParams) -> None:
-        self._apply_str_op(params.category_columns, lambda col: col.astype('category'), "Category conversion", False)
+        self._apply_str_op(params.category_columns, lambda col: to_numpy_backed(col).astype('category'),
+                           "Category conversion", False)
 
     # ========== Category merging ==========
     def _combine_rare(self, params: PreprocessingParams) -> None:
@@ -162,4 +209,4 @@ class DataFramePreprocessor:
         cols = self.data.select_dtypes(include='number').columns
         if cols.empty:
             return
-        self.data[cols] = params.scaler.fit_transform(self.data[cols])
+        self.data[cols] = params.scaler.fit_transform(to_numpy_backed(self.data[cols]))
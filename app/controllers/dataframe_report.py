@@ -1,36 +1,154 @@
+import copy
+import hashlib
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future
 from datetime import datetime, timezone
+from functools import cache, partial
 from io import BytesIO
+from typing import Callable, Iterator, Protocol
 
-import matplotlib
-import matplotlib.pyplot as plt
 import pandas as pd
+from fontTools import ttLib
 from fpdf import FPDF  # noqa
+from fpdf.fonts import SubsetMap, TTFFont
+from fpdf.output import OutputProducer
 
-from app.models.request.analysis_params import DocumentTheme
+from app.extensions import metrics
+from app.models.request.analysis_params import DocumentTheme, ImageFormat
+from .report_figures import FigureSpec, ImageEncoding, PlotSpec, figure_key, render_figure
 
-matplotlib.use('Agg')
 pd.set_option('display.precision', 4)
+logging.getLogger("fpdf.svg").setLevel(logging.ERROR)  # matplotlib SVG <style>/<metadata> tags are not needed
+
+REPORT_FONTS: tuple[tuple[str, str, str], ...] = (
+    ("Monospace-Unicode", "", "fonts/MonospaceRegular-6ZWg.ttf"),
+    ("Monospace-Unicode", "B", "fonts/MonospaceBold-zmP0.ttf"),
+    ("Monospace-Unicode", "I", "fonts/MonospaceOblique-5meB.ttf"),
+)
+THEME_COLORS: dict[DocumentTheme, dict[str, tuple[int, int, int]]] = {
+    DocumentTheme.LIGHT: {},
+    DocumentTheme.DARK: {"background": (0, 0, 0), "text": (255, 255, 255), "draw": (255, 255, 255)},
+}
+
+
+class _StreamCancelled(Exception):
+    """
+    Raised inside PDF serialization when the consumer of `DataFrameReport.stream` stopped reading.
+    """
+
+
+class _StreamingBuffer:
+    """
+    Stand-in for the bytearray fpdf2 serializes the document into. It only tracks the written length (used for
+    object offsets in the xref table) and hands data over in chunks instead of accumulating the whole file.
+    """
+
+    def __init__(self, sink: Callable[[bytes], None], chunk_size: int) -> None:
+        self._sink = sink
+        self._chunk_size = chunk_size
+        self._chunk = bytearray()
+        self._length = 0
+        self.md5 = hashlib.new("md5", usedforsecurity=False)  # running hash for the default PDF file identifier
+
+    def __iadd__(self, data: bytes) -> "_StreamingBuffer":
+        self._length += len(data)
+        self.md5.update(data)
+        self._chunk += data
+        if len(self._chunk) >= self._chunk_size:
+            self.flush()
+        return self
+
+    def __len__(self) -> int:
+        return self._length
+
+    def flush(self) -> None:
+        if self._chunk:
+            self._sink(bytes(self._chunk))
+            self._chunk = bytearray()
+
+
+class _StreamingOutputProducer(OutputProducer):
+
+    def __init__(self, fpdf: FPDF, buffer: _StreamingBuffer) -> None:
+        super().__init__(fpdf)
+        self.buffer = buffer
+
+    def bufferize(self) -> _StreamingBuffer:
+        buffer = super().bufferize()
+        buffer.flush()
+        return buffer
+
+
+@cache
+def _font_template(family: str, style: str, fname: str) -> tuple[TTFFont, bytes]:
+    """
+    Parse a TTF file once per process. Glyph metrics of the returned font are shared by all reports,
+    while the raw file bytes let each report subset its own copy of the font on output.
+    """
+    pdf = FPDF()
+    pdf.add_font(family, style=style, fname=fname)
+    with open(fname, "rb") as f:
+        return pdf.fonts[f"{family.lower()}{style}"], f.read()
+
+
+def _render_timed(*render_args) -> tuple[bytes, float]:
+    """
+    Render a figure and measure it where it is rendered, which may be a render pool process.
+    """
+    start = time.perf_counter()
+    image = render_figure(*render_args)
+    return image, time.perf_counter() - start
+
+
+class FigureCache(Protocol):
+    def get(self, key: str) -> bytes | None: ...
+
+    def put(self, key: str, data: bytes) -> None: ...
 
 
 class DataFrameReport(FPDF):
+    """
+    PDF report built in two phases: `add_*` methods only record content blocks (figures are submitted for
+    rendering straight away), then `build` lays the blocks out in their original order once figures are ready.
+    """
 
-    def __init__(self, dpi: int = 200, theme: DocumentTheme = DocumentTheme.LIGHT, show_time: bool = True) -> None:
+    def __init__(self, dpi: int = 200, theme: DocumentTheme = DocumentTheme.LIGHT, show_time: bool = True,
+                 image_format: ImageFormat = ImageFormat.PNG, image_quality: int = 85,
+                 executor: Executor = None, figure_cache: FigureCache = None) -> None:
         super().__init__()
         self._dpi = dpi
+        self._theme = theme
+        self._encoding = ImageEncoding(image_format, image_quality, max_width=round(self.epw * self.k / 72 * dpi))
         self._show_time = show_time
+        self._executor = executor
+        self._figure_cache = figure_cache
+        self._blocks: list[Callable[[], None]] = []
         self.create_time = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
 
-        if theme == DocumentTheme.DARK:
-            self.set_page_background((0, 0, 0))
-            self.set_text_color(255, 255, 255)
-            self.set_draw_color(255, 255, 255)
+        colors = THEME_COLORS[theme]
+        if colors:
+            self.set_page_background(colors["background"])
+            self.set_text_color(*colors["text"])
+            self.set_draw_color(*colors["draw"])
 
-        self.add_font("Monospace-Unicode", style="", fname="fonts/MonospaceRegular-6ZWg.ttf")
-        self.add_font("Monospace-Unicode", style="b", fname="fonts/MonospaceBold-zmP0.ttf")
-        self.add_font("Monospace-Unicode", style="i", fname="fonts/MonospaceOblique-5meB.ttf")
+        for family, style, fname in REPORT_FONTS:
+            self._add_cached_font(family, style, fname)
 
         self.add_page()
 
+    def _add_cached_font(self, family: str, style: str, fname: str) -> None:
+        template, raw = _font_template(family, style, fname)
+        font = copy.copy(template)
+        font.i = len(self.fonts) + 1
+        font.ttfont = ttLib.TTFont(BytesIO(raw), recalcTimestamp=False, fontNumber=0, lazy=True)
+        font.missing_glyphs = []
+        reserved = "\x00 \r\n" + (f"0123456789{self.str_alias_nb_pages}" if self.str_alias_nb_pages else "")
+        font.subset = SubsetMap(font, [ord(char) for char in reserved])
+        self.fonts[font.fontkey] = font
+
     def header(self) -> None:
         self.set_font('Arial', 'B', 15)
         self.cell(text="Data Analysis Report", center=True)
@@ -47,18 +165,12 @@ class DataFrameReport(FPDF):
         self.set_font('Arial', 'I', 10)
         self.cell(w=0, text=f'Page {self.page_no()}', align='C')
 
+    # ========== Content recording ==========
     def add_text(self, text: str = "", monospaced: bool = False, style: str = "") -> None:
-        if monospaced:
-            self.set_font("Monospace-Unicode", style, 14)
-        else:
-            self.set_font("Times", style, 14)
-
-        self.write(text=text+"\n")
+        self._blocks.append(partial(self._draw_text, text, monospaced, style))
 
     def add_heading(self, text: str = "") -> None:
-        self.ln(5)
-        self.add_text(text="        " + text, style="B")
-        self.ln(3)
+        self._blocks.append(partial(self._draw_heading, text))
 
     def add_series(self, s: pd.Series, title: str = "") -> None:
         self.add_dataframe(df=pd.DataFrame(s), title=title, col_names=False)
@@ -78,35 +190,113 @@ class DataFrameReport(FPDF):
             self.add_text(text=chunk.to_string(header=col_names)+"\n", monospaced=True)
         self.add_text()
 
-    def add_plot(self, title: str = None) -> None:
-        if title:
-            plt.title(title)
-        img_buf = BytesIO()
-        plt.savefig(img_buf, dpi=self._dpi, bbox_inches='tight')
+    def add_plot(self, figure: FigureSpec) -> None:
+        render_args = (figure, self._dpi, self._theme, self._encoding)
+        key = figure_key(*render_args) if self._figure_cache is not None else None
+        cached = self._figure_cache.get(key) if key else None
+        if cached is not None:
+            self._blocks.append(partial(self._draw_image, cached))
+        elif self._executor is None:
+            self._blocks.append(lambda: self._draw_image(self._rendered(key, *_render_timed(*render_args))))
+        else:
+            future: Future = self._executor.submit(_render_timed, *render_args)
+            self._blocks.append(lambda: self._draw_image(self._rendered(key, *future.result())))
+
+    def add_subplots(self, plots: list[PlotSpec], cols: int = 2, suptitle: str = None) -> None:
+        for figure in FigureSpec.grid(plots, cols, suptitle):
+            self.add_plot(figure)
+
+    def _rendered(self, key: str | None, png: bytes, render_seconds: float) -> bytes:
+        metrics.record_stage("report.render", render_seconds)
+        if key:
+            self._figure_cache.put(key, png)
+        return png
+
+    # ========== Layout ==========
+    def _draw_text(self, text: str, monospaced: bool, style: str) -> None:
+        if monospaced:
+            self.set_font("Monospace-Unicode", style, 14)
+        else:
+            self.set_font("Times", style, 14)
+
+        self.write(text=text+"\n")
+
+    def _draw_heading(self, text: str) -> None:
+        self.ln(5)
+        self._draw_text("        " + text, False, "B")
+        self.ln(3)
+
+    def _draw_image(self, image: bytes) -> None:
+        img_buf = BytesIO(image)
         self.image(img_buf, w=self.epw)
         img_buf.close()
-        plt.close()
 
-    def _add_subplots_row(self, plot_funcs: list[callable], cols: int = 2, suptitle: str = None) -> None:
-        fig, axes = plt.subplots(1, cols, figsize=(5 * cols, 5))
-        axes = axes if cols > 1 else [axes]
+    def _default_file_id(self, buffer: bytearray | _StreamingBuffer) -> str:
+        if not isinstance(buffer, _StreamingBuffer):
+            return super()._default_file_id(buffer)
+        id_hash = buffer.md5.copy()
+        if self.creation_date:
+            id_hash.update(self.creation_date.strftime("%Y%m%d%H%M%S").encode("utf8"))
+        hash_hex = id_hash.hexdigest().upper()
+        return f"<{hash_hex}><{hash_hex}>"
 
-        for ax, func in zip(axes, plot_funcs):
-            func(ax)
+    def build(self) -> None:
+        """
+        Lay out recorded blocks in order, waiting for figures that are still being rendered.
+        """
+        blocks, self._blocks = self._blocks, []
+        with metrics.stage("report.build"):
+            for block in blocks:
+                block()
 
-        for ax in axes[len(plot_funcs):]:
-            ax.axis('off')
+    def to_bytes(self) -> BytesIO:
+        self.build()
+        with metrics.stage("report.output"):
+            return BytesIO(self.output())
 
-        if suptitle:
-            fig.suptitle(suptitle, fontsize=cols*7, fontweight='bold', y=1.05)
+    def stream(self, chunk_size: int = 64 * 1024, max_pending_chunks: int = 8) -> Iterator[bytes]:
+        """
+        Lay out the report and yield the serialized PDF in chunks as fpdf2 writes its objects (pages, images, fonts).
+        The whole layout is done before the first chunk (pages refer to the total page count and fonts are subset
+        to the glyphs used), streaming only avoids holding the serialized file in memory next to the document.
+        Serialization runs in a helper thread that is paused while `max_pending_chunks` chunks wait for the consumer.
+        """
+        chunks: queue.Queue = queue.Queue(maxsize=max_pending_chunks)
+        cancelled = threading.Event()
+        done = object()
 
-        plt.tight_layout(pad=1.0)
-        self.add_plot()
+        def sink(chunk: bytes) -> None:
+            while not cancelled.is_set():
+                try:
+                    chunks.put(chunk, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+            raise _StreamCancelled()
 
-    def add_subplots(self, plot_funcs: list[callable], cols: int = 2, suptitle: str = None) -> None:
-        self._add_subplots_row(plot_funcs[:cols], cols, suptitle)
-        for i in range(cols, len(plot_funcs), cols):
-            self._add_subplots_row(plot_funcs[i:i + cols], cols)
+        def produce() -> None:
+            try:
+                with metrics.stage("report.output"):
+                    self.output(output_producer_class=partial(_StreamingOutputProducer,
+                                                              buffer=_StreamingBuffer(sink, chunk_size)))
+                result = done
+            except BaseException as e:
+                result = e
+            while not cancelled.is_set():
+                try:
+                    chunks.put(result, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
 
-    def to_bytes(self) -> BytesIO:
-        return BytesIO(self.output())
+        self.build()
+        producer = threading.Thread(target=produce, name="pdf-stream", daemon=True)
+        producer.start()
+        try:
+            while (item := chunks.get()) is not done:
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            cancelled.set()
+            producer.join()
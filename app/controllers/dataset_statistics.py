@@ -0,0 +1,160 @@
+from dataclasses import dataclass, replace
+from typing import Hashable
+
+import numpy as np
+import pandas as pd
+
+FP_ERROR = 1e-14  # sums below this are floating point noise, as in pandas
+
+
+@dataclass(frozen=True)
+class ColumnMoments:
+    """
+    Count, mean and sums of 2nd and 3rd powers of deviations from the mean of float columns, merged with
+    the pairwise formulas of Chan et al.
+    """
+    count: np.ndarray
+    mean: np.ndarray
+    m2: np.ndarray
+    m3: np.ndarray
+
+    @classmethod
+    def of(cls, values: np.ndarray) -> "ColumnMoments":
+        count = (~np.isnan(values)).sum(axis=0).astype(float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, np.nansum(values, axis=0) / count, 0.0)
+        deviations = np.where(np.isnan(values), 0.0, values - mean)
+        return cls(count, mean, (deviations ** 2).sum(axis=0), (deviations ** 3).sum(axis=0))
+
+    def merge(self, other: "ColumnMoments") -> "ColumnMoments":
+        n_a, n_b = self.count, other.count
+        n = n_a + n_b
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = np.where(n > 0, other.mean - self.mean, 0.0)
+            share = np.where(n > 0, n_b / n, 0.0)
+            mean = self.mean + delta * share
+            m2 = self.m2 + other.m2 + delta ** 2 * n_a * share
+            m3 = (self.m3 + other.m3 + delta ** 3 * n_a * share * (n_a - n_b) / np.where(n > 0, n, 1)
+                  + 3 * delta * (n_a * other.m2 - n_b * self.m2) / np.where(n > 0, n, 1))
+        return ColumnMoments(n, mean, m2, m3)
+
+    def skew(self) -> np.ndarray:
+        """
+        Bias-corrected skewness, computed like `pandas.Series.skew`.
+        """
+        n = self.count
+        m2 = np.where(np.abs(self.m2) < FP_ERROR, 0.0, self.m2)
+        m3 = np.where(np.abs(self.m3) < FP_ERROR, 0.0, self.m3)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result = n * (n - 1) ** 0.5 / (n - 2) * (m3 / m2 ** 1.5)
+        result = np.where(m2 == 0, 0.0, result)
+        return np.where(n < 3, np.nan, result)
+
+
+@dataclass(frozen=True)
+class DatasetStatistics:
+    """
+    Additive sums the column profiles of a dataset are derived from, so the profile of a dataset with appended
+    rows is updated from the new rows alone. Sums of products are taken around fixed column shifts (means of the
+    first rows) to stay numerically stable as rows are added.
+    """
+    missing: pd.Series                        # missing values by column
+    int_counts: dict[Hashable, pd.Series]     # value frequencies of int columns
+    float_columns: pd.Index
+    float_moments: ColumnMoments
+    pair_columns: pd.Index                    # numeric and bool columns, correlated pairwise
+    shift: np.ndarray
+    pair_counts: np.ndarray                   # [i, j]: rows where both columns are present
+    pair_sums: np.ndarray                     # [i, j]: sum of column i over those rows
+    pair_squares: np.ndarray                  # [i, j]: sum of squares of column i over those rows
+    pair_products: np.ndarray                 # [i, j]: sum of products of both columns
+    pca_columns: pd.Index                     # numeric columns, analyzed over rows where all are present
+    complete_rows: int
+    complete_sums: np.ndarray
+    complete_products: np.ndarray
+
+    @classmethod
+    def of(cls, data: pd.DataFrame, shift: np.ndarray = None) -> "DatasetStatistics":
+        pairs = data.select_dtypes(['number', 'bool'])
+        values = pairs.to_numpy(dtype=float, na_value=np.nan)
+        if shift is None:
+            shift = ColumnMoments.of(values).mean
+        values = values - shift
+        present = (~np.isnan(values)).astype(float)
+        values = np.nan_to_num(values)
+
+        numeric = pairs.columns.isin(data.select_dtypes('number').columns)
+        complete = values[:, numeric][present[:, numeric].all(axis=1)]
+        floats = data.loc[:, data.dtypes == 'float']
+        return cls(
+            missing=data.isna().sum(),
+            int_counts={col: data[col].value_counts() for col in data.columns[data.dtypes == 'int']},
+            float_columns=floats.columns,
+            float_moments=ColumnMoments.of(floats.to_numpy(dtype=float)),
+            pair_columns=pairs.columns,
+            shift=shift,
+            pair_counts=present.T @ present,
+            pair_sums=values.T @ present,
+            pair_squares=(values ** 2).T @ present,
+            pair_products=values.T @ values,
+            pca_columns=pairs.columns[numeric],
+            complete_rows=len(complete),
+            complete_sums=complete.sum(axis=0),
+            complete_products=complete.T @ complete
+        )
+
+    def update(self, rows: pd.DataFrame) -> "DatasetStatistics":
+        """
+        Statistics of the dataset with `rows` (of the same columns and dtypes) appended.
+        """
+        new = DatasetStatistics.of(rows, self.shift)
+        int_counts = {col: counts.add(new.int_counts[col], fill_value=0).astype('int64')
+                      for col, counts in self.int_counts.items()}
+        return replace(
+            self,
+            missing=self.missing + new.missing,
+            int_counts=int_counts,
+            float_moments=self.float_moments.merge(new.float_moments),
+            pair_counts=self.pair_counts + new.pair_counts,
+            pair_sums=self.pair_sums + new.pair_sums,
+            pair_squares=self.pair_squares + new.pair_squares,
+            pair_products=self.pair_products + new.pair_products,
+            complete_rows=self.complete_rows + new.complete_rows,
+            complete_sums=self.complete_sums + new.complete_sums,
+            complete_products=self.complete_products + new.complete_products
+        )
+
+    def int_nunique(self) -> pd.Series:
+        return pd.Series({col: len(counts) for col, counts in self.int_counts.items()}, dtype='int64')
+
+    def float_skew(self) -> pd.Series:
+        return pd.Series(self.float_moments.skew(), index=self.float_columns, dtype=float)
+
+    def correlations(self) -> pd.DataFrame:
+        """
+        Pearson correlations over pairwise complete rows, like `pandas.DataFrame.corr`.
+        """
+        n, sums, squares = self.pair_counts, self.pair_sums, self.pair_squares
+        with np.errstate(invalid="ignore", divide="ignore"):
+            covariance = self.pair_products - sums * sums.T / n
+            variance = squares - sums ** 2 / n
+            variance = np.where(variance > squares * FP_ERROR, variance, np.nan)
+            corr = np.clip(covariance / np.sqrt(variance * variance.T), -1, 1)
+        np.fill_diagonal(corr, np.where(np.isnan(np.diag(corr)), np.nan, 1.0))
+        return pd.DataFrame(corr, index=self.pair_columns, columns=self.pair_columns)
+
+    def pca_importance(self) -> pd.Series | None:
+        """
+        Weighted PCA score of numeric columns over complete rows, from the eigendecomposition of their covariance
+        matrix (what PCA computes), or None when there are no numeric columns or too few complete rows.
+        """
+        n = self.complete_rows
+        if len(self.pca_columns) == 0 or n < 2:
+            return None
+        covariance = (self.complete_products - np.outer(self.complete_sums, self.complete_sums) / n) / (n - 1)
+        variances, components = np.linalg.eigh(covariance)
+        variances = np.clip(variances, 0, None)
+        if variances.sum() == 0:
+            return None
+        weighted_pca = abs(components).dot(variances / variances.sum())
+        return pd.Series(weighted_pca, index=self.pca_columns).sort_values(ascending=False)
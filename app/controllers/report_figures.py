@@ -0,0 +1,224 @@
+import hashlib
+import pickle
+from dataclasses import dataclass, field
+from functools import cache
+from io import BytesIO
+from typing import TYPE_CHECKING, Any, Callable
+
+import pandas as pd
+
+from app.models.request.analysis_params import DocumentTheme, ImageFormat
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from matplotlib.figure import Figure
+
+THEME_STYLES: dict[DocumentTheme, str | None] = {  # matplotlib style library names
+    DocumentTheme.LIGHT: None,
+    DocumentTheme.DARK: 'dark_background',
+}
+SAVEFIG_PAD_INCHES = 0.1
+SVG_MAX_BYTES = 256 * 1024  # vector output above this size is not a "simple chart" anymore and gets rasterized
+
+
+@dataclass(frozen=True)
+class PlotSpec:
+    """
+    A single chart drawn on its own axes. `func` must be a module-level callable accepting `ax` keyword argument,
+    so the spec stays picklable and can be rendered in another process.
+    """
+    func: Callable[..., Any]
+    kwargs: dict[str, Any] = field(default_factory=dict)
+
+    def draw(self, ax: "Axes") -> None:
+        self.func(ax=ax, **self.kwargs)
+
+
+@dataclass(frozen=True)
+class FigureSpec:
+    plots: tuple[PlotSpec, ...]
+    cols: int = 1
+    title: str | None = None
+    suptitle: str | None = None
+
+    @classmethod
+    def single(cls, func: Callable[..., Any], title: str | None = None, **kwargs: Any) -> "FigureSpec":
+        return cls(plots=(PlotSpec(func, kwargs),), title=title)
+
+    @classmethod
+    def grid(cls, plots: list[PlotSpec], cols: int = 2, suptitle: str | None = None) -> list["FigureSpec"]:
+        """
+        Split plots into rows of `cols` charts each. Only the first row carries the suptitle.
+        """
+        return [
+            cls(plots=tuple(plots[i:i + cols]), cols=cols, suptitle=suptitle if i == 0 else None)
+            for i in range(0, len(plots), cols)
+        ]
+
+
+@dataclass(frozen=True)
+class ImageEncoding:
+    format: ImageFormat = ImageFormat.PNG
+    quality: int = 85                   # JPEG quality
+    max_width: int | None = None        # width in pixels the image is printed at, larger renders are downsampled
+
+
+# ========== Content hashing ==========
+def _update_hash(h: Any, value: Any) -> None:
+    if isinstance(value, (pd.Series, pd.DataFrame, pd.Index)):
+        if isinstance(value, pd.DataFrame):
+            h.update(repr((list(value.columns), value.dtypes.astype(str).tolist())).encode())
+        else:
+            h.update(repr((type(value).__name__, value.name, str(value.dtype))).encode())
+            if isinstance(value.dtype, pd.CategoricalDtype):
+                _update_hash(h, [value.dtype.categories, value.dtype.ordered])
+        try:
+            h.update(pd.util.hash_pandas_object(value, index=not isinstance(value, pd.Index)).values.tobytes())
+        except TypeError:  # unhashable cell values (lists, dicts etc.)
+            h.update(pickle.dumps(value))
+    elif isinstance(value, dict):
+        for k in sorted(value, key=str):
+            h.update(repr(k).encode())
+            _update_hash(h, value[k])
+    elif isinstance(value, (list, tuple)):
+        h.update(f"{type(value).__name__}:{len(value)}".encode())
+        for item in value:
+            _update_hash(h, item)
+    elif callable(value):
+        h.update(f"{value.__module__}.{value.__qualname__}".encode())
+    else:
+        h.update(repr(value).encode())
+
+
+def figure_key(figure: FigureSpec, dpi: int, theme: DocumentTheme, encoding: ImageEncoding = ImageEncoding()) -> str:
+    """
+    Content address of a rendered figure: identical plotted data, chart settings, dpi, theme and encoding
+    give identical keys.
+    """
+    h = hashlib.sha256()
+    _update_hash(h, [figure.cols, figure.title, figure.suptitle, dpi, theme.value,
+                     encoding.format.value, encoding.quality, encoding.max_width])
+    for plot in figure.plots:
+        _update_hash(h, plot.func)
+        _update_hash(h, plot.kwargs)
+    return h.hexdigest()
+
+
+# ========== Plot functions ==========
+def histplot_kde(ax: "Axes", data: pd.Series) -> None:
+    import seaborn as sns
+
+    sns.histplot(data, kde=True, ax=ax).lines[0].set_color('crimson')
+
+
+def stacked_barh(ax: "Axes", data: pd.DataFrame, title: str = "", xlabel: str = "") -> None:
+    data.plot(kind='barh', stacked=True, title=title, xlabel=xlabel, ax=ax)
+
+
+# ========== Rendering ==========
+@cache
+def setup_matplotlib() -> None:
+    """
+    Import plotting libraries on first use, select the non-interactive backend and the process-wide base style
+    (never changed afterwards; themes are applied per figure).
+    """
+    import matplotlib
+    import seaborn as sns
+
+    matplotlib.use('Agg')
+    sns.set_style("darkgrid")
+
+
+def _theme_style(theme: DocumentTheme) -> dict[str, Any]:
+    import matplotlib.style
+
+    name = THEME_STYLES[theme]
+    return matplotlib.style.library[name] if name else {}
+
+
+def _apply_theme(fig: "Figure", style: dict[str, Any]) -> None:
+    """
+    Recolor figure artists explicitly instead of switching global rcParams, so concurrently rendered figures
+    cannot leak styles into each other. Data annotations (e.g. heatmap values) keep their own colors.
+    """
+    if not style:
+        return
+    fig.set_facecolor(style['figure.facecolor'])
+    for ax in fig.axes:
+        ax.set_facecolor(style['axes.facecolor'])
+        ax.title.set_color(style['text.color'])
+        ax.xaxis.label.set_color(style['axes.labelcolor'])
+        ax.yaxis.label.set_color(style['axes.labelcolor'])
+        ax.tick_params(axis='x', which='both', colors=style['xtick.color'], grid_color=style['grid.color'])
+        ax.tick_params(axis='y', which='both', colors=style['ytick.color'], grid_color=style['grid.color'])
+        for spine in ax.spines.values():
+            spine.set_edgecolor(style['axes.edgecolor'])
+        legend = ax.get_legend()
+        if legend is not None:
+            legend.get_frame().set_facecolor(style['axes.facecolor'])
+            for text in legend.get_texts():
+                text.set_color(style['text.color'])
+
+
+def _fit_dpi(fig: "Figure", dpi: int, max_width: int | None) -> float:
+    """
+    Lower the dpi so the cropped figure is no wider than it is printed, instead of rasterizing extra pixels.
+    """
+    if not max_width:
+        return dpi
+    fig.draw_without_rendering()
+    width = fig.get_tightbbox().width + 2 * SAVEFIG_PAD_INCHES
+    return min(dpi, max_width / width)
+
+
+def _encode(fig: "Figure", dpi: float, encoding: ImageEncoding) -> bytes:
+    img_buf = BytesIO()
+    if encoding.format == ImageFormat.SVG:
+        fig.savefig(img_buf, format='svg', bbox_inches='tight', pad_inches=SAVEFIG_PAD_INCHES)
+        if img_buf.tell() <= SVG_MAX_BYTES:
+            return img_buf.getvalue()
+        img_buf = BytesIO()
+    if encoding.format == ImageFormat.JPEG:
+        fig.savefig(img_buf, format='jpeg', dpi=dpi, bbox_inches='tight', pad_inches=SAVEFIG_PAD_INCHES,
+                    pil_kwargs={'quality': encoding.quality, 'optimize': True})
+        return img_buf.getvalue()
+
+    fig.savefig(img_buf, format='png', dpi=dpi, bbox_inches='tight', pad_inches=SAVEFIG_PAD_INCHES)
+    if encoding.format == ImageFormat.PNG8:
+        from PIL import Image
+
+        img_buf.seek(0)
+        quantized = Image.open(img_buf).convert('RGB').quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+        img_buf = BytesIO()
+        quantized.save(img_buf, format='png', optimize=True)
+    return img_buf.getvalue()
+
+
+def render_figure(figure: FigureSpec, dpi: int, theme: DocumentTheme = DocumentTheme.LIGHT,
+                  encoding: ImageEncoding = ImageEncoding()) -> bytes:
+    setup_matplotlib()
+    from matplotlib.figure import Figure
+
+    style = _theme_style(theme)
+    if figure.cols == 1:
+        fig = Figure()
+        axes = [fig.subplots()]
+    else:
+        fig = Figure(figsize=(5 * figure.cols, 5))
+        axes = list(fig.subplots(1, figure.cols))
+
+    for ax, plot in zip(axes, figure.plots):
+        plot.draw(ax)
+
+    for ax in axes[len(figure.plots):]:
+        ax.axis('off')
+
+    if figure.title:
+        axes[0].set_title(figure.title)
+    if figure.suptitle:
+        fig.suptitle(figure.suptitle, fontsize=figure.cols * 7, fontweight='bold', y=1.05, color=style.get('text.color'))
+    if figure.cols > 1:
+        fig.tight_layout(pad=1.0)
+    _apply_theme(fig, style)
+
+    return _encode(fig, _fit_dpi(fig, dpi, encoding.max_width), encoding)
@@ -0,0 +1,26 @@
+import pandas as pd
+
+from app.lazy_import import import_module
+from app.models.request.analysis_params import DocumentTheme
+from .report_figures import FigureSpec, PlotSpec, histplot_kde, render_figure, stacked_barh
+
+
+def warm_up() -> None:
+    """
+    Load what analysis and reports otherwise load on first use: sklearn, plotting libraries with their styles and
+    font lists (by rendering a tiny figure in every theme) and fpdf with the parsed report fonts.
+    Meant for the master process of a prefork server (e.g. gunicorn --preload), so workers forked afterwards
+    share these pages copy-on-write instead of each loading them on its first request.
+    """
+    for module in ("sklearn.decomposition", "sklearn.feature_selection", "sklearn.preprocessing"):
+        import_module(module)
+
+    from .dataframe_report import REPORT_FONTS, _font_template
+
+    for font in REPORT_FONTS:
+        _font_template(*font)
+    data = pd.Series([1.0, 2.0, 2.0, 3.0], name="x")
+    figure = FigureSpec(plots=(PlotSpec(histplot_kde, {"data": data}),
+                               PlotSpec(stacked_barh, {"data": data.to_frame()})), cols=2, suptitle="x")
+    for theme in DocumentTheme:
+        render_figure(figure, dpi=10, theme=theme)
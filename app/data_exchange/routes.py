@@ -1,13 +1,19 @@
-from io import BytesIO
+import json
+from typing import Iterator
 
-from flask import request, url_for, send_file, jsonify
+import numpy as np
+import pandas as pd
+from flask import request, url_for, send_file, jsonify, Response as FlaskResponse, stream_with_context
 from flask_pydantic_spec import Response, FileResponse, MultipartFormRequest
 
 from app.data_exchange import bp
 from app.errors import ParameterMissing
-from app.extensions import storage, spec
-from app.controllers import DataFrameLoader, DataFrameAnalyzer
-from app.models import LoadingParams, UploadResponse, DatasetTokenHeader, InfoResponse, ExportParams
+from app.extensions import storage, spec, dataset_profiler, export_cache, admission
+from app.extensions.admission import LOAD_COPIES
+from app.controllers import DataFrameLoader, DataFrameAnalyzer, DataFrameExporter
+from app.controllers.dataframe_exporter import CONTENT_ENCODINGS
+from app.models import (LoadingParams, UploadResponse, DatasetTokenHeader, InfoResponse, ExportParams, PreviewParams,
+                        PreviewResponse, MetadataResponse, AppendResponse)
 
 
 @bp.route("/datasets", methods=["POST"])
@@ -23,6 +29,7 @@ def upload_file() -> Response:
 
     params = request.context.body  # noqa
 
+    admission.admit(admission.upload_size(file), LOAD_COPIES)
     data = DataFrameLoader(file, params).load_data()
     dataset_id, access_key = storage.save_dataset(data)
 
@@ -31,7 +38,8 @@ def upload_file() -> Response:
         dataset_id=dataset_id,
         access_key=access_key,
         next_step=url_for("preprocessing.preprocess_dataset", dataset_id=dataset_id),
-        metadata=DataFrameAnalyzer.get_metadata(data)
+        metadata=DataFrameAnalyzer.get_metadata(data),
+        profile_status=dataset_profiler.status(storage.get_dataset_key(dataset_id, access_key))
     )
 
     return jsonify(response_data.dict())
@@ -44,13 +52,48 @@ def upload_file() -> Response:
     tags=["Dataset info"]
 )
 def get_info(dataset_id: str) -> Response:
-    data = storage.get_dataset(dataset_id)
+    dataset_key = storage.get_dataset_key(dataset_id)
+    layout = storage.read_layout(dataset_key)
 
     response_data = InfoResponse(
         message="Dataset found successfully",
         dataset_id=dataset_id,
         next_step=url_for("preprocessing.preprocess_dataset", dataset_id=dataset_id),
-        metadata=DataFrameAnalyzer.get_metadata(data)
+        metadata=MetadataResponse(num_rows=layout.num_rows, num_columns=len(layout.columns),
+                                  columns=layout.dtypes.astype(str).to_dict()),
+        profile_status=dataset_profiler.status(dataset_key, dataset_profiler.load(dataset_key))
+    )
+
+    return jsonify(response_data.dict())
+
+
+@bp.route("/datasets/<dataset_id>/append", methods=["POST"])
+@spec.validate(
+    body=MultipartFormRequest(model=LoadingParams),
+    headers=DatasetTokenHeader,
+    resp=Response(HTTP_200=AppendResponse),
+    tags=["Append rows"]
+)
+def append_rows(dataset_id: str) -> Response:
+    file = request.files.get('file')
+    if file is None or file.filename == '':
+        raise ParameterMissing("file")
+
+    params = request.context.body  # noqa
+    dataset_key = storage.get_dataset_key(dataset_id)
+
+    admission.admit(admission.upload_size(file), LOAD_COPIES)
+    rows = DataFrameLoader(file, params).load_data()
+    layout = storage.append_dataset(dataset_key, rows)
+
+    response_data = AppendResponse(
+        message="Rows appended successfully",
+        dataset_id=dataset_id,
+        next_step=url_for("reporting.get_recommendations", dataset_id=dataset_id),
+        metadata=MetadataResponse(num_rows=layout.num_rows, num_columns=len(layout.columns),
+                                  columns=layout.dtypes.astype(str).to_dict()),
+        profile_status=dataset_profiler.status(dataset_key, dataset_profiler.load(dataset_key)),
+        appended_rows=len(rows)
     )
 
     return jsonify(response_data.dict())
@@ -65,9 +108,77 @@ def get_info(dataset_id: str) -> Response:
 )
 def download_dataset(dataset_id: str) -> FileResponse:
     params: ExportParams = request.context.query  # noqa
-    data = storage.get_dataset(dataset_id)
+    download_name = f'{dataset_id}.{params.ext}'
+    encoding = request.accept_encodings.best_match(list(CONTENT_ENCODINGS)) if params.compressible else None
+    headers = {'Vary': 'Accept-Encoding'}
+    if encoding:
+        headers['Content-Encoding'] = encoding
+
+    if not params.is_full:  # only whole dataset exports are worth caching
+        export = DataFrameExporter(_read_slice(dataset_id, params)[0]).stream(params.format, encoding)
+        return FlaskResponse(stream_with_context(export), mimetype=params.mimetype,
+                             headers={**headers, 'Content-Disposition': f'inline; filename={download_name}'})
+
+    etag = "-".join(filter(None, [storage.get_dataset_hash(dataset_id), params.format, encoding]))
+    if request.if_none_match.contains(etag):
+        response = FlaskResponse(status=304, headers=headers)
+        response.set_etag(etag)
+        return response
+
+    def export_dataset() -> Iterator[bytes]:
+        admission.admit(admission.dataset_size(storage.get_dataset_layout(dataset_id)), LOAD_COPIES)
+        return DataFrameExporter(storage.get_dataset(dataset_id)).stream(params.format, encoding)
+
+    export = export_cache.get_or_stream(etag, export_dataset)  # admitted only when the export is not stored
+    if isinstance(export, str):  # stored exports support ranges to resume interrupted downloads
+        response = send_file(export, mimetype=params.mimetype, as_attachment=False, download_name=download_name,
+                             etag=etag, conditional=True)
+        response.headers.update(headers)
+        response.accept_ranges = "bytes"
+        return response
+
+    response = FlaskResponse(stream_with_context(export), mimetype=params.mimetype,
+                             headers={**headers, 'Content-Disposition': f'inline; filename={download_name}'})
+    response.set_etag(etag)
+    return response
+
+
+@bp.route("/datasets/<dataset_id>/preview")
+@spec.validate(
+    query=PreviewParams,
+    headers=DatasetTokenHeader,
+    resp=Response(HTTP_200=PreviewResponse),
+    tags=["Dataset preview"]
+)
+def preview_dataset(dataset_id: str) -> Response:
+    params: PreviewParams = request.context.query  # noqa
+    data, num_rows = _read_slice(dataset_id, params)
+    content = json.loads(data.to_json(orient="split", date_format="iso", default_handler=str))
+
+    response_data = PreviewResponse(
+        dataset_id=dataset_id,
+        num_rows=num_rows,
+        offset=params.offset,
+        columns=[str(c) for c in data.columns],
+        dtypes=data.dtypes.astype(str).tolist(),
+        index=content["index"],
+        rows=content["data"]
+    )
+
+    return jsonify(response_data.dict())
+
 
-    buffer = BytesIO()
-    params.method(data, buffer)
-    buffer.seek(0)
-    return send_file(buffer, mimetype=params.mimetype, as_attachment=False, download_name=f'{dataset_id}.{params.ext}')
+def _read_slice(dataset_id: str, params: ExportParams | PreviewParams) -> tuple[pd.DataFrame, int]:
+    """
+    Read the requested columns and rows of the dataset. Returns them along with the number of rows in the dataset.
+    """
+    layout = storage.get_dataset_layout(dataset_id)
+    admission.admit(admission.dataset_size(layout), LOAD_COPIES)
+    num_rows = layout.num_rows
+    start = min(params.offset, num_rows)
+    if params.sample is not None:
+        size = min(params.sample_size, num_rows - start)
+        rows = start + np.sort(np.random.default_rng().choice(num_rows - start, size, replace=False))
+    else:
+        rows = slice(start, num_rows if params.limit is None else min(start + params.limit, num_rows))
+    return storage.get_dataset(dataset_id, params.column_names, rows), num_rows
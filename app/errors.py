@@ -1,6 +1,7 @@
 from typing import Any
 
-from werkzeug.exceptions import BadRequest, UnprocessableEntity
+from pydantic import ValidationError
+from werkzeug.exceptions import BadRequest, Conflict, ServiceUnavailable, UnprocessableEntity
 
 
 class ParameterError(BadRequest):
@@ -63,6 +64,19 @@ class ColumnNotFound(UnprocessableEntity):
         super().__init__(description=description)
 
 
+class SchemaMismatch(UnprocessableEntity):
+    name = "Schema Mismatch"
+
+    def __init__(self, missing: list[str], unexpected: list[str], mismatched: dict[str, dict[str, str]]) -> None:
+        description = {
+            "message": "Appended rows do not match the columns of the dataset",
+            "missing_columns": missing,
+            "unexpected_columns": unexpected,
+            "mismatched_types": mismatched
+        }
+        super().__init__(description=description)
+
+
 class EmptyDataset(UnprocessableEntity):
     name = "Empty Dataset"
 
@@ -75,3 +89,50 @@ class ValidationFailed(UnprocessableEntity):
 
     def __init__(self, errors: list[dict[str, Any]]) -> None:
         super().__init__(description=errors)
+
+    @classmethod
+    def from_validation_error(cls, e: ValidationError) -> "ValidationFailed":
+        simplified_errors = [
+            {
+                "parameter": err["loc"][0],
+                "message": err["msg"],
+                "value": err["input"]
+            }
+            for err in e.errors()
+        ]
+        return cls(simplified_errors)
+
+
+class QueueFull(ServiceUnavailable):
+    name = "Queue Full"
+
+    def __init__(self, limit: int, retry_after: int) -> None:
+        description = {
+            "message": "Too many report jobs are waiting to be processed, try again later",
+            "queue_limit": limit
+        }
+        super().__init__(description=description, retry_after=retry_after)
+
+
+class MemoryBudgetExceeded(ServiceUnavailable):
+    name = "Memory Budget Exceeded"
+
+    def __init__(self, estimate: int, budget: int, retry_after: int) -> None:
+        description = {
+            "message": "Not enough memory is available to process the request now, try again later",
+            "estimated_memory_mb": round(estimate / 1024 / 1024),
+            "memory_budget_mb": round(budget / 1024 / 1024)
+        }
+        super().__init__(description=description, retry_after=retry_after)
+
+
+class JobStateConflict(Conflict):
+    name = "Job State Conflict"
+
+    def __init__(self, job_id: str, status: str, message: str) -> None:
+        description = {
+            "message": message,
+            "job_id": job_id,
+            "status": status
+        }
+        super().__init__(description=description)
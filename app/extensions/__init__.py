@@ -1,8 +1,26 @@
 from flask_pydantic_spec import FlaskPydanticSpec
 
+from .admission import AdmissionControl
+from .dataset_profiler import DatasetProfiler
+from .disk_cache import DiskCache
+from .metrics import Metrics
+from .process_pool import ProcessPool
+from .report_jobs import ReportJobs
+from .request_profiler import RequestProfiler
 from .storage import Storage
 
-__all__ = ["storage", "spec"]
+__all__ = ["storage", "spec", "render_pool", "plot_cache", "report_cache", "export_cache", "report_jobs",
+           "dataset_profiler", "metrics", "request_profiler", "admission", "batch_pool"]
 
 storage = Storage()
 spec = FlaskPydanticSpec('flask', title='Automated Data Analysis API')
+render_pool = ProcessPool("render_pool", "REPORT_RENDER_WORKERS")
+batch_pool = ProcessPool("batch_pool", "BATCH_WORKERS")
+plot_cache = DiskCache("PLOT_CACHE")
+report_cache = DiskCache("REPORT_CACHE")
+export_cache = DiskCache("EXPORT_CACHE")
+report_jobs = ReportJobs()
+dataset_profiler = DatasetProfiler()
+metrics = Metrics()
+request_profiler = RequestProfiler()
+admission = AdmissionControl()
@@ -0,0 +1,186 @@
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from flask import Flask, Response, current_app, g, request
+from werkzeug.datastructures import FileStorage
+
+from app.errors import MemoryBudgetExceeded
+from .dataset_file import DatasetLayout
+
+# peak memory of the work done by an endpoint, in multiples of the in-memory size of the dataset it works on
+LOAD_COPIES = 2
+PREPROCESS_COPIES = 3
+ANALYSIS_COPIES = 4
+REPORT_COPIES = 6
+REQUEST_OVERHEAD_BYTES = 32 * 1024 * 1024  # figures, models and buffers that do not grow with the dataset
+# in-memory size of a loaded dataset per byte of the uploaded file, by file extension
+FILE_MEMORY_FACTORS = {"csv": 3, "json": 2, "xls": 4, "xlsx": 10, "db": 2}
+OBJECT_VALUE_BYTES = 64  # average size of a string or other python object in a column
+SAMPLE_INTERVAL_SECONDS = 0.02
+MEMORY_BUCKETS = tuple(2 ** power * 1024 * 1024 for power in range(15))  # 1 MB .. 16 GB
+PEAK_RATIO_BUCKETS = (0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 4, 8)
+
+
+def _rss() -> int | None:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):  # not Linux
+        return None
+
+
+@dataclass(eq=False)
+class _Reservation:
+    estimate: int
+    endpoint: str
+    start_rss: int | None = None
+    peak_rss: int | None = None
+
+
+class AdmissionControl:
+    """
+    Keeps heavy requests of this process within MEMORY_BUDGET_MB. A request reserves the memory estimated from its
+    dataset before loading it and waits, first come first served, until the reservation fits next to the ones in
+    flight - for up to MEMORY_ADMISSION_WAIT_SECONDS, then it is rejected with 503 and Retry-After. A request
+    estimated above the whole budget only runs alone. Reservations are held until the response is sent.
+    The process RSS growth while a request runs is reported next to its estimate in metrics, to calibrate the
+    estimates (it includes memory of requests running concurrently).
+    """
+
+    def __init__(self, app: Flask = None) -> None:
+        self._condition = threading.Condition()
+        self._reserved = 0
+        self._running: set[_Reservation] = set()
+        self._waiting: deque[_Reservation] = deque()
+        self._sampler_pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        if not hasattr(app, 'extensions'):
+            app.extensions = {}
+        app.extensions['admission'] = self
+        app.after_request(self._finish)
+        app.teardown_request(self._abandon)
+
+    @property
+    def budget(self) -> int:
+        return current_app.config["MEMORY_BUDGET_MB"] * 1024 * 1024
+
+    @property
+    def wait_seconds(self) -> int:
+        return current_app.config["MEMORY_ADMISSION_WAIT_SECONDS"]
+
+    @staticmethod
+    def upload_size(file: FileStorage) -> int:
+        """
+        Expected in-memory size of a dataset loaded from the uploaded file.
+        """
+        position = file.stream.tell()
+        file_size = file.stream.seek(0, os.SEEK_END)
+        file.stream.seek(position)
+        return AdmissionControl.file_size(file.filename or "", file_size)
+
+    @staticmethod
+    def file_size(filename: str, file_size: int) -> int:
+        """
+        Expected in-memory size of a dataset loaded from a file of the given name and size.
+        """
+        extension = filename.split('.')[-1].lower()
+        return int(file_size * FILE_MEMORY_FACTORS.get(extension, max(FILE_MEMORY_FACTORS.values())))
+
+    @staticmethod
+    def dataset_size(layout: DatasetLayout) -> int:
+        """
+        Expected in-memory size of a stored dataset.
+        """
+        row_bytes = 8  # index
+        for dtype in layout.dtypes:
+            row_bytes += OBJECT_VALUE_BYTES if dtype.kind == "O" else getattr(dtype, "itemsize", 8)
+        return layout.num_rows * row_bytes
+
+    def admit(self, dataset_bytes: int, copies: float) -> None:
+        """
+        Reserve memory for working on a dataset of the given in-memory size until the response is sent.
+        """
+        budget = self.budget
+        if budget <= 0 or "admission" in g:
+            return
+        reservation = _Reservation(REQUEST_OVERHEAD_BYTES + int(dataset_bytes * copies), request.endpoint)
+        deadline = time.monotonic() + self.wait_seconds
+        started = time.perf_counter()
+        with self._condition:
+            self._waiting.append(reservation)
+            admitted = self._condition.wait_for(lambda: self._fits(reservation, budget),
+                                                max(deadline - time.monotonic(), 0))
+            self._waiting.remove(reservation)
+            if admitted:
+                self._reserved += reservation.estimate
+                self._running.add(reservation)
+            self._condition.notify_all()
+            self._start_sampler()
+
+        metrics = current_app.extensions['metrics']
+        metrics.observe("admission_wait_seconds", "Time requests waited for memory to be reserved",
+                        time.perf_counter() - started, endpoint=reservation.endpoint)
+        if not admitted:
+            metrics.inc("admission_rejected_total", "Requests rejected for exceeding the memory budget",
+                        endpoint=reservation.endpoint)
+            raise MemoryBudgetExceeded(reservation.estimate, budget, self.wait_seconds)
+        reservation.start_rss = _rss()
+        g.admission = reservation
+
+    def _fits(self, reservation: _Reservation, budget: int) -> bool:
+        return self._waiting[0] is reservation and (self._reserved + reservation.estimate <= budget
+                                                    or not self._running)
+
+    def _release(self, reservation: _Reservation, metrics) -> None:
+        rss = _rss()
+        with self._condition:
+            self._reserved -= reservation.estimate
+            self._running.discard(reservation)
+            self._condition.notify_all()
+        if reservation.start_rss is None or rss is None:
+            return
+        used = max(reservation.peak_rss or rss, rss) - reservation.start_rss
+        metrics.observe("admission_memory_estimate_bytes", "Memory reserved for requests", reservation.estimate,
+                        MEMORY_BUCKETS, endpoint=reservation.endpoint)
+        metrics.observe("admission_memory_used_bytes", "Growth of process memory while requests ran", max(used, 0),
+                        MEMORY_BUCKETS, endpoint=reservation.endpoint)
+        metrics.observe("admission_memory_used_ratio", "Growth of process memory relative to the reservation",
+                        max(used, 0) / reservation.estimate, PEAK_RATIO_BUCKETS, endpoint=reservation.endpoint)
+
+    def _start_sampler(self) -> None:
+        if self._sampler_pid != os.getpid() and _rss() is not None:
+            self._sampler_pid = os.getpid()
+            threading.Thread(target=self._sample, name="admission-sampler", daemon=True).start()
+
+    def _sample(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._running)
+                running = list(self._running)
+            rss = _rss()
+            for reservation in running:
+                reservation.peak_rss = max(reservation.peak_rss or 0, rss)
+            time.sleep(SAMPLE_INTERVAL_SECONDS)
+
+    def _finish(self, response: Response) -> Response:
+        reservation: _Reservation | None = g.pop("admission", None)
+        if reservation is not None:
+            metrics = current_app.extensions['metrics']
+            response.call_on_close(lambda: self._release(reservation, metrics))
+        return response
+
+    def _abandon(self, _: BaseException | None) -> None:
+        reservation: _Reservation | None = g.pop("admission", None)
+        if reservation is not None:  # no response was made
+            self._release(reservation, current_app.extensions['metrics'])
+
+    def stats(self) -> dict[str, int]:
+        with self._condition:
+            return {"budget_bytes": self.budget, "reserved_bytes": self._reserved, "running": len(self._running),
+                    "waiting": len(self._waiting)}
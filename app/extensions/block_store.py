@@ -0,0 +1,157 @@
+import hashlib
+import os
+import random
+import sqlite3
+import time
+from collections import Counter
+from contextlib import closing, contextmanager
+from typing import Iterator
+
+from .storage_backends import StorageBackend
+
+ORPHAN_GRACE_SECONDS = 3600  # blocks never referenced are kept this long, they may belong to a save in progress
+BATCH_SIZE = 500             # hashes per query, below the SQLite limit of query parameters
+NAMESPACE = "blocks"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    hash TEXT PRIMARY KEY,
+    refs INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blocks_by_refs ON blocks (refs);
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    size INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals (id, size) VALUES (0, 0);
+"""
+
+
+def _batches(items: list[str]) -> Iterator[list[str]]:
+    for start in range(0, len(items), BATCH_SIZE):
+        yield items[start:start + BATCH_SIZE]
+
+
+class BlockStore:
+    """
+    Content-addressed blobs shared by all stored datasets, with reference counts kept in a SQLite database.
+    A block is written once however many datasets (or columns) contain it, and removed as soon as no dataset
+    references it anymore. The total size of referenced blocks is kept up to date for quota checks.
+    """
+
+    _initialized: set[str] = set()  # locations whose database schema was created by this process
+
+    def __init__(self, backend: StorageBackend) -> None:
+        self.backend = backend
+        self.location = backend.location
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(self.location, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(self.location, "blocks.sqlite3"), timeout=30, isolation_level=None)
+        if self.location not in self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._initialized.add(self.location)
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Write transaction holding the database lock from the start. Blocks are only removed while holding it,
+        so a block checked to exist inside a transaction stays until its reference is released.
+        """
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def put(self, data: bytes) -> str:
+        """
+        Store a block unless it is stored already. Returns its hash. The block is not referenced until `acquire`.
+        """
+        block_hash = hashlib.sha256(data).hexdigest()
+        if self.backend.size(NAMESPACE, block_hash) is None:
+            self.backend.write(NAMESPACE, block_hash, data)
+        return block_hash
+
+    def get(self, block_hash: str) -> bytes:
+        return self.backend.read(NAMESPACE, block_hash)
+
+    def acquire(self, blocks: list[str]) -> bool:
+        """
+        Add a reference to each of the blocks (once per occurrence). Returns False without referencing anything if
+        some block was garbage collected since it was put, in which case the blocks have to be put again.
+        """
+        counts = Counter(blocks)
+        with self._transaction() as conn:
+            sizes = {}
+            for block_hash in counts:
+                sizes[block_hash] = self.backend.size(NAMESPACE, block_hash)
+                if sizes[block_hash] is None:
+                    return False
+            known = set()
+            for batch in _batches(list(counts)):
+                known.update(row[0] for row in conn.execute(
+                    f"SELECT hash FROM blocks WHERE hash IN ({', '.join('?' * len(batch))})", batch))
+            conn.execute("UPDATE totals SET size = size + ?",
+                         (sum(size for block_hash, size in sizes.items() if block_hash not in known),))
+            conn.executemany(
+                "INSERT INTO blocks (hash, refs, size) VALUES (?, ?, ?) "
+                "ON CONFLICT (hash) DO UPDATE SET refs = refs + excluded.refs",
+                [(block_hash, count, sizes[block_hash]) for block_hash, count in counts.items()]
+            )
+        return True
+
+    def release(self, blocks: list[str]) -> int:
+        """
+        Drop a reference to each of the blocks and remove those no longer referenced. Returns the freed bytes.
+        """
+        counts = Counter(blocks)
+        with self._transaction() as conn:
+            conn.executemany("UPDATE blocks SET refs = refs - ? WHERE hash = ?",
+                             [(count, block_hash) for block_hash, count in counts.items()])
+            unreferenced = []
+            for batch in _batches(list(counts)):
+                unreferenced.extend(conn.execute(
+                    f"SELECT hash, size FROM blocks WHERE refs <= 0 AND hash IN ({', '.join('?' * len(batch))})",
+                    batch))
+            return self._remove(conn, unreferenced)
+
+    def _remove(self, conn: sqlite3.Connection, blocks: list[tuple[str, int]]) -> int:
+        """
+        Remove blocks given as (hash, size) pairs (inside a transaction). Returns the freed bytes.
+        """
+        for block_hash, _ in blocks:
+            self.backend.delete(NAMESPACE, block_hash)
+        conn.executemany("DELETE FROM blocks WHERE hash = ?", [(block_hash,) for block_hash, _ in blocks])
+        freed = sum(size for _, size in blocks)
+        conn.execute("UPDATE totals SET size = size - ?", (freed,))
+        return freed
+
+    def total_size(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT size FROM totals").fetchone()[0]
+
+    def collect_garbage(self) -> int:
+        """
+        Remove blocks left unreferenced, and blocks never referenced because their save was interrupted.
+        Only one random shard is scanned for the latter, so the cost does not grow with the number of blocks
+        and every shard is still swept eventually. Returns the freed bytes.
+        """
+        with self._transaction() as conn:
+            freed = self._remove(conn, conn.execute("SELECT hash, size FROM blocks WHERE refs <= 0").fetchall())
+
+            entries = list(self.backend.scan(NAMESPACE, f"{random.randrange(256):02x}"))
+            known = set()
+            for batch in _batches([name for name, _, _ in entries]):
+                known.update(row[0] for row in conn.execute(
+                    f"SELECT hash FROM blocks WHERE hash IN ({', '.join('?' * len(batch))})", batch))
+            for name, modified_at, size in entries:
+                if name not in known and time.time() - modified_at > ORPHAN_GRACE_SECONDS:
+                    freed += self.backend.delete(NAMESPACE, name)
+        return freed
@@ -0,0 +1,193 @@
+import pickle
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from app.errors import SchemaMismatch
+
+MAGIC = b"ADADSET2"
+
+
+@dataclass(frozen=True)
+class DatasetLayout:
+    """
+    Content of a dataset file: the blocks holding each row chunk of the index and of every column.
+    Blocks are referenced by the hash they are stored under in the block store.
+    """
+    columns: pd.Index
+    dtypes: pd.Series
+    num_rows: int
+    chunk_rows: int
+    index_blocks: list[str]
+    column_blocks: list[list[str]]    # by column position, then by row chunk
+
+    @property
+    def blocks(self) -> list[str]:
+        return self.index_blocks + [block for column in self.column_blocks for block in column]
+
+    def chunk_ids(self, rows: slice | np.ndarray) -> np.ndarray:
+        if isinstance(rows, slice):
+            start, stop, _ = rows.indices(self.num_rows)
+            if start >= stop:
+                return np.arange(0)
+            return np.arange(start // self.chunk_rows, (stop - 1) // self.chunk_rows + 1)
+        return np.unique(rows // self.chunk_rows)
+
+
+def split_blocks(data: pd.DataFrame, chunk_rows: int, put: Callable[[bytes], str]) -> DatasetLayout:
+    """
+    Pickle row chunks of the index and of each column separately, hand them to `put` (which stores a block and
+    returns its hash) and return the layout referencing them. Column blocks do not carry the column name, so a
+    column keeps its blocks when renamed or copied into another dataset.
+    """
+    starts = range(0, len(data), chunk_rows) or [0]  # an empty dataset still keeps its dtypes in one chunk
+
+    def block(obj: pd.Index | pd.Series) -> str:
+        return put(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+    index_blocks = [block(data.index[start:start + chunk_rows]) for start in starts]
+    column_blocks = [
+        [block(data.iloc[start:start + chunk_rows, i].reset_index(drop=True).rename(None)) for start in starts]
+        for i in range(data.shape[1])
+    ]
+    return DatasetLayout(data.columns, data.dtypes, len(data), chunk_rows, index_blocks, column_blocks)
+
+
+def dump_layout(layout: DatasetLayout) -> bytes:
+    return MAGIC + pickle.dumps(layout, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_layout(data: bytes) -> DatasetLayout | None:
+    """
+    Layout of a dataset file, or None for a plain pickle written by earlier versions.
+    """
+    if not data.startswith(MAGIC):
+        return None
+    return pickle.loads(data[len(MAGIC):])
+
+
+def read_blocks(layout: DatasetLayout, get: Callable[[str], bytes], columns: list[int] = None,
+                rows: slice | np.ndarray = None) -> pd.DataFrame:
+    """
+    Read the dataset, or only the columns at the given positions and the rows selected by a slice of consecutive
+    rows or by sorted positions. Only the blocks holding selected rows of selected columns are fetched with `get`.
+    """
+    columns = list(range(len(layout.columns))) if columns is None else columns
+    chunk_ids = layout.chunk_ids(rows) if rows is not None else np.arange(len(layout.index_blocks))
+    if rows is not None and not len(chunk_ids):  # nothing selected, keep the dtypes of the first chunk
+        chunk_ids, rows = np.arange(1), slice(0, 0)
+
+    def local_rows(chunk_id: int) -> slice | np.ndarray:
+        chunk_start = chunk_id * layout.chunk_rows
+        if rows is None:
+            return slice(None)
+        if isinstance(rows, slice):
+            start, stop, _ = rows.indices(layout.num_rows)
+            return slice(max(start - chunk_start, 0), max(stop - chunk_start, 0))
+        in_chunk = rows[(rows >= chunk_start) & (rows < chunk_start + layout.chunk_rows)]
+        return in_chunk - chunk_start
+
+    selections = [local_rows(chunk_id) for chunk_id in chunk_ids]
+    index_parts = [pickle.loads(get(layout.index_blocks[chunk_id]))[selection]
+                   for chunk_id, selection in zip(chunk_ids, selections)]
+    series = []
+    for i in columns:
+        parts = [pickle.loads(get(layout.column_blocks[i][chunk_id])).iloc[selection]
+                 for chunk_id, selection in zip(chunk_ids, selections)]
+        series.append(pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0].reset_index(drop=True))
+
+    index = index_parts[0].append(index_parts[1:]) if len(index_parts) > 1 else index_parts[0]
+    data = pd.concat(series, axis=1) if series else pd.DataFrame(index=pd.RangeIndex(len(index)))
+    data.columns = layout.columns[columns]
+    data.index = index
+    return data
+
+
+def _convert(column: pd.Series, dtype: np.dtype | pd.api.extensions.ExtensionDtype) -> pd.Series | None:
+    """
+    The column converted to the stored dtype, or None if that would change or lose values.
+    """
+    from app.controllers.arrow_engine import is_arrow, to_numpy_backed
+
+    if column.dtype == dtype:
+        return column
+    if is_arrow(column.dtype) and not is_arrow(dtype):
+        column = to_numpy_backed(column)
+        if column.dtype == dtype:
+            return column
+    if dtype == object:
+        return column.astype(object)
+    if isinstance(dtype, pd.CategoricalDtype):
+        converted = column.astype(dtype)
+        return converted if (converted.isna() == column.isna()).all() else None  # unknown categories
+    if dtype.kind == "M" and column.dtype == object:
+        converted = pd.to_datetime(column, errors="coerce")
+        if not (converted.isna() == column.isna()).all():
+            return None
+        column = converted
+    if is_arrow(dtype):
+        import pyarrow as pa
+
+        try:
+            array = pa.array(column, type=dtype.pyarrow_dtype, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            return None
+        return pd.Series(pd.arrays.ArrowExtensionArray(array), index=column.index, name=column.name)
+    if column.isna().all() and dtype.kind in "fMm":
+        return column.astype(dtype)
+    if isinstance(column.dtype, np.dtype) and isinstance(dtype, np.dtype) and np.can_cast(column.dtype, dtype):
+        return column.astype(dtype)
+    return None
+
+
+def conform_rows(layout: DatasetLayout, rows: pd.DataFrame, last_index: pd.Index) -> pd.DataFrame:
+    """
+    New rows arranged like the stored dataset: columns in its order and converted to its dtypes, index columns
+    (named like the stored index) moved to the index. Rows loaded with the default index are numbered after
+    `last_index`, the index of the last stored row. Raises `SchemaMismatch` for missing or unexpected columns
+    and for values the stored dtypes cannot hold.
+    """
+    rows = rows.set_axis([str(c) for c in rows.columns], axis=1)
+    names = [str(c) for c in layout.columns]
+    index_names = [str(n) for n in last_index.names if n is not None]
+    missing = [c for c in index_names + names if c not in rows.columns]
+    unexpected = [c for c in rows.columns if c not in names and c not in index_names]
+    if missing or unexpected:
+        raise SchemaMismatch(missing, unexpected, {})
+
+    default_index = isinstance(rows.index, pd.RangeIndex) and rows.index.start == 0
+    if index_names:
+        rows = rows.set_index(index_names)
+        rows.index.names = last_index.names
+    elif default_index and pd.api.types.is_integer_dtype(last_index.dtype):
+        start = last_index[-1] + 1 if len(last_index) else 0
+        rows.index = pd.RangeIndex(start, start + len(rows))
+
+    columns, mismatched = {}, {}
+    for name, dtype in zip(names, layout.dtypes):
+        converted = _convert(rows[name], dtype)
+        if converted is None:
+            mismatched[name] = {"expected": str(dtype), "received": str(rows[name].dtype)}
+        columns[name] = converted
+    if mismatched:
+        raise SchemaMismatch([], [], mismatched)
+    data = pd.DataFrame(columns, index=rows.index)
+    data.columns = layout.columns
+    return data
+
+
+def append_blocks(layout: DatasetLayout, rows: pd.DataFrame, put: Callable[[bytes], str],
+                  get: Callable[[str], bytes]) -> DatasetLayout:
+    """
+    Layout of the dataset with conformed `rows` appended. Blocks of complete row chunks are kept as they are, only
+    the last incomplete chunk is read and stored again, together with the new rows.
+    """
+    complete = layout.num_rows // layout.chunk_rows
+    tail = read_blocks(layout, get, rows=slice(complete * layout.chunk_rows, layout.num_rows))
+    appended = split_blocks(pd.concat([tail, rows]) if len(tail) else rows, layout.chunk_rows, put)
+    return DatasetLayout(layout.columns, layout.dtypes, layout.num_rows + len(rows), layout.chunk_rows,
+                         layout.index_blocks[:complete] + appended.index_blocks,
+                         [blocks[:complete] + new_blocks
+                          for blocks, new_blocks in zip(layout.column_blocks, appended.column_blocks)])
@@ -0,0 +1,76 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+ACCESS_RESOLUTION_SECONDS = 60  # last access times are only updated when older than this, to spare writes
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    name TEXT PRIMARY KEY,
+    saved_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS datasets_by_saved_at ON datasets (saved_at);
+CREATE INDEX IF NOT EXISTS datasets_by_accessed_at ON datasets (accessed_at);
+"""
+
+
+class DatasetIndex:
+    """
+    SQLite index of stored datasets by save time and last access time, so expired and least recently used
+    datasets are found without scanning the storage directory.
+    """
+    _initialized: set[str] = set()  # locations whose database schema was created by this process
+
+    def __init__(self, location: str) -> None:
+        self.location = location
+
+    @property
+    def db_path(self) -> str:
+        return os.path.join(self.location, "datasets.sqlite3")
+
+    def exists(self) -> bool:
+        return self.location in self._initialized or os.path.exists(self.db_path)
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(self.location, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        if self.location not in self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._initialized.add(self.location)
+        return conn
+
+    def create(self) -> None:
+        self._connect().close()
+
+    def add(self, name: str, saved_at: float = None) -> None:
+        saved_at = saved_at or time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("INSERT INTO datasets (name, saved_at, accessed_at) VALUES (?, ?, ?) "
+                         "ON CONFLICT (name) DO UPDATE SET saved_at = excluded.saved_at, "
+                         "accessed_at = excluded.accessed_at", (name, saved_at, saved_at))
+
+    def touch(self, name: str) -> None:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("UPDATE datasets SET accessed_at = ? WHERE name = ? AND accessed_at < ?",
+                         (now, name, now - ACCESS_RESOLUTION_SECONDS))
+
+    def remove(self, name: str) -> bool:
+        """
+        Returns False if the dataset was not indexed, e.g. because another process has just removed it.
+        """
+        with closing(self._connect()) as conn:
+            return conn.execute("DELETE FROM datasets WHERE name = ?", (name,)).rowcount > 0
+
+    def saved_before(self, timestamp: float) -> list[str]:
+        with closing(self._connect()) as conn:
+            return [row[0] for row in conn.execute("SELECT name FROM datasets WHERE saved_at < ?", (timestamp,))]
+
+    def least_recently_used(self, exclude: str = None) -> str | None:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT name FROM datasets WHERE name != ? ORDER BY accessed_at LIMIT 1",
+                               (exclude or "",)).fetchone()
+        return row[0] if row else None
@@ -0,0 +1,132 @@
+import pickle
+import threading
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import pandas as pd
+from flask import Flask, current_app
+
+from .storage import DATASETS, HASHES, PROFILES
+from .storage_backends import StorageBackend
+
+if TYPE_CHECKING:
+    from app.controllers import DatasetProfile
+
+
+class DatasetProfiler:
+    """
+    Computes column profiles of saved datasets in background threads and keeps them in the storage backend,
+    so reports and dataset info can skip most of the analysis. A profile is only used while the content hash it
+    was computed for matches the stored dataset.
+    """
+
+    def __init__(self, app: Flask = None) -> None:
+        self._executor = None
+        self._pending: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        if not hasattr(app, 'extensions'):
+            app.extensions = {}
+        app.extensions['dataset_profiler'] = self
+
+    @property
+    def workers(self) -> int:
+        return current_app.config["DATASET_PROFILING_WORKERS"]
+
+    @property
+    def queue_limit(self) -> int:
+        return current_app.config["DATASET_PROFILING_QUEUE_LIMIT"]
+
+    @staticmethod
+    def _backend() -> StorageBackend:
+        return current_app.extensions['storage'].backend
+
+    @staticmethod
+    def _stored_hash(backend: StorageBackend, dataset_key: str) -> str | None:
+        try:
+            return backend.read(HASHES, dataset_key).decode()
+        except OSError:
+            return None
+
+    def submit(self, dataset_key: str, data: pd.DataFrame, content_hash: str) -> None:
+        """
+        Start profiling a just saved dataset, unless profiling is disabled or too many datasets are waiting.
+        """
+        if self.workers <= 0:
+            return
+        backend = self._backend()
+        with self._lock:
+            if len(self._pending) >= self.queue_limit:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="dataset-profiler")
+            future = self._executor.submit(self._profile, backend, dataset_key, data, content_hash)
+            self._pending[dataset_key] = future
+        future.add_done_callback(lambda f: self._done(dataset_key, f))
+
+    def _done(self, dataset_key: str, future: Future) -> None:
+        with self._lock:
+            if self._pending.get(dataset_key) is future:
+                del self._pending[dataset_key]
+        if future.exception() is not None:
+            e = future.exception()
+            tb_str = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
+            print(f"[PROFILER] Failed to profile {dataset_key}:\n{tb_str}")
+
+    def _profile(self, backend: StorageBackend, dataset_key: str, data: pd.DataFrame, content_hash: str) -> None:
+        from app.controllers import DataFrameAnalyzer
+
+        profile = pickle.dumps(DataFrameAnalyzer(data).profile(content_hash), protocol=pickle.HIGHEST_PROTOCOL)
+        with backend.lock(DATASETS, dataset_key):
+            if self._stored_hash(backend, dataset_key) == content_hash:  # dataset was not overwritten meanwhile
+                backend.write(PROFILES, dataset_key, profile)
+
+    def append(self, dataset_key: str, rows: pd.DataFrame, previous_hash: str, content_hash: str) -> None:
+        """
+        Update the stored profile with rows appended to the dataset. The dataset is left without a profile if its
+        previous content had none (yet). Must be called holding the exclusive lock of the dataset.
+        """
+        profile = self.load(dataset_key, previous_hash)
+        self.discard(dataset_key)
+        if profile is None:
+            return
+        try:
+            profile = profile.append(rows, content_hash)
+            if profile is not None:
+                self._backend().write(PROFILES, dataset_key, pickle.dumps(profile, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception as e:
+            tb_str = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
+            print(f"[PROFILER] Failed to update profile of {dataset_key}:\n{tb_str}")
+
+    def load(self, dataset_key: str, content_hash: str = None) -> "DatasetProfile | None":
+        """
+        Stored profile of the dataset, or None if it is missing or was computed for other content.
+        """
+        backend = self._backend()
+        content_hash = content_hash or self._stored_hash(backend, dataset_key)
+        try:
+            profile = pickle.loads(backend.read(PROFILES, dataset_key))
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        return profile if profile.content_hash == content_hash else None
+
+    def status(self, dataset_key: str, profile: "DatasetProfile | None" = None) -> str:
+        """
+        "ready" if the loaded `profile` is available, "pending" while it is being computed, else "unavailable".
+        """
+        if profile is not None:
+            return "ready"
+        return "pending" if dataset_key in self._pending else "unavailable"
+
+    def discard(self, dataset_key: str) -> None:
+        self._backend().delete(PROFILES, dataset_key)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
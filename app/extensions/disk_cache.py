@@ -0,0 +1,286 @@
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Iterable, Iterator
+
+from flask import Flask, current_app
+
+
+class _Abandoned(Exception):
+    """
+    The stream filling a cache entry was closed by its consumer before the end, or the entry was not stored.
+    """
+
+
+class DiskCache:
+    """
+    Disk cache of binary blobs keyed by content hash, bounded in size with LRU eviction.
+    Recency is tracked in memory and mirrored into file modification times, so it survives restarts.
+    Location and size limit are read from `<name>` and `<name>_MAX_MB` config values.
+    """
+
+    def __init__(self, name: str, app: Flask = None) -> None:
+        self.name = name
+        self._entries: OrderedDict[str, int] = OrderedDict()  # key -> size in bytes, least recently used first
+        self._pending: dict[str, Future] = {}
+        self._size = 0
+        self._loaded_from = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        if not hasattr(app, 'extensions'):
+            app.extensions = {}
+        app.extensions[self.name.lower()] = self
+
+    @property
+    def cache_location(self) -> str:
+        return current_app.config[self.name]
+
+    @property
+    def max_size(self) -> int:
+        return current_app.config[f"{self.name}_MAX_MB"] * 1024 * 1024
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_location, key[:2], key)
+
+    def _load(self) -> None:
+        """
+        Rebuild the LRU index from files left by previous runs (called with the lock held).
+        """
+        if self._loaded_from == self.cache_location:
+            return
+        found = []
+        os.makedirs(self.cache_location, exist_ok=True)
+        for shard in os.scandir(self.cache_location):
+            if shard.is_dir():
+                found.extend((entry.stat().st_mtime, entry.name, entry.stat().st_size)
+                             for entry in os.scandir(shard.path) if entry.is_file() and '.' not in entry.name)
+        self._entries = OrderedDict((key, size) for _, key, size in sorted(found))
+        self._size = sum(self._entries.values())
+        self._loaded_from = self.cache_location
+
+    def _lookup(self, key: str) -> str | None:
+        """
+        Path of a cached entry marked as most recently used, or None (called with the lock held).
+        """
+        self._load()
+        path = self._path(key)
+        if key not in self._entries and os.path.isfile(path):  # written by another process
+            self._entries[key] = os.path.getsize(path)
+            self._size += self._entries[key]
+        if key in self._entries:
+            try:
+                os.utime(path)
+            except OSError:
+                self._size -= self._entries.pop(key)
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return path
+        self.misses += 1
+        return None
+
+    def _commit(self, key: str, tmp_path: str, size: int) -> bool:
+        """
+        Move a fully written temporary file into the cache (called with the lock held).
+        Returns whether the entry is stored: too large entries are discarded and eviction may drop it right away.
+        """
+        if key in self._entries or size > self.max_size:
+            os.remove(tmp_path)
+            return key in self._entries
+        os.replace(tmp_path, self._path(key))
+        self._entries[key] = size
+        self._size += size
+        self._evict()
+        return key in self._entries
+
+    def _tmp_path(self, key: str) -> str:
+        """
+        Unique temporary path next to the entry (called with the lock held).
+        """
+        os.makedirs(os.path.dirname(self._path(key)), exist_ok=True)
+        return f"{self._path(key)}.{uuid.uuid4().hex}.tmp"
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            path = self._lookup(key)
+            if path is None:
+                return None
+            try:
+                with open(path, "rb") as f:
+                    return f.read()
+            except OSError:
+                self._size -= self._entries.pop(key)
+                return None
+
+    def get_path(self, key: str) -> str | None:
+        with self._lock:
+            return self._lookup(key)
+
+    def put(self, key: str, data: bytes) -> None:
+        with self._lock:
+            self._load()
+            if key in self._entries or len(data) > self.max_size:
+                return
+            try:
+                tmp_path = self._tmp_path(key)
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                self._commit(key, tmp_path, len(data))
+            except OSError:
+                return
+
+    def get_or_stream(self, key: str, producer: Callable[[], Iterable[bytes]]) -> str | Iterator[bytes]:
+        """
+        Return the path of a cached entry, or a stream of chunks from `producer` that is written to the cache
+        while it is consumed. `producer` is called right away, so its errors are raised here, before streaming.
+        Concurrent calls for the same missing key are coalesced: they wait for the stream being produced and
+        get the stored file, or produce it themselves if its consumer went away before the end.
+        """
+        while True:
+            with self._lock:
+                pending = self._pending.get(key)
+                if pending is None:
+                    path = self._lookup(key)
+                    if path is not None:
+                        return path
+                    pending = self._pending[key] = Future()
+                    break
+            try:
+                return pending.result()
+            except _Abandoned:
+                continue
+
+        try:
+            chunks = producer()
+        except BaseException as e:
+            self._resolve(key, exception=e)
+            raise
+        return _FillingStream(self, key, chunks)
+
+    def begin_entry(self, key: str) -> str:
+        """
+        Temporary path to write a streamed entry into.
+        """
+        with self._lock:
+            return self._tmp_path(key)
+
+    def end_entry(self, key: str, tmp_path: str | None, size: int, exception: BaseException = None) -> None:
+        """
+        Commit a streamed entry (or discard it when `exception` is given) and hand the outcome to coalesced callers.
+        If the entry was not stored, they produce it themselves.
+        """
+        with self._lock:
+            if exception is None:
+                try:
+                    if not self._commit(key, tmp_path, size):
+                        exception = _Abandoned()
+                except OSError as e:
+                    exception = e
+            if exception is not None and tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._resolve(key, self._path(key) if exception is None else None, exception)
+
+    def _resolve(self, key: str, result: str = None, exception: BaseException = None) -> None:
+        with self._lock:
+            pending = self._pending.pop(key)
+        if exception is None:
+            pending.set_result(result)
+        else:
+            pending.set_exception(exception)
+
+    def invalidate(self, prefix: str) -> int:
+        """
+        Drop all entries whose key starts with `prefix`. Returns the number of removed entries.
+        """
+        with self._lock:
+            self._load()
+            keys = {key for key in self._entries if key.startswith(prefix)}
+            shard = os.path.join(self.cache_location, prefix[:2])
+            if len(prefix) >= 2 and os.path.isdir(shard):  # entries written by other processes
+                keys.update(entry.name for entry in os.scandir(shard)
+                            if entry.name.startswith(prefix) and '.' not in entry.name)
+            for key in keys:
+                self._size -= self._entries.pop(key, 0)
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            return len(keys)
+
+    def _evict(self) -> None:
+        while self._size > self.max_size and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            self._load()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_size_bytes": self.max_size,
+            }
+
+
+class _FillingStream:
+    """
+    Iterator passing chunks through while writing them into a cache entry. The entry is committed once the chunks
+    are exhausted; closing the stream earlier discards it and lets coalesced requests produce it again.
+    """
+
+    def __init__(self, cache: DiskCache, key: str, chunks: Iterable[bytes]) -> None:
+        self._cache = cache
+        self._key = key
+        self._chunks = iter(chunks)
+        self._file = None
+        self._tmp_path = None
+        self._size = 0
+        self._done = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self
+
+    def __next__(self) -> bytes:
+        if self._done:
+            raise StopIteration
+        try:
+            if self._file is None:
+                self._tmp_path = self._cache.begin_entry(self._key)
+                self._file = open(self._tmp_path, "wb")
+            chunk = next(self._chunks)
+            self._file.write(chunk)
+        except StopIteration:
+            self._end()
+            raise
+        except BaseException as e:
+            self._end(e)
+            raise
+        self._size += len(chunk)
+        return chunk
+
+    def _end(self, exception: BaseException = None) -> None:
+        self._done = True
+        if self._file is not None:
+            self._file.close()
+        self._cache.end_entry(self._key, self._tmp_path, self._size, exception)
+
+    def close(self) -> None:
+        if not self._done:
+            self._end(_Abandoned())
+        if hasattr(self._chunks, "close"):
+            self._chunks.close()
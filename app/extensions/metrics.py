@@ -0,0 +1,163 @@
+import bisect
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Iterable, Iterator
+
+from flask import Flask, Response, current_app, g, has_request_context, request
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+SIZE_BUCKETS = (10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class _Histogram:
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+class Metrics:
+    """
+    Counters and histograms of this process, exposed in Prometheus text format, and timing of processing stages.
+    Stages timed while handling a request are also reported to the client in a `Server-Timing` header - except
+    those running while a streamed response body is sent, which only reach the histograms.
+    Every server process keeps its own metrics, like a Prometheus client library without multiprocess mode.
+    """
+
+    def __init__(self, app: Flask = None) -> None:
+        self._lock = threading.Lock()
+        self._counters: dict[tuple[str, Labels], float] = defaultdict(float)
+        self._histograms: dict[tuple[str, Labels], _Histogram] = {}
+        self._help: dict[str, tuple[str, str]] = {}  # name -> (type, description)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        if not hasattr(app, 'extensions'):
+            app.extensions = {}
+        app.extensions['metrics'] = self
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def inc(self, name: str, description: str, value: float = 1, **labels: str) -> None:
+        with self._lock:
+            self._help.setdefault(name, ("counter", description))
+            self._counters[name, tuple(labels.items())] += value
+
+    def observe(self, name: str, description: str, value: float, buckets: tuple[float, ...] = LATENCY_BUCKETS,
+                **labels: str) -> None:
+        with self._lock:
+            self._help.setdefault(name, ("histogram", description))
+            histogram = self._histograms.get((name, tuple(labels.items())))
+            if histogram is None:
+                histogram = self._histograms[name, tuple(labels.items())] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def record_stage(self, name: str, seconds: float) -> None:
+        self.observe("stage_duration_seconds", "Duration of processing stages", seconds, stage=name)
+        if has_request_context() and "stage_timings" in g:
+            g.stage_timings[name] = g.stage_timings.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(name, time.perf_counter() - start)
+
+    def dataset(self, rows: int, columns: int) -> None:
+        self.observe("dataset_rows", "Rows of loaded datasets", rows, SIZE_BUCKETS)
+        self.observe("dataset_columns", "Columns of loaded datasets", columns, SIZE_BUCKETS)
+        if has_request_context():
+            g.dataset_shape = (rows, columns)
+
+    @staticmethod
+    def _start_request() -> None:
+        g.request_start = time.perf_counter()
+        g.stage_timings = {}
+
+    def _finish_request(self, response: Response) -> Response:
+        endpoint = request.endpoint or "unmatched"
+        start = g.pop("request_start", time.perf_counter())
+        timings = g.pop("stage_timings", {})
+        if timings and current_app.config["SERVER_TIMING_HEADER"]:
+            response.headers["Server-Timing"] = ", ".join(f"{name};dur={seconds * 1000:.1f}"
+                                                          for name, seconds in timings.items())
+
+        self.inc("http_request_bytes_total", "Received request body bytes", request.content_length or 0,
+                 endpoint=endpoint)
+        if response.content_length is not None:
+            self.inc("http_response_bytes_total", "Sent response body bytes", response.content_length,
+                     endpoint=endpoint)
+        elif response.is_streamed:
+            response.response = self._count_sent(response.response, endpoint)
+
+        labels = {"endpoint": endpoint, "method": request.method, "status": str(response.status_code)}
+        response.call_on_close(lambda: self.observe(
+            "http_request_duration_seconds", "Time from receiving a request until its response was sent",
+            time.perf_counter() - start, **labels))
+        return response
+
+    def _count_sent(self, chunks: Iterable[bytes], endpoint: str) -> Iterator[bytes]:
+        sent = 0
+        try:
+            for chunk in chunks:
+                sent += len(chunk)
+                yield chunk
+        finally:
+            self.inc("http_response_bytes_total", "Sent response body bytes", sent, endpoint=endpoint)
+            if hasattr(chunks, "close"):
+                chunks.close()
+
+    def render(self) -> str:
+        """
+        All metrics in Prometheus text exposition format, with statistics of the app's disk caches.
+        """
+        from .disk_cache import DiskCache
+
+        for cache in (ext for ext in current_app.extensions.values() if isinstance(ext, DiskCache)):
+            stats = cache.stats()
+            with self._lock:
+                for name, stat, kind, description in (
+                        ("cache_hits_total", "hits", "counter", "Cache lookups served from the cache"),
+                        ("cache_misses_total", "misses", "counter", "Cache lookups not served from the cache"),
+                        ("cache_hit_ratio", "hit_ratio", "gauge", "Share of cache lookups served from the cache"),
+                        ("cache_size_bytes", "size_bytes", "gauge", "Size of cached entries")):
+                    self._help.setdefault(name, (kind, description))
+                    self._counters[name, (("cache", cache.name.lower()),)] = stats[stat]
+
+        lines = []
+        with self._lock:
+            for name, (kind, description) in sorted(self._help.items()):
+                lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+                for (metric, labels), value in sorted(self._counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_format_labels(labels)} {value:g}")
+                for (metric, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+                        cumulative += count
+                        le = bound if isinstance(bound, str) else f"{bound:g}"
+                        lines.append(f"{name}_bucket{_format_labels((*labels, ('le', le)))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:g}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
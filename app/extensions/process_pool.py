@@ -0,0 +1,51 @@
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from flask import Flask, current_app
+
+
+class ProcessPool:
+    """
+    Process pool shared by all requests of this process, sized by the `workers_config` config value.
+    """
+
+    def __init__(self, name: str, workers_config: str, app: Flask = None) -> None:
+        self.name = name
+        self.workers_config = workers_config
+        self._executor = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        if not hasattr(app, 'extensions'):
+            app.extensions = {}
+        app.extensions[self.name] = self
+
+    @property
+    def workers(self) -> int:
+        return current_app.config[self.workers_config]
+
+    @property
+    def executor(self) -> Executor | None:
+        """
+        Process pool created on first use. None means the work is done in the request thread.
+        """
+        if self.workers <= 1:
+            return None
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                         mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def shutdown(self, executor: Executor = None) -> None:
+        """
+        Stop the pool (only if it is still `executor`, e.g. one found broken), the next use starts a new one.
+        """
+        with self._lock:
+            if self._executor is not None and executor in (None, self._executor):
+                self._executor.shutdown(wait=executor is None, cancel_futures=True)
+                self._executor = None
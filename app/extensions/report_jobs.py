@@ -0,0 +1,396 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from contextlib import closing, contextmanager
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Iterator
+
+from flask import Flask, current_app, request
+from pydantic import BaseModel
+from werkzeug.exceptions import GatewayTimeout, HTTPException, InternalServerError, NotFound
+
+from app.errors import QueueFull, JobStateConflict
+from app.models.response.report_job_response import JobStatus
+
+POLL_INTERVAL_SECONDS = 0.2
+QUEUE_FULL_RETRY_AFTER = 30
+FINISHED = (JobStatus.DONE, JobStatus.FAILED, JobStatus.CANCELLED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    dataset_id TEXT NOT NULL,
+    dataset_key TEXT NOT NULL,
+    access_key_hash TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, created_at);
+"""
+
+
+def _connect(location: str) -> sqlite3.Connection:
+    os.makedirs(location, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(location, "jobs.sqlite3"), timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    if any(column["name"] == "dataset_path" for column in conn.execute("PRAGMA table_info(jobs)")):
+        # queue created by earlier versions, which referenced datasets by the path of their file
+        conn.execute("ALTER TABLE jobs RENAME COLUMN dataset_path TO dataset_key")
+        conn.executemany("UPDATE jobs SET dataset_key = ? WHERE id = ?",
+                         [(os.path.basename(row["dataset_key"]), row["id"])
+                          for row in conn.execute("SELECT id, dataset_key FROM jobs")])
+    return conn
+
+
+@contextmanager
+def _transaction(location: str) -> Iterator[sqlite3.Connection]:
+    """
+    Write transaction that holds the database lock from the start, so concurrent processes claim jobs one at a time.
+    """
+    with closing(_connect(location)) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+def _error(e: HTTPException) -> str:
+    return json.dumps({"error": e.name, "description": e.description})
+
+
+class ReportJobs:
+    """
+    Queue of report jobs kept in a SQLite database next to the finished PDF files. Jobs are run by a pool of worker
+    processes, started on first use in the process that accepts jobs or separately with `flask report-workers`.
+    Any number of processes and pools can share one queue location.
+    """
+
+    def __init__(self, app: Flask = None) -> None:
+        self._pool = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        if not hasattr(app, 'extensions'):
+            app.extensions = {}
+        app.extensions['report_jobs'] = self
+
+    @property
+    def jobs_location(self) -> str:
+        return current_app.config["REPORT_JOBS"]
+
+    @property
+    def workers(self) -> int:
+        return current_app.config["REPORT_JOB_WORKERS"]
+
+    @property
+    def queue_limit(self) -> int:
+        return current_app.config["REPORT_JOB_QUEUE_LIMIT"]
+
+    @property
+    def job_max_age(self) -> int:
+        return current_app.config["DELETE_AGE_HOURS"]
+
+    @staticmethod
+    def _access_key_hash() -> str:
+        access_key = request.headers.get(current_app.config["ACCESS_KEY_HEADER"], "")
+        return hashlib.sha256(access_key.encode()).hexdigest()
+
+    def result_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_location, f"{job_id}.pdf")
+
+    def submit(self, dataset_id: str, dataset_key: str, params: BaseModel) -> dict[str, Any]:
+        if self.workers > 0:
+            self._start_pool()
+        job_id = str(uuid.uuid4())
+        with _transaction(self.jobs_location) as conn:
+            active = conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)",
+                                  (JobStatus.QUEUED, JobStatus.RUNNING)).fetchone()[0]
+            if active >= self.queue_limit:
+                raise QueueFull(self.queue_limit, QUEUE_FULL_RETRY_AFTER)
+            conn.execute("INSERT INTO jobs (id, dataset_id, dataset_key, access_key_hash, params, status, created_at) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (job_id, dataset_id, dataset_key, self._access_key_hash(), params.model_dump_json(),
+                          JobStatus.QUEUED, time.time()))
+        return self.get(dataset_id, job_id)
+
+    def get(self, dataset_id: str, job_id: str) -> dict[str, Any]:
+        """
+        Job record with its position among queued jobs. Only visible with the access key of the dataset.
+        """
+        with closing(_connect(self.jobs_location)) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ? AND dataset_id = ? AND access_key_hash = ?",
+                               (job_id, dataset_id, self._access_key_hash())).fetchone()
+            if row is None:
+                raise NotFound("Report job not found or invalid access key.")
+            job = dict(row)
+            if job["status"] == JobStatus.QUEUED:
+                job["queue_position"] = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ? AND created_at < ?",
+                                                     (JobStatus.QUEUED, job["created_at"])).fetchone()[0]
+        job["error"] = json.loads(job["error"]) if job["error"] else None
+        return job
+
+    def cancel(self, dataset_id: str, job_id: str) -> dict[str, Any]:
+        """
+        Cancel a queued job right away, or ask the pool to stop a running one.
+        """
+        job = self.get(dataset_id, job_id)
+        if job["status"] in FINISHED:
+            raise JobStateConflict(job_id, job["status"], "Report job has already finished")
+        with _transaction(self.jobs_location) as conn:
+            conn.execute("UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                         (JobStatus.CANCELLED, time.time(), job_id, JobStatus.QUEUED))
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?",
+                         (job_id, JobStatus.RUNNING))
+        return self.get(dataset_id, job_id)
+
+    def get_result(self, dataset_id: str, job_id: str) -> str:
+        job = self.get(dataset_id, job_id)
+        if job["status"] != JobStatus.DONE:
+            raise JobStateConflict(job_id, job["status"], "Report job has no finished report")
+        path = self.result_path(job_id)
+        if not os.path.exists(path):
+            raise NotFound("Report of this job was already deleted.")
+        return path
+
+    def cleanup(self) -> None:
+        check_time = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+        print(f"[{check_time}] Starting report jobs cleanup...")
+
+        with _transaction(self.jobs_location) as conn:
+            expired = [row["id"] for row in conn.execute(
+                f"SELECT id FROM jobs WHERE status IN ({', '.join('?' * len(FINISHED))}) AND finished_at < ?",
+                (*FINISHED, time.time() - self.job_max_age * 3600))]
+            conn.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id in expired])
+        for job_id in expired:
+            if os.path.exists(self.result_path(job_id)):
+                os.remove(self.result_path(job_id))
+
+        print(f"✅ Cleanup complete! {len(expired)} report job(s) deleted.\n")
+
+    def _pool_settings(self) -> dict[str, Any]:
+        return {
+            "location": self.jobs_location,
+            "size": max(self.workers, 1),
+            "timeout": current_app.config["REPORT_JOB_TIMEOUT_SECONDS"],
+            "config": {key: value for key, value in current_app.config.items() if key.isupper()},
+        }
+
+    def _start_pool(self) -> None:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = _WorkerPool(**self._pool_settings())
+                    threading.Thread(target=self._run_started_pool, args=(self._pool,), name="report-jobs",
+                                     daemon=True).start()
+
+    def _run_started_pool(self, pool: "_WorkerPool") -> None:
+        """
+        Run the pool started for requests. If it stops, the next request starts a new one.
+        """
+        try:
+            pool.run()
+        finally:
+            with self._lock:
+                if self._pool is pool:
+                    pool.stop()
+                    self._pool = None
+
+    def run_pool(self) -> None:
+        """
+        Process jobs in the foreground until interrupted (used by `flask report-workers`).
+        """
+        pool = _WorkerPool(**self._pool_settings())
+        try:
+            pool.run()
+        finally:
+            pool.stop()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.stop()
+                self._pool = None
+
+
+class _Worker:
+    """
+    Worker process with its own task and result queues, so one can be killed without breaking the others.
+    """
+
+    def __init__(self, config: dict[str, Any]) -> None:
+        ctx = multiprocessing.get_context("spawn")
+        self.tasks = ctx.Queue()
+        self.results = ctx.Queue()
+        self.process = ctx.Process(target=_worker_main, args=(config, self.tasks, self.results), daemon=True)
+        self.process.start()
+        self.ready = False
+        self.job_id = None
+        self.started = 0.0
+        self.result = None  # received from the worker, not recorded yet
+
+    def kill(self) -> None:
+        self.process.terminate()
+        self.process.join()
+        self.tasks.cancel_join_thread()
+        self.results.cancel_join_thread()
+
+
+class _WorkerPool:
+
+    def __init__(self, location: str, size: int, timeout: int, config: dict[str, Any]) -> None:
+        self.location = location
+        self.size = size
+        self.timeout = timeout
+        self.config = {**config, "REPORT_RENDER_WORKERS": 1}  # a job worker renders its figures itself
+        self._workers: list[_Worker] = []
+        self._stopped = threading.Event()
+        self._last_recovery = 0.0
+
+    def run(self) -> None:
+        self._workers = [_Worker(self.config) for _ in range(self.size)]
+        while not self._stopped.wait(POLL_INTERVAL_SECONDS):
+            try:
+                self._collect()
+                self._enforce_limits()
+                self._recover_stale()
+                self._dispatch()
+            except Exception as e:  # e.g. the database is locked, the next poll retries
+                tb_str = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
+                print(f"[REPORT JOBS] Polling failed:\n{tb_str}")
+
+    def stop(self) -> None:
+        self._stopped.set()
+        for worker in self._workers:
+            worker.kill()
+
+    def _finish(self, job_id: str, status: JobStatus, error: str = None) -> None:
+        with _transaction(self.location) as conn:
+            conn.execute("UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND status = ?",
+                         (status, error, time.time(), job_id, JobStatus.RUNNING))
+
+    def _collect(self) -> None:
+        for worker in self._workers:
+            if worker.result is None:
+                try:
+                    worker.result = worker.results.get_nowait()
+                except queue.Empty:
+                    continue
+            job_id, error = worker.result
+            if job_id is not None:
+                self._finish(job_id, JobStatus.FAILED if error else JobStatus.DONE, error)  # kept if this fails
+                worker.job_id = None
+            else:  # started up
+                worker.ready = True
+            worker.result = None
+
+    def _replace(self, worker: _Worker) -> None:
+        """
+        Kill a worker together with its unfinished job and start a fresh one in its place.
+        """
+        worker.kill()
+        if worker.job_id:
+            for path in (os.path.join(self.location, f"{worker.job_id}.pdf{suffix}") for suffix in ("", ".tmp")):
+                if os.path.exists(path):
+                    os.remove(path)
+        self._workers[self._workers.index(worker)] = _Worker(self.config)
+
+    def _enforce_limits(self) -> None:
+        for worker in [worker for worker in self._workers if not worker.process.is_alive()]:
+            if worker.job_id:
+                self._finish(worker.job_id, JobStatus.FAILED, _error(InternalServerError("Report worker crashed.")))
+            self._replace(worker)
+        busy = {worker.job_id: worker for worker in self._workers if worker.job_id}
+        if not busy:
+            return
+        with closing(_connect(self.location)) as conn:
+            cancelled = {row["id"] for row in conn.execute(
+                f"SELECT id FROM jobs WHERE cancel_requested = 1 AND id IN ({', '.join('?' * len(busy))})",
+                tuple(busy))}
+        for job_id, worker in busy.items():
+            if job_id in cancelled:
+                self._finish(job_id, JobStatus.CANCELLED)
+            elif time.monotonic() - worker.started > self.timeout:
+                self._finish(job_id, JobStatus.FAILED, _error(GatewayTimeout(
+                    f"Report generation took longer than {self.timeout} seconds.")))
+            else:
+                continue
+            self._replace(worker)
+
+    def _recover_stale(self) -> None:
+        """
+        Fail jobs left running by pools that stopped without finishing them.
+        """
+        if time.monotonic() - self._last_recovery < 60:
+            return
+        self._last_recovery = time.monotonic()
+        with _transaction(self.location) as conn:
+            conn.execute("UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE status = ? AND started_at < ?",
+                         (JobStatus.FAILED, _error(InternalServerError("Report worker stopped.")), time.time(),
+                          JobStatus.RUNNING, time.time() - self.timeout - 60))
+
+    def _dispatch(self) -> None:
+        for worker in self._workers:
+            if not worker.ready or worker.job_id:
+                continue
+            with _transaction(self.location) as conn:
+                job = conn.execute("SELECT id, dataset_key, params FROM jobs WHERE status = ? "
+                                   "ORDER BY created_at LIMIT 1", (JobStatus.QUEUED,)).fetchone()
+                if job is None:
+                    return
+                conn.execute("UPDATE jobs SET status = ?, started_at = ? WHERE id = ?",
+                             (JobStatus.RUNNING, time.time(), job["id"]))
+            worker.job_id, worker.started = job["id"], time.monotonic()
+            worker.tasks.put((job["id"], job["dataset_key"], job["params"],
+                              os.path.join(self.location, f"{job['id']}.pdf")))
+
+
+def _worker_main(config: dict[str, Any], tasks: multiprocessing.Queue, results: multiprocessing.Queue) -> None:
+    from app import create_app
+    from app.controllers import DataFrameAnalyzer
+    from app.extensions import storage, plot_cache, dataset_profiler
+    from app.models import AnalysisParams
+
+    app = create_app(SimpleNamespace(**config))
+    results.put((None, None))
+    while (task := tasks.get()) is not None:
+        job_id, dataset_key, params_json, result_path = task
+        try:
+            with app.app_context():
+                try:
+                    data = storage.read_dataset(dataset_key)
+                except OSError:
+                    raise NotFound("Dataset was deleted before the report job started.")
+                params = AnalysisParams.model_validate_json(params_json)
+                profile = dataset_profiler.load(dataset_key)
+                report = DataFrameAnalyzer(data, profile, params.engine).generate_report(params, None, plot_cache)
+                with open(f"{result_path}.tmp", "wb") as f:
+                    for chunk in report.stream():
+                        f.write(chunk)
+                os.replace(f"{result_path}.tmp", result_path)
+            results.put((job_id, None))
+        except HTTPException as e:
+            results.put((job_id, _error(e)))
+        except Exception as e:
+            tb_str = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
+            print(f"[REPORT JOB {job_id}] Unexpected error:\n{tb_str}")
+            results.put((job_id, _error(InternalServerError())))
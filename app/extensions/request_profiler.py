@@ -0,0 +1,177 @@
+import cProfile
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from types import CodeType
+from typing import Any
+
+from flask import Flask, Response, current_app, g, request
+from pydantic import BaseModel
+from werkzeug.exceptions import HTTPException
+
+PROFILE_ID_HEADER = "X-Profile-Id"
+SAMPLE_INTERVAL_SECONDS = 0.005
+
+
+def _frame_label(code: CodeType) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _Capture:
+    """
+    cProfile of the current thread, and stacks of the thread sampled by a helper thread for flame graphs.
+    """
+
+    def __init__(self) -> None:
+        self.profile: cProfile.Profile | None = cProfile.Profile()
+        self.samples: Counter[str] = Counter()
+        self.started = time.perf_counter()
+        self._thread_id = threading.get_ident()
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        try:
+            self.profile.enable()
+        except ValueError:  # another profiler is active in this thread (Python 3.12+), keep sampling only
+            self.profile = None
+        self._sampler.start()
+
+    def stop(self) -> float:
+        if self.profile is not None:
+            self.profile.disable()
+        self._stopped.set()
+        self._sampler.join()
+        return time.perf_counter() - self.started
+
+    def _sample(self) -> None:
+        while not self._stopped.wait(SAMPLE_INTERVAL_SECONDS):
+            frame = sys._current_frames().get(self._thread_id)  # noqa
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+
+class RequestProfiler:
+    """
+    Profiles requests sent with the profiling header set to the PROFILING_TOKEN value (profiling is disabled while
+    the token is not configured). Each capture gets an id returned in the `X-Profile-Id` response header and
+    is stored in REQUEST_PROFILES as `<id>.pstats` (cProfile statistics), `<id>.collapsed` (sampled stacks for
+    flamegraph.pl or speedscope) and `<id>.json` (route, dataset shape, request parameters and duration).
+    Streamed response bodies are profiled until they are sent. Only the request thread is profiled, work done in
+    render pool processes or helper threads shows up as waiting for it.
+    """
+
+    def __init__(self, app: Flask = None) -> None:
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        if not hasattr(app, 'extensions'):
+            app.extensions = {}
+        app.extensions['request_profiler'] = self
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._abandon)
+
+    @property
+    def token(self) -> str | None:
+        return current_app.config["PROFILING_TOKEN"]
+
+    @property
+    def header(self) -> str:
+        return current_app.config["PROFILING_HEADER"]
+
+    @property
+    def profiles_location(self) -> str:
+        return current_app.config["REQUEST_PROFILES"]
+
+    @property
+    def profile_max_age(self) -> int:
+        return current_app.config["DELETE_AGE_HOURS"]
+
+    def _start(self) -> None:
+        value = request.headers.get(self.header)
+        if self.token and value and hmac.compare_digest(value.encode(), self.token.encode()):
+            g.profile_capture = _Capture()
+            g.profile_capture.start()
+
+    def _finish(self, response: Response) -> Response:
+        capture: _Capture | None = g.pop("profile_capture", None)
+        if capture is None:
+            return response
+        profile_id = str(uuid.uuid4())
+        tags = self._tags(response)
+        location = self.profiles_location
+
+        def save() -> None:
+            tags["duration_ms"] = round(capture.stop() * 1000, 1)
+            os.makedirs(location, exist_ok=True)
+            path = os.path.join(location, profile_id)
+            if capture.profile is not None:
+                capture.profile.dump_stats(f"{path}.pstats")
+            with open(f"{path}.collapsed", "w") as f:
+                f.writelines(f"{stack} {count}\n" for stack, count in capture.samples.items())
+            with open(f"{path}.json", "w") as f:
+                json.dump(tags, f, indent=2, default=str)
+
+        response.call_on_close(save)
+        response.headers[PROFILE_ID_HEADER] = profile_id
+        return response
+
+    @staticmethod
+    def _abandon(_: BaseException | None) -> None:
+        capture: _Capture | None = g.pop("profile_capture", None)
+        if capture is not None:  # no response was made
+            capture.stop()
+
+    @staticmethod
+    def _tags(response: Response) -> dict[str, Any]:
+        dataset_id = (request.view_args or {}).get("dataset_id")
+        shape = g.get("dataset_shape")
+        if shape is None and dataset_id:
+            storage = current_app.extensions['storage']
+            try:
+                layout = storage.read_layout(storage.get_dataset_key(dataset_id))
+                shape = (layout.num_rows, len(layout.columns))
+            except (HTTPException, OSError):
+                pass
+        params = {}
+        context = getattr(request, "context", None)
+        for part in ("query", "body"):
+            model = getattr(context, part, None)
+            if isinstance(model, BaseModel):
+                params[part] = model.model_dump(mode="json")
+        return {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "method": request.method,
+            "route": request.url_rule.rule if request.url_rule else request.path,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "dataset_id": dataset_id,
+            "dataset_shape": shape,
+            "request_bytes": request.content_length,
+            "params": params,
+        }
+
+    def cleanup(self) -> None:
+        check_time = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+        print(f"[{check_time}] Starting request profiles cleanup...")
+
+        deleted = 0
+        if os.path.isdir(self.profiles_location):
+            for entry in os.scandir(self.profiles_location):
+                if entry.is_file() and time.time() - entry.stat().st_mtime > self.profile_max_age * 3600:
+                    os.remove(entry.path)
+                    deleted += entry.name.endswith(".json")
+
+        print(f"✅ Cleanup complete! {deleted} request profile(s) deleted.\n")
@@ -1,12 +1,27 @@
+import hashlib
+import io
 import os
+import pickle
 import time
 import uuid
+from contextlib import contextmanager
 from datetime import datetime, timezone
+from typing import Callable, Iterator
 
+import numpy as np
 import pandas as pd
 from flask import Flask, current_app, url_for, request
 from werkzeug.exceptions import BadRequest, NotFound, InternalServerError
 
+from app.errors import ColumnNotFound
+from .block_store import BlockStore
+from .dataset_index import DatasetIndex
+from .dataset_file import (DatasetLayout, append_blocks, conform_rows, dump_layout, load_layout, read_blocks,
+                           split_blocks)
+from .storage_backends import BACKENDS, StorageBackend
+
+DATASETS, HASHES, PROFILES = "datasets", "hashes", "profiles"  # backend namespaces
+
 
 class Storage:
 
@@ -27,51 +42,273 @@ class Storage:
     def dataset_max_age(self) -> int:
         return current_app.config["DELETE_AGE_HOURS"]
 
+    @property
+    def max_size(self) -> int:
+        return current_app.config["DATASET_STORAGE_MAX_MB"] * 1024 * 1024
+
     @property
     def access_key_header(self) -> str:
         return current_app.config["ACCESS_KEY_HEADER"]
 
+    @property
+    def chunk_rows(self) -> int:
+        return current_app.config["DATASET_CHUNK_ROWS"]
+
+    @property
+    def backend(self) -> StorageBackend:
+        return BACKENDS[current_app.config["DATASET_BACKEND"]](self.storage_location)
+
+    @property
+    def blocks(self) -> BlockStore:
+        return BlockStore(self.backend)
+
+    @property
+    def index(self) -> DatasetIndex:
+        index = DatasetIndex(self.storage_location)
+        if not index.exists():
+            index.create()
+            self._index_flat_files(index)
+        return index
+
+    def _index_flat_files(self, index: DatasetIndex) -> None:
+        """
+        Move datasets stored by earlier versions directly in the storage directory into the backend and index them.
+        """
+        os.makedirs(self.storage_location, exist_ok=True)
+        backend = self.backend
+        for entry in os.scandir(self.storage_location):
+            if not entry.is_file() or "__" not in entry.name or entry.name.endswith(".sqlite3"):
+                continue
+            name, namespace = entry.name, DATASETS
+            for suffix, sidecar_namespace in ((".sha256", HASHES), (".profile", PROFILES), (".tmp", None)):
+                if entry.name.endswith(suffix):
+                    name, namespace = entry.name.removesuffix(suffix), sidecar_namespace
+            try:
+                if namespace is not None:
+                    with open(entry.path, "rb") as f:
+                        backend.write(namespace, name, f.read())
+                    if namespace == DATASETS:
+                        index.add(name, entry.stat().st_ctime)
+                os.remove(entry.path)
+            except OSError:  # moved by another process meanwhile
+                pass
+
+    def _delete(self, name: str) -> int:
+        """
+        Delete a dataset with its hash and profile and release its blocks. Returns the freed bytes.
+        """
+        if not self.index.remove(name):
+            return 0
+        backend = self.backend
+        with backend.lock(DATASETS, name):  # waits for reads in progress
+            try:
+                layout = load_layout(backend.read(DATASETS, name))
+            except OSError:
+                layout = None
+            freed = backend.delete(DATASETS, name) + backend.delete(HASHES, name)
+            current_app.extensions['dataset_profiler'].discard(name)
+        if layout is not None:
+            freed += self.blocks.release(layout.blocks)
+        return freed
+
+    def _enforce_quota(self, keep: str = None) -> tuple[int, int]:
+        """
+        Delete least recently used datasets (except `keep`) while their blocks take more than the storage quota.
+        Returns the number of deleted datasets and the freed bytes.
+        """
+        evicted, freed = 0, 0
+        while self.blocks.total_size() > self.max_size:
+            name = self.index.least_recently_used(exclude=keep)
+            if name is None:
+                break
+            freed += self._delete(name)
+            evicted += 1
+        return evicted, freed
+
     def cleanup(self) -> None:
         check_time = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
-        deleted_files = 0
         print(f"[{check_time}] Starting storage cleanup...")
 
-        os.makedirs(self.storage_location, exist_ok=True)
+        expired = self.index.saved_before(time.time() - self.dataset_max_age * 3600)
+        freed = sum(self._delete(name) for name in expired)
+        evicted, evicted_bytes = self._enforce_quota()
+        freed += evicted_bytes + self.blocks.collect_garbage()
 
-        for file_path in os.listdir(self.storage_location):
-            full_path = os.path.join(self.storage_location, file_path)
-            if os.path.isfile(full_path) and (time.time() - os.path.getctime(full_path) > self.dataset_max_age * 3600):
-                os.remove(full_path)
-                deleted_files += 1
+        print(f"✅ Cleanup complete! {len(expired)} expired and {evicted} least recently used dataset(s) deleted, "
+              f"{freed / 1024 / 1024:.1f} MB freed.\n")
 
-        print(f"✅ Cleanup complete! {deleted_files} file(s) deleted.\n")
-
-    def get_dataset(self, dataset_id: str) -> pd.DataFrame:
-        access_key = request.headers.get(self.access_key_header)
+    def get_dataset_key(self, dataset_id: str, access_key: str = None) -> str:
+        """
+        Name the dataset is stored under in the backend, after checking it exists.
+        """
+        access_key = access_key or request.headers.get(self.access_key_header)
         if not access_key:
             raise BadRequest("Missing access key in headers.")
 
-        expected_filename = f"{dataset_id}__{access_key}"
-        full_path = os.path.join(self.storage_location, expected_filename)
-
-        if not os.path.exists(full_path):
+        name = f"{dataset_id}__{access_key}"
+        index = self.index
+        if self.backend.size(DATASETS, name) is None:
             raise NotFound("Dataset not found or invalid access key.")
 
-        return pd.read_pickle(full_path)
+        index.touch(name)
+        return name
+
+    @contextmanager
+    def _reading(self, key: str) -> Iterator[DatasetLayout]:
+        """
+        Layout of the dataset, whose blocks are kept while the context is open: overwrites and deletions of the
+        dataset (in any process) wait until it is closed, so a read never mixes blocks of different versions.
+        """
+        backend = self.backend
+        with backend.lock(DATASETS, key, shared=True):
+            layout = load_layout(backend.read(DATASETS, key))
+            if layout is not None:
+                yield layout
+                return
+        with backend.lock(DATASETS, key):  # plain pickle stored by earlier versions, converted on first read
+            data = backend.read(DATASETS, key)
+            yield load_layout(data) or self._write_dataset(key, pd.read_pickle(io.BytesIO(data)))
+
+    def read_layout(self, key: str) -> DatasetLayout:
+        with self._reading(key) as layout:
+            return layout
+
+    def _write_dataset(self, key: str, data: pd.DataFrame) -> DatasetLayout:
+        return self._write_layout(key, lambda put: split_blocks(data, self.chunk_rows, put))
+
+    def _write_layout(self, key: str, build: Callable[[Callable[[bytes], str]], DatasetLayout]) -> DatasetLayout:
+        """
+        Store the blocks of the layout made by `build` (only those not stored yet) and point the dataset to them,
+        releasing the blocks of the content it replaces. Must be called holding the exclusive lock of the dataset.
+        """
+        blocks = self.blocks
+        for _ in range(3):
+            layout = build(blocks.put)
+            if blocks.acquire(layout.blocks):
+                break
+        else:
+            raise OSError("Dataset blocks kept being garbage collected while saving")
+
+        try:
+            old_layout = load_layout(blocks.backend.read(DATASETS, key))
+        except FileNotFoundError:
+            old_layout = None
+        try:
+            blocks.backend.write(DATASETS, key, dump_layout(layout))
+        except BaseException:
+            blocks.release(layout.blocks)
+            raise
+        if old_layout is not None:
+            blocks.release(old_layout.blocks)
+        return layout
+
+    def read_dataset(self, key: str, columns: list[str] = None, rows: slice | np.ndarray = None) -> pd.DataFrame:
+        """
+        Read the whole dataset, or only the named columns and the rows selected by a slice or by sorted positions.
+        """
+        with self._reading(key) as layout:
+            positions = None
+            if columns is not None:
+                names = [str(c) for c in layout.columns]
+                missing = [c for c in columns if c not in names]
+                if missing:
+                    raise ColumnNotFound(missing, names)
+                positions = [names.index(c) for c in columns]
+            return read_blocks(layout, self.blocks.get, positions, rows)
+
+    def get_dataset_layout(self, dataset_id: str) -> DatasetLayout:
+        return self.read_layout(self.get_dataset_key(dataset_id))
+
+    def get_dataset(self, dataset_id: str, columns: list[str] = None, rows: slice | np.ndarray = None) -> pd.DataFrame:
+        return self.read_dataset(self.get_dataset_key(dataset_id), columns, rows)
+
+    def get_dataset_hash(self, dataset_id: str) -> str:
+        """
+        Content hash of the stored dataset, computed once at save time so it can be read without loading the data.
+        """
+        key = self.get_dataset_key(dataset_id)
+        try:
+            return self.backend.read(HASHES, key).decode()
+        except OSError:
+            content_hash = self.content_hash(self.read_dataset(key))
+            self._write_hash(key, content_hash)
+            return content_hash
+
+    @staticmethod
+    def content_hash(data: pd.DataFrame) -> str:
+        h = hashlib.sha256()
+        h.update(repr((list(data.columns), data.dtypes.astype(str).tolist(), data.index.names)).encode())
+        try:
+            h.update(pd.util.hash_pandas_object(data).values.tobytes())
+        except TypeError:  # unhashable cell values (lists, dicts etc.)
+            h.update(pickle.dumps(data))
+        return h.hexdigest()
+
+    def _write_hash(self, key: str, content_hash: str) -> None:
+        try:
+            self.backend.write(HASHES, key, content_hash.encode())
+        except OSError:
+            pass
 
     def save_dataset(self, data: pd.DataFrame, dataset_id: str = "") -> tuple[str, str]:
         dataset_id = dataset_id or str(uuid.uuid4())
         access_key = request.headers.get(self.access_key_header, str(uuid.uuid4()))
 
-        os.makedirs(self.storage_location, exist_ok=True)
+        name = f"{dataset_id}__{access_key}"
+        index = self.index
+        backend = self.backend
+        content_hash = self.content_hash(data)
 
-        filename = f"{dataset_id}__{access_key}"
-        full_path = os.path.join(self.storage_location, filename)
+        with backend.lock(DATASETS, name):
+            try:
+                old_hash = backend.read(HASHES, name).decode()
+            except OSError:
+                old_hash = None
+            if old_hash is not None:  # overwriting - cached reports and exports become stale
+                current_app.extensions['report_cache'].invalidate(old_hash)
+                current_app.extensions['export_cache'].invalidate(old_hash)
+                backend.delete(HASHES, name)
+                current_app.extensions['dataset_profiler'].discard(name)
 
-        try:
-            data.to_pickle(full_path)
-        except OSError:
-            raise InternalServerError(f"Failed to save your dataset. Try again later or consider using "
-                                      f"'{url_for('system.analyze_data')}' endpoint for all-in-one request.")
+            try:
+                self._write_dataset(name, data)
+            except OSError:
+                raise InternalServerError(f"Failed to save your dataset. Try again later or consider using "
+                                          f"'{url_for('system.analyze_data')}' endpoint for all-in-one request.")
+            index.add(name)
+            self._write_hash(name, content_hash)
+        current_app.extensions['dataset_profiler'].submit(name, data, content_hash)
+        self._enforce_quota(keep=name)
 
         return dataset_id, access_key
+
+    def append_dataset(self, key: str, rows: pd.DataFrame) -> DatasetLayout:
+        """
+        Append rows to the stored dataset after conforming them to its schema. Stored rows are not rewritten:
+        only the blocks of the last incomplete row chunk are stored again. The content hash of the result chains
+        the previous hash with the hash of the new rows, and the stored profile is updated from the new rows.
+        """
+        self.read_layout(key)  # converts datasets stored by earlier versions
+        backend = self.backend
+        blocks = self.blocks
+        with backend.lock(DATASETS, key):
+            layout = load_layout(backend.read(DATASETS, key))
+            last_row = read_blocks(layout, blocks.get, [], slice(layout.num_rows - 1, layout.num_rows))
+            rows = conform_rows(layout, rows, last_row.index)
+            try:
+                old_hash = backend.read(HASHES, key).decode()
+            except OSError:
+                old_hash = self.content_hash(read_blocks(layout, blocks.get))
+            content_hash = hashlib.sha256(f"{old_hash}{self.content_hash(rows)}".encode()).hexdigest()
+
+            try:
+                appended = self._write_layout(key, lambda put: append_blocks(layout, rows, put, blocks.get))
+            except OSError:
+                raise InternalServerError("Failed to append rows to your dataset. Try again later.")
+            current_app.extensions['report_cache'].invalidate(old_hash)
+            current_app.extensions['export_cache'].invalidate(old_hash)
+            self._write_hash(key, content_hash)
+            current_app.extensions['dataset_profiler'].append(key, rows, old_hash, content_hash)
+        self._enforce_quota(keep=key)
+
+        return appended
@@ -0,0 +1,218 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import closing, contextmanager
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+LOCK_STRIPES = 4096  # lock files shared by all names, so they never have to be removed
+
+
+def shard(name: str) -> str:
+    return hashlib.sha256(name.encode()).hexdigest()[:2]  # never build directories from client supplied ids
+
+
+class StorageBackend(ABC):
+    """
+    Blobs stored under a name within a namespace ("datasets", "blocks" etc.). Writes are atomic, so readers see
+    either the previous or the new content of a name and never a partial one. Names are spread over 256 shards
+    by their hash, which lets garbage collection scan a single shard at a time.
+    """
+    _thread_locks: dict[str, threading.Lock] = {}  # stripes locked by this process when fcntl is unavailable
+
+    def __init__(self, location: str) -> None:
+        self.location = location
+
+    @abstractmethod
+    def read(self, namespace: str, name: str) -> bytes:
+        """
+        Raises FileNotFoundError if nothing is stored under the name.
+        """
+
+    @abstractmethod
+    def write(self, namespace: str, name: str, data: bytes) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, namespace: str, name: str) -> int:
+        """
+        Returns the freed bytes, 0 if nothing was stored under the name.
+        """
+
+    @abstractmethod
+    def size(self, namespace: str, name: str) -> int | None:
+        ...
+
+    @abstractmethod
+    def scan(self, namespace: str, shard_id: str) -> Iterator[tuple[str, float, int]]:
+        """
+        Name, modification time and size of everything stored in a shard of the namespace.
+        """
+
+    @contextmanager
+    def lock(self, namespace: str, name: str, shared: bool = False) -> Iterator[None]:
+        """
+        Hold a lock on the name across all processes using the storage location: an exclusive one to modify what is
+        stored under it, a shared one to keep it unchanged while reading. Names are hashed onto a fixed number of
+        lock files (flock, also honoured on NFS) - unrelated names sharing one only wait for each other briefly.
+        Without fcntl the lock only covers threads of this process and is always exclusive.
+        """
+        stripe = int(hashlib.sha256(f"{namespace}/{name}".encode()).hexdigest(), 16) % LOCK_STRIPES
+        path = os.path.join(self.location, "locks", f"{stripe:03x}")
+        if fcntl is None:
+            with self._thread_locks.setdefault(path, threading.Lock()):
+                yield
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # everyone passes the gate before locking, and a waiting writer keeps it closed, so a steady stream of
+        # readers holding shared locks cannot starve writers
+        gate = os.open(f"{path}.gate", os.O_RDWR | os.O_CREAT)
+        fd = os.open(f"{path}.lock", os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(gate, fcntl.LOCK_EX)
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            os.close(gate)
+            gate = None
+            yield
+        finally:
+            if gate is not None:
+                os.close(gate)
+            os.close(fd)  # releases the lock
+
+
+class LocalBackend(StorageBackend):
+    """
+    One file per name in `<location>/<namespace>/<shard>/`. Files are written under a temporary name and renamed
+    over the previous one, which is atomic on POSIX and Windows file systems.
+    """
+
+    def _path(self, namespace: str, name: str) -> str:
+        return os.path.join(self.location, namespace, shard(name), name)
+
+    def read(self, namespace: str, name: str) -> bytes:
+        with open(self._path(namespace, name), "rb") as f:
+            return f.read()
+
+    def write(self, namespace: str, name: str, data: bytes) -> None:
+        path = self._path(namespace, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def delete(self, namespace: str, name: str) -> int:
+        path = self._path(namespace, name)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return 0
+        return size
+
+    def size(self, namespace: str, name: str) -> int | None:
+        try:
+            return os.path.getsize(self._path(namespace, name))
+        except OSError:
+            return None
+
+    def scan(self, namespace: str, shard_id: str) -> Iterator[tuple[str, float, int]]:
+        directory = os.path.join(self.location, namespace, shard_id)
+        if not os.path.isdir(directory):
+            return
+        for entry in os.scandir(directory):
+            try:
+                stat = entry.stat()
+            except OSError:  # removed meanwhile
+                continue
+            yield entry.name, stat.st_mtime, stat.st_size
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    namespace TEXT NOT NULL,
+    name TEXT NOT NULL,
+    shard TEXT NOT NULL,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    modified_at REAL NOT NULL,
+    PRIMARY KEY (namespace, name)
+);
+CREATE INDEX IF NOT EXISTS blobs_by_shard ON blobs (namespace, shard);
+"""
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    All blobs in one SQLite database (`<location>/storage.sqlite3`) in WAL mode: every write is a transaction,
+    and readers are never blocked by a writer. Suits deployments that prefer a single file over many small ones.
+    """
+    _initialized: set[str] = set()  # databases whose schema was created by this process
+    _connections = threading.local()
+
+    @property
+    def db_path(self) -> str:
+        return os.path.join(self.location, "storage.sqlite3")
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Connection of the current thread, reused since a dataset read fetches many blobs. A connection is never
+        used in a forked child process.
+        """
+        connections = self._connections.__dict__.setdefault("by_path", {})
+        pid, conn = connections.get(self.db_path, (None, None))
+        if pid != os.getpid():
+            os.makedirs(self.location, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            if self.db_path not in self._initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                self._initialized.add(self.db_path)
+            connections[self.db_path] = (os.getpid(), conn)
+        return conn
+
+    def read(self, namespace: str, name: str) -> bytes:
+        row = self._connection().execute("SELECT data FROM blobs WHERE namespace = ? AND name = ?",
+                                         (namespace, name)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"{namespace}/{name}")
+        return row[0]
+
+    def write(self, namespace: str, name: str, data: bytes) -> None:
+        self._connection().execute(
+            "INSERT INTO blobs (namespace, name, shard, data, size, modified_at) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (namespace, name) DO UPDATE SET data = excluded.data, size = excluded.size, "
+            "modified_at = excluded.modified_at", (namespace, name, shard(name), data, len(data), time.time()))
+
+    def delete(self, namespace: str, name: str) -> int:
+        size = self.size(namespace, name)
+        self._connection().execute("DELETE FROM blobs WHERE namespace = ? AND name = ?", (namespace, name))
+        return size or 0
+
+    def size(self, namespace: str, name: str) -> int | None:
+        row = self._connection().execute("SELECT size FROM blobs WHERE namespace = ? AND name = ?",
+                                         (namespace, name)).fetchone()
+        return row[0] if row else None
+
+    def scan(self, namespace: str, shard_id: str) -> Iterator[tuple[str, float, int]]:
+        with closing(self._connection().execute("SELECT name, modified_at, size FROM blobs "
+                                                "WHERE namespace = ? AND shard = ?", (namespace, shard_id))) as rows:
+            yield from rows.fetchall()
+
+
+BACKENDS: dict[str, type[StorageBackend]] = {
+    "local": LocalBackend,
+    "sqlite": SQLiteBackend,
+}
@@ -8,28 +8,21 @@ from flask_pydantic_spec import Request, Response as SpecResponse, FlaskPydantic
 from app.errors import ValidationFailed
 
 
-def handle_http_exception(e: HTTPException) -> tuple[FlaskResponse, int]:
+def handle_http_exception(e: HTTPException) -> tuple[FlaskResponse, int, list[tuple[str, str]]]:
     response = {
         "error": e.name,
         "code": e.code,
         "description": e.description
     }
-    return jsonify(response), e.code
+    headers = [(name, value) for name, value in e.get_headers() if name != "Content-Type"]  # e.g. Retry-After
+    return jsonify(response), e.code, headers
 
 
-def handle_validation_error(e: ValidationError) -> tuple[FlaskResponse, int]:
-    simplified_errors = [
-        {
-            "parameter": err["loc"][0],
-            "message": err["msg"],
-            "value": err["input"]
-        }
-        for err in e.errors()
-    ]
-    return handle_http_exception(ValidationFailed(simplified_errors))
+def handle_validation_error(e: ValidationError) -> tuple[FlaskResponse, int, list[tuple[str, str]]]:
+    return handle_http_exception(ValidationFailed.from_validation_error(e))
 
 
-def handle_unexpected_error(e: Exception) -> tuple[FlaskResponse, int]:
+def handle_unexpected_error(e: Exception) -> tuple[FlaskResponse, int, list[tuple[str, str]]]:
     service_name = request.blueprint or "APP"
     tb_str = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
     print(f"[{service_name}] Unexpected error:\n{tb_str}")
@@ -0,0 +1,14 @@
+import importlib
+import threading
+from types import ModuleType
+
+_IMPORT_LOCK = threading.RLock()
+
+
+def import_module(name: str) -> ModuleType:
+    """
+    Import a heavy library on first use. Imports are serialized: scikit-learn imported for the first time by two
+    threads at once (parallel analysis tasks, background profiling) fails on its partially initialized modules.
+    """
+    with _IMPORT_LOCK:
+        return importlib.import_module(name)
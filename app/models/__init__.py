@@ -1,6 +1,11 @@
-from .request import AnalysisParams, ExportParams, LoadingParams, PreprocessingParams, FullPipelineParams
-from .response import InfoResponse, UploadResponse, MetadataResponse, PreprocessingResponse
+from .request import (AnalysisParams, ExportParams, LoadingParams, PreprocessingParams, FullPipelineParams, PreviewParams,
+                      BatchPipelineParams)
+from .response import (InfoResponse, UploadResponse, MetadataResponse, PreprocessingResponse, AnalysisResponse,
+                       ReportJobResponse, PreviewResponse, BatchManifest, BatchFileResult, BatchFileStatus,
+                       AppendResponse)
 from .common import DatasetTokenHeader
 
 __all__ = ['AnalysisParams', 'LoadingParams', 'PreprocessingParams', 'ExportParams', 'FullPipelineParams',
-           'InfoResponse', 'MetadataResponse', 'UploadResponse', 'PreprocessingResponse', 'DatasetTokenHeader']
+           'PreviewParams', 'InfoResponse', 'MetadataResponse', 'UploadResponse', 'PreprocessingResponse',
+           'AnalysisResponse', 'ReportJobResponse', 'PreviewResponse', 'DatasetTokenHeader', 'BatchPipelineParams',
+           'BatchManifest', 'BatchFileResult', 'BatchFileStatus', 'AppendResponse']
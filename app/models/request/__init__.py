@@ -3,5 +3,8 @@ from .export_params import ExportParams
 from .loading_params import LoadingParams
 from .preprocessing_params import PreprocessingParams
 from .full_pipeline_params import FullPipelineParams
+from .batch_pipeline_params import BatchPipelineParams
+from .slice_params import PreviewParams
 
-__all__ = ['AnalysisParams', 'ExportParams', 'LoadingParams', 'PreprocessingParams', 'FullPipelineParams']
+__all__ = ['AnalysisParams', 'ExportParams', 'LoadingParams', 'PreprocessingParams', 'FullPipelineParams', 'PreviewParams',
+           'BatchPipelineParams']
@@ -1,10 +1,11 @@
 from enum import Enum
-from typing import Optional
+from typing import Any, Optional
 
-from pydantic import BaseModel, field_validator, model_validator, PositiveInt
+from pydantic import BaseModel, Field, field_validator, model_validator, PositiveInt
 from typing_extensions import Self
 
 from app.errors import ParameterMissing
+from .engine_params import EngineParams
 
 
 class AnalysisTask(str, Enum):
@@ -18,29 +19,80 @@ class DocumentTheme(str, Enum):
     DARK = "dark"
 
 
-class AnalysisParams(BaseModel):
+class ImageFormat(str, Enum):
+    PNG = "png"
+    PNG8 = "png8"
+    JPEG = "jpeg"
+    SVG = "svg"
+
+
+class AnalysisTarget(BaseModel):
     analysis_task: AnalysisTask
     target_col: Optional[str] = None
+
+    @field_validator("analysis_task", mode='before')  # noqa
+    @classmethod
+    def normalize_analysis_task(cls, v: str) -> str:
+        return v.lower()
+
+    @model_validator(mode='before')  # noqa
+    @classmethod
+    def parse_task_string(cls, v: Any) -> Any:
+        if isinstance(v, str):  # "<analysis_task>:<target_col>" or just "<analysis_task>"
+            task, _, target = v.partition(":")
+            return {"analysis_task": task, "target_col": target or None}
+        return v
+
+    @model_validator(mode='after')
+    def validate_target_column(self) -> Self:
+        if self.analysis_task == AnalysisTask.CLUSTERIZATION and self.target_col is None:
+            self.target_col = "Cluster"
+        elif self.target_col is None:
+            raise ParameterMissing("target_col")
+        return self
+
+
+class AnalysisParams(EngineParams):
+    analysis_task: Optional[AnalysisTask] = None
+    target_col: Optional[str] = None
+    tasks: list[AnalysisTarget] = Field(default_factory=list)
     include_basic_stats: bool = True
     include_visualizations: bool = True
     dpi: PositiveInt = 200
     theme: DocumentTheme = DocumentTheme.LIGHT
     show_time: bool = True
+    image_format: ImageFormat = ImageFormat.PNG
+    image_quality: int = Field(85, ge=1, le=100)
 
     @field_validator("analysis_task", mode='before')  # noqa
     @classmethod
-    def normalize_analysis_task(cls, v: str) -> str:
-        return v.lower()
+    def normalize_analysis_task(cls, v: str | None) -> str | None:
+        return v.lower() if isinstance(v, str) else v
+
+    @field_validator("tasks", mode='before')  # noqa
+    @classmethod
+    def wrap_single_task(cls, v: Any) -> Any:
+        return [v] if isinstance(v, (str, dict)) else v
 
     @field_validator("theme", mode='before')  # noqa
     @classmethod
     def normalize_theme(cls, v: str) -> str:
         return v.lower()
 
+    @field_validator("image_format", mode='before')  # noqa
+    @classmethod
+    def normalize_image_format(cls, v: str) -> str:
+        return v.lower()
+
     @model_validator(mode='after')
-    def validate_target_column(self) -> Self:
-        if self.analysis_task == AnalysisTask.CLUSTERIZATION and self.target_col is None:
-            self.target_col = "Cluster"
-        elif self.target_col is None:
-            raise ParameterMissing("target_col")
+    def collect_tasks(self) -> Self:
+        """
+        `analysis_task` and `target_col` describe one task and are moved to the front of `tasks`,
+        so the report sections always come from `tasks`.
+        """
+        if self.analysis_task is not None:
+            self.tasks.insert(0, AnalysisTarget(analysis_task=self.analysis_task, target_col=self.target_col))
+            self.analysis_task = self.target_col = None
+        elif not self.tasks:
+            raise ParameterMissing("analysis_task")
         return self
@@ -0,0 +1,9 @@
+from typing import Any
+
+from pydantic import Field
+
+from .full_pipeline_params import FullPipelineParams
+
+
+class BatchPipelineParams(FullPipelineParams):
+    file_params: dict[str, dict[str, Any]] = Field(default_factory=dict)  # overrides of shared params by file name
@@ -0,0 +1,28 @@
+from importlib.util import find_spec
+
+from pydantic import BaseModel, constr, field_validator
+
+from app.errors import ParameterError
+
+NUMPY_ENGINE = "numpy"
+ARROW_ENGINE = "pyarrow"
+
+ENGINES: list[str] = [NUMPY_ENGINE]
+
+if find_spec("pyarrow") is not None:  # optional dependency
+    ENGINES.append(ARROW_ENGINE)
+
+
+class EngineParams(BaseModel):
+    engine: constr(to_lower=True) = NUMPY_ENGINE
+
+    @field_validator("engine")  # noqa
+    @classmethod
+    def validate_engine(cls, v: str) -> str:
+        if v not in ENGINES:
+            raise ParameterError("engine", v, ENGINES)
+        return v
+
+    @property
+    def arrow(self) -> bool:
+        return self.engine == ARROW_ENGINE
@@ -1,27 +1,32 @@
 from dataclasses import dataclass
+from importlib.util import find_spec
 
-import pandas as pd
-from pydantic import BaseModel, constr, field_validator
+from pydantic import constr, field_validator
 
 from app.errors import ParameterError
+from .slice_params import SliceParams
 
 
 @dataclass(frozen=True)
 class ExportFormat:
     mimetype: str
     ext: str
-    method: callable
+    compressible: bool = True   # not worth compressing formats which are compressed already
 
 
 EXPORT_FORMATS: dict[str, ExportFormat] = {
-    "csv": ExportFormat("text/csv", "csv", pd.DataFrame.to_csv),
-    "json": ExportFormat("application/json", "json", pd.DataFrame.to_json),
-    "excel": ExportFormat("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx", pd.DataFrame.to_excel),
-    "pickle": ExportFormat("application/octet-stream", "pkl", pd.DataFrame.to_pickle)
+    "csv": ExportFormat("text/csv", "csv"),
+    "json": ExportFormat("application/json", "json"),
+    "jsonl": ExportFormat("application/jsonl", "jsonl"),
+    "excel": ExportFormat("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx", False),
+    "pickle": ExportFormat("application/octet-stream", "pkl")
 }
 
+if find_spec("pyarrow") is not None:  # optional dependency
+    EXPORT_FORMATS["parquet"] = ExportFormat("application/vnd.apache.parquet", "parquet", False)
 
-class ExportParams(BaseModel):
+
+class ExportParams(SliceParams):
     format: constr(to_lower=True) = "csv"
 
     @field_validator("format")  # noqa
@@ -40,5 +45,5 @@ class ExportParams(BaseModel):
         return EXPORT_FORMATS[self.format].ext
 
     @property
-    def method(self) -> callable:
-        return EXPORT_FORMATS[self.format].method
+    def compressible(self) -> bool:
+        return EXPORT_FORMATS[self.format].compressible
@@ -1,9 +1,11 @@
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import Field
 
+from .engine_params import EngineParams
 
-class LoadingParams(BaseModel):
+
+class LoadingParams(EngineParams):
     separator: Optional[str] = ","
     thousands: Optional[str] = Field(None, min_length=1, max_length=1)
     decimal: Optional[str] = Field(".", min_length=1, max_length=1)
@@ -1,21 +1,24 @@
-from typing import Optional, Literal, Union, Type
+from typing import TYPE_CHECKING, Optional, Literal, Union
 
-from pydantic import BaseModel, PositiveInt, JsonValue, PositiveFloat, Field, field_validator, constr
-from sklearn.base import TransformerMixin
-from sklearn.preprocessing import MaxAbsScaler, MinMaxScaler, StandardScaler
+from pydantic import PositiveInt, JsonValue, PositiveFloat, Field, field_validator, constr
 
 from app.errors import ParameterError
+from app.lazy_import import import_module
+from .engine_params import EngineParams
 
-SCALER_CLASSES: dict[str, Type[TransformerMixin]] = {
-    "max_abs_scaling": MaxAbsScaler,
-    "min_max_scaling": MinMaxScaler,
-    "z_score": StandardScaler,
+if TYPE_CHECKING:
+    from sklearn.base import TransformerMixin
+
+SCALER_CLASSES: dict[str, str] = {  # names in sklearn.preprocessing, imported on first use
+    "max_abs_scaling": "MaxAbsScaler",
+    "min_max_scaling": "MinMaxScaler",
+    "z_score": "StandardScaler",
 }
 
 ColumnList = Union[str, list[str], Literal["*"]]
 
 
-class PreprocessingParams(BaseModel):
+class PreprocessingParams(EngineParams):
     make_copy: bool = False
     case_insensitive_columns: ColumnList = Field(default_factory=list)
     clear_punct_columns: ColumnList = Field(default_factory=list)
@@ -50,5 +53,6 @@ class PreprocessingParams(BaseModel):
         return v
 
     @property
-    def scaler(self) -> TransformerMixin:
-        return SCALER_CLASSES[self.scaling_method]()
+    def scaler(self) -> "TransformerMixin":
+        preprocessing = import_module("sklearn.preprocessing")
+        return getattr(preprocessing, SCALER_CLASSES[self.scaling_method])()
@@ -0,0 +1,46 @@
+import json
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field, NonNegativeInt, PositiveInt, field_validator
+
+from .preprocessing_params import ColumnList
+
+
+class SliceParams(BaseModel):
+    """
+    Columns and rows of a dataset: `limit` rows from `offset`, or with `sample` that many random rows drawn from
+    all rows from `offset` on. An explicitly given `limit` then only caps the number of sampled rows.
+    """
+    columns: ColumnList = "*"
+    offset: NonNegativeInt = 0
+    limit: Optional[PositiveInt] = None
+    sample: Optional[PositiveInt] = None    # random rows taken from offset to the end of the dataset
+
+    @field_validator("columns", mode="before")  # noqa
+    @classmethod
+    def stringify_columns(cls, v: Any) -> Any:
+        # query values are parsed as JSON, so a column named "1" arrives as a number
+        if isinstance(v, list):
+            return [c if isinstance(c, str) else json.dumps(c) for c in v]
+        return v if isinstance(v, str) else json.dumps(v)
+
+    @property
+    def column_names(self) -> list[str] | None:
+        if self.columns == "*":
+            return None
+        return [self.columns] if isinstance(self.columns, str) else self.columns
+
+    @property
+    def is_full(self) -> bool:
+        return self.column_names is None and self.offset == 0 and self.limit is None and self.sample is None
+
+    @property
+    def sample_size(self) -> int | None:
+        if self.sample is None:
+            return None
+        return min(self.sample, self.limit) if "limit" in self.model_fields_set else self.sample
+
+
+class PreviewParams(SliceParams):
+    limit: PositiveInt = Field(50, le=1000)    # default applies to windows only, not to samples
+    sample: Optional[PositiveInt] = Field(None, le=1000)
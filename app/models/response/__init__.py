@@ -1,6 +1,13 @@
 from .info_response import InfoResponse
 from .upload_response import UploadResponse
+from .append_response import AppendResponse
 from .metadata_response import MetadataResponse
 from .preprocessing_response import PreprocessingResponse
+from .analysis_response import AnalysisResponse
+from .report_job_response import ReportJobResponse
+from .preview_response import PreviewResponse
+from .batch_manifest import BatchManifest, BatchFileResult, BatchFileStatus
 
-__all__ = ['InfoResponse', 'UploadResponse', 'MetadataResponse', 'PreprocessingResponse']
+__all__ = ['InfoResponse', 'UploadResponse', 'MetadataResponse', 'PreprocessingResponse', 'AnalysisResponse',
+           'ReportJobResponse', 'PreviewResponse', 'BatchManifest', 'BatchFileResult', 'BatchFileStatus',
+           'AppendResponse']
@@ -0,0 +1,59 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.models.request.analysis_params import AnalysisTask
+
+
+class DatasetSummary(BaseModel):
+    rows: int
+    columns: int
+    numeric: int
+    categorical: int
+    boolean: int
+    datetime: int
+    string: int
+    duplicates: bool
+    missing_pct: float
+    column_types: dict[str, str]
+    missing_values: dict[str, int]
+
+
+class TargetDiagnostics(BaseModel):
+    column: str
+    suitable: bool                              # whether task-specific analysis could be performed
+    dtype: Optional[str] = None
+    missing: Optional[int] = None
+    missing_pct: Optional[float] = None
+    unique_values: Optional[int] = None
+    outliers: Optional[int] = None              # regression
+    imbalance_ratio: Optional[float] = None     # classification
+    rare_classes: Optional[dict[str, float]] = None
+    rows: Optional[int] = None                  # clusterization
+    numeric_columns: Optional[int] = None
+
+
+class FeatureGroup(BaseModel):
+    label: str
+    low: float
+    high: float
+    features: dict[str, float]
+
+
+class FeatureSelection(BaseModel):
+    metric: str
+    groups: list[FeatureGroup]
+    remaining: dict[str, float]
+
+
+class TaskAnalysis(BaseModel):
+    analysis_task: AnalysisTask
+    target_col: str
+    target: TargetDiagnostics
+    feature_selection: Optional[FeatureSelection] = None
+    feature_engineering: Optional[dict[str, list[str]]] = None
+
+
+class AnalysisResponse(BaseModel):
+    summary: Optional[DatasetSummary] = None
+    tasks: list[TaskAnalysis]
@@ -0,0 +1,5 @@
+from .info_response import InfoResponse
+
+
+class AppendResponse(InfoResponse):
+    appended_rows: int
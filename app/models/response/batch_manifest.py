@@ -0,0 +1,26 @@
+from enum import Enum
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field
+
+
+class BatchFileStatus(str, Enum):
+    DONE = "done"
+    FAILED = "failed"
+
+
+class BatchFileResult(BaseModel):
+    filename: str
+    status: BatchFileStatus
+    report: Optional[str] = None            # name of the PDF in the archive
+    error: Optional[dict[str, Any]] = None
+    seconds: float = 0.0
+    stages: dict[str, float] = Field(default_factory=dict)
+
+
+class BatchManifest(BaseModel):
+    files: list[BatchFileResult]
+    succeeded: int
+    failed: int
+    workers: int
+    seconds: float
@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic import BaseModel
 
 from .metadata_response import MetadataResponse
@@ -8,3 +10,4 @@ class InfoResponse(BaseModel):
     dataset_id: str
     next_step: str
     metadata: MetadataResponse
+    profile_status: Optional[Literal["ready", "pending", "unavailable"]] = None
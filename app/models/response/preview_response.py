@@ -0,0 +1,11 @@
+from pydantic import BaseModel, JsonValue
+
+
+class PreviewResponse(BaseModel):
+    dataset_id: str
+    num_rows: int                   # rows in the whole dataset
+    offset: int
+    columns: list[str]              # returned columns in the order of row values
+    dtypes: list[str]
+    index: list[JsonValue]
+    rows: list[list[JsonValue]]
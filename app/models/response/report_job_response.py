@@ -0,0 +1,27 @@
+from datetime import datetime
+from enum import Enum
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class ReportJobResponse(BaseModel):
+    job_id: str
+    dataset_id: str
+    status: JobStatus
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    queue_position: Optional[int] = None
+    cancel_requested: bool = False
+    error: Optional[dict[str, Any]] = None
+    status_url: str
+    result_url: Optional[str] = None
@@ -2,7 +2,8 @@ from flask import request, url_for, jsonify
 from flask_pydantic_spec import Response
 
 from app.controllers import DataFramePreprocessor, DataFrameAnalyzer
-from app.extensions import storage, spec
+from app.extensions import storage, spec, dataset_profiler, admission
+from app.extensions.admission import PREPROCESS_COPIES
 from app.models import PreprocessingParams, PreprocessingResponse, DatasetTokenHeader
 from app.preprocessing import bp
 
@@ -16,6 +17,7 @@ from app.preprocessing import bp
 )
 def preprocess_dataset(dataset_id: str) -> Response:
     params: PreprocessingParams = request.context.body  # noqa
+    admission.admit(admission.dataset_size(storage.get_dataset_layout(dataset_id)), PREPROCESS_COPIES)
     data = storage.get_dataset(dataset_id)
 
     preprocessor = DataFramePreprocessor(data)
@@ -29,7 +31,8 @@ def preprocess_dataset(dataset_id: str) -> Response:
         next_step=url_for("reporting.get_recommendations", dataset_id=dataset_id),
         metadata=DataFrameAnalyzer.get_metadata(data),
         new_dataset_id=new_dataset_id if params.make_copy else None,
-        new_dataset_access_key=new_access_key if params.make_copy else None
+        new_dataset_access_key=new_access_key if params.make_copy else None,
+        profile_status=dataset_profiler.status(storage.get_dataset_key(new_dataset_id, new_access_key))
     )
 
     return jsonify(response_data.dict(exclude_none=True))
@@ -1,11 +1,18 @@
-from flask import send_file, request
-from flask_pydantic_spec import FileResponse
+import hashlib
+from datetime import datetime, timezone
+from typing import Any, Iterator
+
+from flask import send_file, request, jsonify, url_for, Response, stream_with_context
+from flask_pydantic_spec import FileResponse, Response as SpecResponse
 
 from app.controllers import DataFrameAnalyzer
-from app.extensions import storage
+from app.extensions import storage, render_pool, plot_cache, report_cache, report_jobs, dataset_profiler, admission
+from app.extensions.admission import ANALYSIS_COPIES, REPORT_COPIES
 from app.reporting import bp
 from app.extensions import spec
-from app.models import AnalysisParams, DatasetTokenHeader
+from app.models import AnalysisParams, AnalysisResponse, ReportJobResponse, DatasetTokenHeader
+
+PROFILE_STATUS_HEADER = "X-Dataset-Profile"  # whether the dataset profile computed after upload was used
 
 
 @bp.route("/datasets/<dataset_id>/report")
@@ -17,7 +24,123 @@ from app.models import AnalysisParams, DatasetTokenHeader
 )
 def get_recommendations(dataset_id: str) -> FileResponse:
     params: AnalysisParams = request.context.query  # noqa
+    content_hash = storage.get_dataset_hash(dataset_id)
+    etag = f"{content_hash}-{hashlib.sha256(params.model_dump_json().encode()).hexdigest()[:32]}"
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    profile_status = None
+
+    def stream_report() -> Iterator[bytes]:
+        nonlocal profile_status
+        dataset_key = storage.get_dataset_key(dataset_id)
+        profile = dataset_profiler.load(dataset_key, content_hash)
+        profile_status = dataset_profiler.status(dataset_key, profile)
+        admission.admit(admission.dataset_size(storage.read_layout(dataset_key)), REPORT_COPIES)
+        data = storage.get_dataset(dataset_id)
+        analyzer = DataFrameAnalyzer(data, profile, params.engine)
+        report = analyzer.generate_report(params, render_pool.executor, plot_cache)
+        return report.stream()
+
+    pdf = report_cache.get_or_stream(etag, stream_report)
+    if isinstance(pdf, str):
+        return send_file(pdf, mimetype='application/pdf', as_attachment=False, download_name='report.pdf', etag=etag)
+
+    response = Response(stream_with_context(pdf), mimetype='application/pdf',
+                        headers={'Content-Disposition': 'inline; filename=report.pdf',
+                                 PROFILE_STATUS_HEADER: profile_status})
+    response.set_etag(etag)
+    return response
+
+
+@bp.route("/datasets/<dataset_id>/analysis")
+@spec.validate(
+    query=AnalysisParams,
+    headers=DatasetTokenHeader,
+    resp=SpecResponse(HTTP_200=AnalysisResponse),
+    tags=["Recommendations report"]
+)
+def get_analysis(dataset_id: str) -> Response:
+    params: AnalysisParams = request.context.query  # noqa
+    dataset_key = storage.get_dataset_key(dataset_id)
+    profile = dataset_profiler.load(dataset_key)
+    profile_status = dataset_profiler.status(dataset_key, profile)
+    admission.admit(admission.dataset_size(storage.read_layout(dataset_key)), ANALYSIS_COPIES)
     data = storage.get_dataset(dataset_id)
 
-    report = DataFrameAnalyzer(data).generate_report(params)
-    return send_file(report.to_bytes(), mimetype='application/pdf', as_attachment=False, download_name='report.pdf')
+    response = jsonify(DataFrameAnalyzer(data, profile, params.engine).analyze(params).dict())
+    response.headers[PROFILE_STATUS_HEADER] = profile_status
+    return response
+
+
+def _job_response(job: dict[str, Any]) -> ReportJobResponse:
+    def timestamp(value: float | None) -> datetime | None:
+        return datetime.fromtimestamp(value, timezone.utc) if value is not None else None
+
+    urls = {"dataset_id": job["dataset_id"], "job_id": job["id"]}
+    return ReportJobResponse(
+        job_id=job["id"],
+        dataset_id=job["dataset_id"],
+        status=job["status"],
+        created_at=timestamp(job["created_at"]),
+        started_at=timestamp(job["started_at"]),
+        finished_at=timestamp(job["finished_at"]),
+        queue_position=job.get("queue_position"),
+        cancel_requested=job["cancel_requested"],
+        error=job["error"],
+        status_url=url_for("reporting.get_report_job", **urls),
+        result_url=url_for("reporting.get_report_job_result", **urls) if job["status"] == "done" else None
+    )
+
+
+@bp.route("/datasets/<dataset_id>/report/jobs", methods=["POST"])
+@spec.validate(
+    query=AnalysisParams,
+    headers=DatasetTokenHeader,
+    resp=SpecResponse(HTTP_202=ReportJobResponse),
+    tags=["Report jobs"]
+)
+def create_report_job(dataset_id: str) -> Response:
+    params: AnalysisParams = request.context.query  # noqa
+    job = _job_response(report_jobs.submit(dataset_id, storage.get_dataset_key(dataset_id), params))
+
+    response = jsonify(job.model_dump(mode="json", exclude_none=True))
+    response.status_code = 202
+    response.headers["Location"] = job.status_url
+    return response
+
+
+@bp.route("/datasets/<dataset_id>/report/jobs/<job_id>")
+@spec.validate(
+    headers=DatasetTokenHeader,
+    resp=SpecResponse(HTTP_200=ReportJobResponse),
+    tags=["Report jobs"]
+)
+def get_report_job(dataset_id: str, job_id: str) -> Response:
+    job = _job_response(report_jobs.get(dataset_id, job_id))
+    return jsonify(job.model_dump(mode="json", exclude_none=True))
+
+
+@bp.route("/datasets/<dataset_id>/report/jobs/<job_id>", methods=["DELETE"])
+@spec.validate(
+    headers=DatasetTokenHeader,
+    resp=SpecResponse(HTTP_200=ReportJobResponse),
+    tags=["Report jobs"]
+)
+def cancel_report_job(dataset_id: str, job_id: str) -> Response:
+    job = _job_response(report_jobs.cancel(dataset_id, job_id))
+    return jsonify(job.model_dump(mode="json", exclude_none=True))
+
+
+@bp.route("/datasets/<dataset_id>/report/jobs/<job_id>/result")
+@spec.validate(
+    headers=DatasetTokenHeader,
+    resp=FileResponse(content_type='application/pdf'),
+    tags=["Report jobs"]
+)
+def get_report_job_result(dataset_id: str, job_id: str) -> FileResponse:
+    return send_file(report_jobs.get_result(dataset_id, job_id), mimetype='application/pdf', as_attachment=False,
+                     download_name='report.pdf')
@@ -1,10 +1,11 @@
-from flask import request, send_file, jsonify, Response
+from flask import request, jsonify, Response, stream_with_context, current_app
 from flask_pydantic_spec import FileResponse, MultipartFormRequest
 
-from app.controllers import DataFrameLoader, DataFramePreprocessor, DataFrameAnalyzer
-from app.extensions import spec
+from app.controllers import DataFrameLoader, DataFramePreprocessor, DataFrameAnalyzer, DataFrameBatch
+from app.extensions import spec, render_pool, batch_pool, plot_cache, report_cache, export_cache, metrics, admission
+from app.extensions.admission import REPORT_COPIES
 from app.system import bp
-from app.models import FullPipelineParams
+from app.models import FullPipelineParams, BatchPipelineParams
 from app.errors import ParameterMissing
 
 
@@ -18,6 +19,21 @@ def index() -> Response:
     })
 
 
+@bp.route("/stats")
+def stats() -> Response:
+    return jsonify({
+        "plot_cache": plot_cache.stats(),
+        "report_cache": report_cache.stats(),
+        "export_cache": export_cache.stats(),
+        "admission": admission.stats()
+    })
+
+
+@bp.route("/metrics")
+def prometheus_metrics() -> Response:
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
 @bp.route("/datasets/full_pipeline", methods=["POST"])
 @spec.validate(
     body=MultipartFormRequest(model=FullPipelineParams),
@@ -31,7 +47,32 @@ def analyze_data() -> FileResponse:
 
     params: FullPipelineParams = request.context.body  # noqa
 
+    admission.admit(admission.upload_size(file), REPORT_COPIES)
     data = DataFrameLoader(file, params).load_data()
     data = DataFramePreprocessor(data).preprocess(params)
-    report = DataFrameAnalyzer(data).generate_report(params)
-    return send_file(report.to_bytes(), mimetype='application/pdf', as_attachment=False, download_name='report.pdf')
+    report = DataFrameAnalyzer(data, engine=params.engine).generate_report(params, render_pool.executor, plot_cache)
+    return Response(stream_with_context(report.stream()), mimetype='application/pdf',
+                    headers={'Content-Disposition': 'inline; filename=report.pdf'})
+
+
+@bp.route("/datasets/full_pipeline/batch", methods=["POST"])
+@spec.validate(
+    body=MultipartFormRequest(model=BatchPipelineParams),
+    resp=FileResponse(content_type='application/zip'),
+    tags=["Full pipeline"]
+)
+def analyze_batch() -> FileResponse:
+    uploads = [file for file in request.files.getlist('file') if file.filename]
+    if not uploads:
+        raise ParameterMissing("file")
+
+    params: BatchPipelineParams = request.context.body  # noqa
+
+    config = current_app.config
+    batch = DataFrameBatch.from_uploads(uploads, params, config["BATCH_MAX_FILES"],
+                                        config["BATCH_MAX_MEMBER_MB"] * 1024 * 1024,
+                                        config["BATCH_MAX_EXPANDED_MB"] * 1024 * 1024, batch_pool)
+    sizes = sorted((admission.file_size(file.filename, file.size) for file in batch.files), reverse=True)
+    admission.admit(sum(sizes[:max(batch_pool.workers, 1)]), REPORT_COPIES)  # the largest files running at once
+    return Response(stream_with_context(batch.stream()), mimetype='application/zip',
+                    headers={'Content-Disposition': 'attachment; filename=reports.zip'})
@@ -0,0 +1,108 @@
+"""
+Synthetic datasets of typical shapes for benchmarks, generated reproducibly from a seed.
+"""
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+WORDS = np.array(["alpha", "Beta", "gamma!", "DELTA", "eps1lon", "zeta,", "eta", "Theta?", "iota", "kappa42"])
+
+
+@dataclass(frozen=True)
+class SyntheticDataset:
+    """
+    Dataset with the columns preprocessing steps and analysis tasks can be applied to.
+    """
+    data: pd.DataFrame
+    target: str
+    task: str
+    text_columns: list[str] = field(default_factory=list)
+    category_columns: list[str] = field(default_factory=list)
+    datetime_columns: list[str] = field(default_factory=list)
+
+
+def _numeric(rng: np.random.Generator, rows: int, columns: int) -> pd.DataFrame:
+    data = pd.DataFrame(rng.normal(size=(rows, columns)), columns=[f"x{i}" for i in range(columns)])
+    data.iloc[rng.integers(0, rows, rows // 100), 0] *= 50  # some outliers
+    return data
+
+
+def _text(rng: np.random.Generator, rows: int, words: int) -> pd.Series:
+    picks = WORDS[rng.integers(0, len(WORDS), (rows, words))]
+    return pd.Series([" ".join(row) for row in picks])
+
+
+def tall(rows: int, seed: int) -> SyntheticDataset:
+    rng = np.random.default_rng(seed)
+    data = _numeric(rng, rows, 8)
+    data["target"] = data["x1"] * 3 + data["x2"] * 2 + rng.normal(size=rows)
+    return SyntheticDataset(data, "target", "regression")
+
+
+def wide(rows: int, seed: int) -> SyntheticDataset:
+    rng = np.random.default_rng(seed)
+    rows = max(rows // 20, 50)
+    data = _numeric(rng, rows, 200)
+    data["target"] = data["x1"] - data["x2"] + rng.normal(size=rows)
+    return SyntheticDataset(data, "target", "regression")
+
+
+def text_heavy(rows: int, seed: int) -> SyntheticDataset:
+    rng = np.random.default_rng(seed)
+    data = _numeric(rng, rows, 2)
+    text_columns = [f"text{i}" for i in range(4)]
+    for column in text_columns:
+        data[column] = _text(rng, rows, 8)
+    data["label"] = rng.choice(["spam", "ham"], rows, p=[0.3, 0.7])
+    return SyntheticDataset(data, "label", "classification", text_columns=text_columns)
+
+
+def categorical_heavy(rows: int, seed: int) -> SyntheticDataset:
+    rng = np.random.default_rng(seed)
+    data = _numeric(rng, rows, 2)
+    category_columns = [f"cat{i}" for i in range(8)]
+    for i, column in enumerate(category_columns):
+        levels = 3 + i * 5
+        weights = rng.pareto(1.5, levels) + 0.01  # a few frequent and many rare levels
+        data[column] = rng.choice([f"{column}_{level}" for level in range(levels)], rows, p=weights / weights.sum())
+    data["segment"] = rng.choice(["a", "b", "c"], rows)
+    return SyntheticDataset(data, "segment", "classification", category_columns=category_columns)
+
+
+def datetime_strings(rows: int, seed: int) -> SyntheticDataset:
+    rng = np.random.default_rng(seed)
+    data = _numeric(rng, rows, 3)
+    start = np.datetime64("2020-01-01T00:00:00")
+    datetime_columns = ["created", "updated"]
+    for column in datetime_columns:
+        offsets = rng.integers(0, 4 * 365 * 24 * 3600, rows).astype("timedelta64[s]")
+        data[column] = pd.Series(start + offsets).dt.strftime("%Y-%m-%d %H:%M:%S")
+    data["day"] = pd.Series(start + rng.integers(0, 4 * 365, rows).astype("timedelta64[D]")).dt.strftime("%Y-%m-%d")
+    datetime_columns.append("day")
+    data["target"] = data["x0"] * 2 + rng.normal(size=rows)
+    return SyntheticDataset(data, "target", "regression", datetime_columns=datetime_columns)
+
+
+def missing_heavy(rows: int, seed: int) -> SyntheticDataset:
+    rng = np.random.default_rng(seed)
+    data = _numeric(rng, rows, 8)
+    data["city"] = rng.choice(["Kyiv", "Lviv", "Odesa", "Dnipro"], rows)
+    data["target"] = data["x1"] * 2 + rng.normal(size=rows)
+    holes = rng.random(data.shape) < 0.3
+    holes[:, -1] = False  # keep the target complete
+    data = data.mask(holes)
+    duplicates = rows // 20
+    data.iloc[-duplicates:] = data.iloc[:duplicates].to_numpy()
+    return SyntheticDataset(data, "target", "regression", category_columns=["city"])
+
+
+SHAPES: dict[str, Callable[[int, int], SyntheticDataset]] = {
+    "tall": tall,
+    "wide": wide,
+    "text": text_heavy,
+    "categorical": categorical_heavy,
+    "datetime": datetime_strings,
+    "missing": missing_heavy,
+}
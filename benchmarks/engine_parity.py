@@ -0,0 +1,146 @@
+"""
+Results and timings of the NumPy and Arrow engines on synthetic datasets of typical shapes.
+
+Every dataset is loaded from CSV, preprocessed by each step and analyzed with both engines; the engines must
+produce equal data (compared NumPy-backed), identical text exports of it and equal analysis results, up to
+floating point rounding. Any difference is reported and fails the run (exit code 1). Requires pyarrow.
+
+Usage: python -m benchmarks.engine_parity [--rows N] [--seed N] [--shapes SHAPE ...] [--steps STEP ...]
+"""
+import argparse
+import io
+import math
+import re
+import sys
+import time
+from collections.abc import Callable
+from typing import Any
+
+import pandas as pd
+from werkzeug.datastructures import FileStorage
+
+from app.controllers import DataFrameAnalyzer, DataFrameExporter, DataFrameLoader, DataFramePreprocessor
+from app.controllers.arrow_engine import to_numpy_backed
+from app.models import AnalysisParams, LoadingParams, PreprocessingParams
+from app.models.request.engine_params import ARROW_ENGINE, ENGINES, NUMPY_ENGINE
+from benchmarks.datasets import SHAPES, SyntheticDataset
+from benchmarks.pipeline import preprocessing_steps
+
+RELATIVE_TOLERANCE = 1e-9
+EXPORT_FORMATS = ("csv", "json", "jsonl")  # exports expected to be equal as text, the others keep the dtypes
+FLOAT_PATTERN = re.compile(rb"(-?\d+\.\d+(?:[eE][-+]?\d+)?)")
+
+
+def timed(func: Callable[[], Any]) -> tuple[Any, float]:
+    start = time.perf_counter()
+    value = func()
+    return value, time.perf_counter() - start
+
+
+def differences(expected: Any, actual: Any, path: str = "") -> list[str]:
+    """
+    Paths at which JSON-like values differ, floats compared with a relative tolerance.
+    """
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        if expected.keys() != actual.keys():
+            return [f"{path}: keys {sorted(expected)} != {sorted(actual)}"]
+        return [diff for key in expected for diff in differences(expected[key], actual[key], f"{path}.{key}")]
+    if isinstance(expected, list) and isinstance(actual, list) and len(expected) == len(actual):
+        return [diff for i, (e, a) in enumerate(zip(expected, actual)) for diff in differences(e, a, f"{path}[{i}]")]
+    if isinstance(expected, float) and isinstance(actual, float):
+        equal = math.isclose(expected, actual, rel_tol=RELATIVE_TOLERANCE) or (math.isnan(expected)
+                                                                                and math.isnan(actual))
+        return [] if equal else [f"{path}: {expected!r} != {actual!r}"]
+    return [] if expected == actual else [f"{path}: {expected!r} != {actual!r}"]
+
+
+def frame_difference(expected: pd.DataFrame, actual: pd.DataFrame) -> str | None:
+    try:
+        pd.testing.assert_frame_equal(expected, to_numpy_backed(actual), rtol=RELATIVE_TOLERANCE)
+    except AssertionError as e:
+        return str(e).strip().splitlines()[0]
+    return None
+
+
+def export(data: pd.DataFrame, export_format: str) -> bytes:
+    try:
+        return b"".join(DataFrameExporter(data).stream(export_format))
+    except ValueError as e:  # both engines must fail alike
+        return repr(e).encode()
+
+
+def export_differences(expected: pd.DataFrame, actual: pd.DataFrame) -> list[str]:
+    """
+    Text exports compared token by token, decimals with the relative tolerance: the Arrow CSV reader parses
+    floats correctly rounded, the default pandas one is sometimes a unit in the last place off.
+    """
+    found = []
+    for export_format in EXPORT_FORMATS:
+        expected_tokens = FLOAT_PATTERN.split(export(expected, export_format))
+        actual_tokens = FLOAT_PATTERN.split(export(actual, export_format))
+        if len(expected_tokens) != len(actual_tokens):
+            found.append(f"{export_format} export: {len(expected_tokens)} != {len(actual_tokens)} tokens")
+            continue
+        for i, (e, a) in enumerate(zip(expected_tokens, actual_tokens)):
+            equal = math.isclose(float(e), float(a), rel_tol=RELATIVE_TOLERANCE) if i % 2 else e == a
+            if not equal:
+                found.append(f"{export_format} export: {e[-40:]!r} != {a[-40:]!r}")
+                break
+    return found
+
+
+def run_engine(dataset: SyntheticDataset, csv: bytes, engine: str,
+               steps: dict[str, dict[str, Any]]) -> dict[str, tuple[Any, float]]:
+    """
+    Loaded data, data preprocessed by each step and analysis results of the engine, with their timings.
+    """
+    file = FileStorage(io.BytesIO(csv), filename="data.csv")
+    loaded = timed(lambda: DataFrameLoader(file, LoadingParams(engine=engine)).load_data())
+    results = {"load": loaded}
+    for step, params in steps.items():
+        preprocessing = PreprocessingParams(**params, engine=engine)
+        results[f"preprocess.{step}"] = timed(lambda: DataFramePreprocessor(loaded[0].copy()).preprocess(preprocessing))
+    analysis = AnalysisParams(analysis_task=dataset.task, target_col=dataset.target, engine=engine)
+    results["analyze"] = timed(lambda: DataFrameAnalyzer(loaded[0], engine=engine).analyze(analysis)
+                               .model_dump(mode="json"))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--shapes", nargs="+", choices=list(SHAPES), default=list(SHAPES))
+    parser.add_argument("--steps", nargs="+", default=[], help="only these preprocessing steps")
+    args = parser.parse_args()
+    if ARROW_ENGINE not in ENGINES:
+        parser.error("the Arrow engine requires pyarrow")
+
+    mismatches = []
+    print(f"{'stage':<48}{'numpy, ms':>12}{'pyarrow, ms':>14}{'parity':>10}")
+    for shape in args.shapes:
+        dataset = SHAPES[shape](args.rows, args.seed)
+        csv = dataset.data.to_csv(index=False).encode()
+        steps = {step: params for step, params in preprocessing_steps(dataset).items()
+                 if not args.steps or step in args.steps}
+        expected = run_engine(dataset, csv, NUMPY_ENGINE, steps)
+        actual = run_engine(dataset, csv, ARROW_ENGINE, steps)
+        for stage, (value, seconds) in expected.items():
+            arrow_value, arrow_seconds = actual[stage]
+            if isinstance(value, pd.DataFrame):
+                found = frame_difference(value, arrow_value)
+                found = ([found] if found else []) + export_differences(value, arrow_value)
+            else:
+                found = differences(value, arrow_value)
+            name = f"{shape}/{stage}"
+            mismatches += [f"{name}: {diff}" for diff in found]
+            print(f"{name:<48}{seconds * 1000:>12.1f}{arrow_seconds * 1000:>14.1f}{'FAIL' if found else 'ok':>10}")
+
+    print(f"\n{len(mismatches)} mismatch(es)")
+    for mismatch in mismatches:
+        print(f"  {mismatch}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+PDF size versus render time for each report image format.
+
+Usage: python -m benchmarks.image_encoding [--rows N] [--dpi DPI] [--repeat N]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.controllers import DataFrameAnalyzer
+from app.models import AnalysisParams
+from app.models.request.analysis_params import ImageFormat
+
+
+def make_dataset(rows: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({f"x{i}": rng.normal(size=rows) for i in range(6)})
+    data["target"] = data["x0"] * 3 + data["x1"] * 2 + data["x2"] + rng.normal(size=rows)
+    return data
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--dpi", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = make_dataset(args.rows)
+    print(f"{'format':<8}{'size, KB':>12}{'time, s':>12}")
+    for image_format in ImageFormat:
+        params = AnalysisParams(analysis_task="regression", target_col="target", dpi=args.dpi,
+                                image_format=image_format)
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            pdf = DataFrameAnalyzer(data.copy()).generate_report(params).to_bytes()
+            timings.append(time.perf_counter() - start)
+        print(f"{image_format.value:<8}{len(pdf.getvalue()) / 1024:>12.1f}{min(timings):>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Time and peak memory of every pipeline stage and preprocessing step on synthetic datasets of typical shapes.
+
+Results are written to JSON and can be compared with a baseline written earlier the same way: a stage slower
+or taking more memory than the baseline by more than the threshold is a regression (exit code 1).
+
+Usage: python -m benchmarks.pipeline [--rows N] [--seed N] [--repeat N] [--shapes SHAPE ...] [--stages PREFIX ...]
+                                     [--engine ENGINE] [--output FILE] [--baseline FILE] [--threshold FRACTION]
+"""
+import argparse
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any
+
+import pandas as pd
+from werkzeug.datastructures import FileStorage
+
+from app.controllers import DataFrameAnalyzer, DataFrameLoader, DataFramePreprocessor
+from app.controllers.arrow_engine import to_arrow_backed
+from app.models import AnalysisParams, LoadingParams, PreprocessingParams
+from app.models.request.engine_params import ARROW_ENGINE, ENGINES, NUMPY_ENGINE
+from benchmarks.datasets import SHAPES, SyntheticDataset
+
+Stage = tuple[Callable[[], Any], Callable[[Any], Any]]  # setup (not measured), run (measured with setup result)
+NOISE = {"seconds": 0.005, "peak_mb": 1.0}  # smaller differences are never reported as regressions
+
+
+def preprocessing_steps(dataset: SyntheticDataset) -> dict[str, dict[str, Any]]:
+    """
+    Parameters enabling each preprocessing step that applies to the dataset, by step name.
+    """
+    steps = {
+        "select_rows": {"row_range_step": 2},
+        "set_index": {"index_cols": [dataset.data.columns[0]]},
+        "fill_missing_values": {"fill_na_values": 0},
+        "fill_missing_with_median_mode": {"mfill": True},
+        "forward_fill": {"ffill": True},
+        "backward_fill": {"bfill": True},
+        "drop_na": {"drop_na": "rows"},
+        "drop_outliers": {"drop_outliers": True},
+        "drop_duplicates": {"drop_duplicates": True},
+        "scale_numeric": {"scale_numeric": True},
+    }
+    if dataset.text_columns:
+        steps["lowercase_columns"] = {"case_insensitive_columns": dataset.text_columns}
+        steps["remove_punctuation"] = {"clear_punct_columns": dataset.text_columns}
+        steps["remove_digits"] = {"clear_digits_columns": dataset.text_columns}
+    if dataset.datetime_columns:
+        steps["convert_datetime"] = {"datetime_columns": dataset.datetime_columns}
+    if dataset.category_columns:
+        steps["convert_category"] = {"category_columns": dataset.category_columns}
+        steps["combine_rare"] = {"category_columns": dataset.category_columns, "join_small_cat": True}
+    return steps
+
+
+def pipeline_stages(dataset: SyntheticDataset, engine: str = NUMPY_ENGINE) -> dict[str, Stage]:
+    """
+    Stages run with the engine; with the Arrow engine later stages start from Arrow-backed data, as loaded.
+    """
+    csv = dataset.data.to_csv(index=False).encode()
+    analysis = AnalysisParams(analysis_task=dataset.task, target_col=dataset.target, show_time=False, engine=engine)
+    source = to_arrow_backed(dataset.data) if engine == ARROW_ENGINE else dataset.data
+
+    def copy() -> pd.DataFrame:
+        return source.copy()
+
+    stages: dict[str, Stage] = {
+        "load": (lambda: FileStorage(io.BytesIO(csv), filename="data.csv"),
+                 lambda file: DataFrameLoader(file, LoadingParams(engine=engine)).load_data()),
+    }
+    for step, params in preprocessing_steps(dataset).items():
+        stages[f"preprocess.{step}"] = (copy, lambda data, p=PreprocessingParams(**params, engine=engine):
+                                        DataFramePreprocessor(data).preprocess(p))
+    stages["analyze"] = (copy, lambda data: DataFrameAnalyzer(data, engine=engine).analyze(analysis))
+    stages["report.generate"] = (copy, lambda data: DataFrameAnalyzer(data, engine=engine).generate_report(analysis))
+    stages["report.to_bytes"] = (lambda: DataFrameAnalyzer(copy(), engine=engine).generate_report(analysis),
+                                 lambda report: report.to_bytes())
+    return stages
+
+
+def measure(setup: Callable[[], Any], run: Callable[[Any], Any], repeat: int) -> dict[str, float]:
+    """
+    Minimum and median time over `repeat` runs, and peak memory allocated by one more run (which also serves as
+    warm-up, tracing slows it down).
+    """
+    arg = setup()
+    tracemalloc.start()
+    try:
+        run(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings = []
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        run(arg)
+        timings.append(time.perf_counter() - start)
+    return {"seconds": min(timings), "median_seconds": statistics.median(timings), "peak_mb": peak / 1024 / 1024}
+
+
+def environment() -> dict[str, str]:
+    packages = ("numpy", "pandas", "scikit-learn", "matplotlib", "seaborn", "fpdf2")
+    try:
+        optional = {"pyarrow": version("pyarrow")}
+    except PackageNotFoundError:
+        optional = {}
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            **{package: version(package) for package in packages}, **optional}
+
+
+def compare(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]],
+            threshold: float) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric in ("seconds", "peak_mb"):
+            if result[metric] > base[metric] * (1 + threshold) and result[metric] - base[metric] > NOISE[metric]:
+                regressions.append(f"{name}: {metric} {base[metric]:.4g} -> {result[metric]:.4g} "
+                                   f"(+{(result[metric] / base[metric] - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--shapes", nargs="+", choices=list(SHAPES), default=list(SHAPES))
+    parser.add_argument("--stages", nargs="+", default=[], help="only stages starting with one of the prefixes")
+    parser.add_argument("--engine", choices=ENGINES, default=NUMPY_ENGINE)
+    parser.add_argument("--output", help="JSON file to write results to")
+    parser.add_argument("--baseline", help="JSON results to compare with")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown / memory growth fraction")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if (baseline["rows"], baseline["seed"]) != (args.rows, args.seed):
+            parser.error(f"baseline was recorded with --rows {baseline['rows']} --seed {baseline['seed']}")
+        if baseline.get("engine", NUMPY_ENGINE) != args.engine:
+            parser.error(f"baseline was recorded with --engine {baseline.get('engine', NUMPY_ENGINE)}")
+
+    results = {}
+    print(f"{'stage':<52}{'time, ms':>12}{'peak, MB':>12}{'vs baseline':>14}")
+    for shape in args.shapes:
+        dataset = SHAPES[shape](args.rows, args.seed)
+        for stage, (setup, run) in pipeline_stages(dataset, args.engine).items():
+            if args.stages and not stage.startswith(tuple(args.stages)):
+                continue
+            name = f"{shape}/{stage}"
+            results[name] = measure(setup, run, args.repeat)
+            base = baseline["results"].get(name) if baseline else None
+            change = f"{(results[name]['seconds'] / base['seconds'] - 1) * 100:>+13.0f}%" if base else ""
+            print(f"{name:<52}{results[name]['seconds'] * 1000:>12.1f}{results[name]['peak_mb']:>12.1f}{change}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"rows": args.rows, "seed": args.seed, "repeat": args.repeat, "engine": args.engine,
+                       "environment": environment(), "results": results}, f, indent=2)
+    if baseline:
+        regressions = compare(results, baseline["results"], args.threshold)
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
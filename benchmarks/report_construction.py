@@ -0,0 +1,45 @@
+"""
+DataFrameReport construction latency with process-wide font templates versus parsing fonts per report.
+
+Usage: python -m benchmarks.report_construction [--repeat N]
+"""
+import argparse
+import time
+
+from fpdf import FPDF  # noqa
+
+from app.controllers.dataframe_report import DataFrameReport, REPORT_FONTS
+
+
+class UncachedReport(DataFrameReport):
+    """
+    Report setup as it was before font templates: every instance parses the TTF files again.
+    """
+
+    def _add_cached_font(self, family: str, style: str, fname: str) -> None:
+        FPDF.add_font(self, family, style=style, fname=fname)
+
+
+def measure(factory: type[DataFrameReport], repeat: int) -> float:
+    factory()  # warm-up (imports, process-wide caches)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        factory()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"Fonts per report: {len(REPORT_FONTS)}")
+    before = measure(UncachedReport, args.repeat)
+    after = measure(DataFrameReport, args.repeat)
+    print(f"{'parsed per report':<24}{before:>10.2f} ms")
+    print(f"{'process-wide templates':<24}{after:>10.2f} ms")
+    print(f"{'speedup':<24}{before / after:>10.1f} x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Cold start of the app: import and app creation time, a CLI command run in a new process, and latency of the first
+and second full pipeline request - without and with the warm-up done by WARM_START. Every scenario runs in fresh
+processes, peak memory is the resident set size of the process after each step.
+
+Results can be compared with a baseline the same way as in benchmarks.pipeline.
+
+Usage: python -m benchmarks.startup [--repeat N] [--rows N] [--scenarios SCENARIO ...] [--output FILE]
+                                    [--baseline FILE] [--threshold FRACTION]
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SCENARIOS = ("cold", "warm", "cli")
+
+
+def _peak_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # kilobytes on Linux
+
+
+def run_scenario(scenario: str, rows: int) -> dict[str, dict[str, float]]:
+    """
+    Steps of a scenario run in this (fresh) process.
+    """
+    results = {}
+
+    def step(name: str, func, *args):
+        start = time.perf_counter()
+        value = func(*args)
+        results[name] = {"seconds": time.perf_counter() - start, "peak_mb": _peak_mb()}
+        return value
+
+    def create_app():
+        from app import create_app
+        from config import Config
+
+        storage = tempfile.mkdtemp()
+
+        class BenchmarkConfig(Config):
+            DATASET_STORAGE = os.path.join(storage, "datasets")
+            PLOT_CACHE = os.path.join(storage, "plot_cache")
+            REPORT_CACHE = os.path.join(storage, "report_cache")
+            EXPORT_CACHE = os.path.join(storage, "export_cache")
+            REPORT_JOBS = os.path.join(storage, "report_jobs")
+            REQUEST_PROFILES = os.path.join(storage, "profiles")
+            REPORT_RENDER_WORKERS = 1  # a render pool would start its processes on the first request
+            REPORT_JOB_WORKERS = 0
+            DATASET_PROFILING_WORKERS = 0
+            WARM_START = scenario == "warm"
+
+        return create_app(BenchmarkConfig)
+
+    step("import", __import__, "app")
+    app = step("create_app", create_app)
+    if scenario == "cli":
+        result = step("cleanup", app.test_cli_runner().invoke, None, ["cleanup"])
+        assert result.exit_code == 0, result.output
+        return results
+
+    from benchmarks.datasets import tall
+
+    client = app.test_client()
+
+    def full_pipeline(seed: int):
+        import io
+
+        csv = tall(rows, seed).data.to_csv(index=False).encode()  # new data for each request, so caches miss
+        response = client.post("/datasets/full_pipeline", content_type="multipart/form-data", data={
+            "file": (io.BytesIO(csv), "data.csv"), "analysis_task": "regression", "target_col": "target"})
+        assert response.status_code == 200, response.get_data(as_text=True)
+        response.close()
+
+    step("first_request", full_pipeline, 1)
+    step("second_request", full_pipeline, 2)
+    return results
+
+
+def measure(scenario: str, rows: int, repeat: int) -> dict[str, dict[str, float]]:
+    """
+    Minimum and median of every step over `repeat` processes. The whole process time (interpreter start included)
+    is reported as the `process` step.
+    """
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, "-m", "benchmarks.startup", "--child", scenario, "--rows", str(rows)],
+                                check=True, capture_output=True, text=True).stdout
+        run = json.loads(output.strip().splitlines()[-1])
+        run["process"] = {"seconds": time.perf_counter() - start, "peak_mb": max(r["peak_mb"] for r in run.values())}
+        runs.append(run)
+
+    return {step: {"seconds": min(run[step]["seconds"] for run in runs),
+                   "median_seconds": statistics.median(run[step]["seconds"] for run in runs),
+                   "peak_mb": max(run[step]["peak_mb"] for run in runs)}
+            for step in runs[0]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--output", help="JSON file to write results to")
+    parser.add_argument("--baseline", help="JSON results to compare with")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown / memory growth fraction")
+    parser.add_argument("--child", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scenario(args.child, args.rows)))
+        return
+
+    from benchmarks.pipeline import compare, environment
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    print(f"{'step':<32}{'time, ms':>12}{'peak, MB':>12}{'vs baseline':>14}")
+    for scenario in args.scenarios:
+        for step, result in measure(scenario, args.rows, args.repeat).items():
+            name = f"{scenario}/{step}"
+            results[name] = result
+            base = baseline["results"].get(name) if baseline else None
+            change = f"{(result['seconds'] / base['seconds'] - 1) * 100:>+13.0f}%" if base else ""
+            print(f"{name:<32}{result['seconds'] * 1000:>12.1f}{result['peak_mb']:>12.1f}{change}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"rows": args.rows, "repeat": args.repeat, "environment": environment(), "results": results},
+                      f, indent=2)
+    if baseline:
+        regressions = compare(results, baseline["results"], args.threshold)
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
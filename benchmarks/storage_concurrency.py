@@ -0,0 +1,111 @@
+"""
+Concurrent dataset overwrites and reads from separate processes, checking that no read returns a partial dataset.
+
+Every version of the dataset holds a single value in all of its cells, so a read mixing blocks of two versions,
+a read failing halfway and a dataset of the wrong shape are all detected.
+
+Usage: python -m benchmarks.storage_concurrency [--backend local|sqlite] [--seconds S] [--readers N] [--writers N]
+                                               [--without-locks]
+"""
+import argparse
+import multiprocessing
+import tempfile
+import time
+from contextlib import nullcontext
+
+import numpy as np
+import pandas as pd
+
+ROWS, COLUMNS, CHUNK_ROWS = 20_000, 8, 2_000  # 10 row chunks per column
+DATASET_ID, ACCESS_KEY = "stress", "stress-key"
+
+
+def make_config(backend: str, location: str) -> type:
+    from config import Config
+
+    class StressConfig(Config):
+        DATASET_BACKEND = backend
+        DATASET_STORAGE = location
+        DATASET_CHUNK_ROWS = CHUNK_ROWS
+        EXPORT_CACHE = REPORT_CACHE = PLOT_CACHE = tempfile.mkdtemp()
+        DATASET_PROFILING_WORKERS = 0
+        REPORT_RENDER_WORKERS = 1
+
+    return StressConfig
+
+
+def version(value: int) -> pd.DataFrame:
+    return pd.DataFrame(np.full((ROWS, COLUMNS), value), columns=[f"c{i}" for i in range(COLUMNS)])
+
+
+def run(role: str, backend: str, location: str, seconds: float, without_locks: bool,
+        results: multiprocessing.Queue) -> None:
+    from app import create_app
+    from app.extensions import storage
+    from app.extensions.storage_backends import StorageBackend
+
+    if without_locks:
+        StorageBackend.lock = lambda *args, **kwargs: nullcontext()
+    app = create_app(make_config(backend, location))
+    done, partial, failed = 0, 0, 0
+    deadline = time.monotonic() + seconds
+    with app.test_request_context(headers={app.config["ACCESS_KEY_HEADER"]: ACCESS_KEY}):
+        while time.monotonic() < deadline:
+            if role == "writer":
+                storage.save_dataset(version(done % 2 + 1), DATASET_ID)
+            else:
+                try:
+                    data = storage.get_dataset(DATASET_ID)
+                except Exception:  # noqa - a block released under the reader, a truncated file etc.
+                    failed += 1
+                    continue
+                values = np.unique(data.to_numpy())
+                if data.shape != (ROWS, COLUMNS) or len(values) != 1:
+                    partial += 1
+            done += 1
+    results.put((role, done, partial, failed))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backend", choices=["local", "sqlite"], default="local")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--without-locks", action="store_true", help="disable dataset locks to see what they prevent")
+    args = parser.parse_args()
+
+    from app import create_app
+    from app.extensions import storage
+
+    location = tempfile.mkdtemp()
+    app = create_app(make_config(args.backend, location))
+    with app.test_request_context(headers={app.config["ACCESS_KEY_HEADER"]: ACCESS_KEY}):
+        storage.save_dataset(version(1), DATASET_ID)
+
+    context = multiprocessing.get_context("spawn")  # like separate server workers, nothing shared but the storage
+    results = context.Queue()
+    roles = ["writer"] * args.writers + ["reader"] * args.readers
+    processes = [context.Process(target=run, args=(role, args.backend, location, args.seconds, args.without_locks,
+                                                   results)) for role in roles]
+    for process in processes:
+        process.start()
+    totals = {"writer": [0, 0, 0], "reader": [0, 0, 0]}
+    for _ in processes:
+        role, *counts = results.get()
+        totals[role] = [total + count for total, count in zip(totals[role], counts)]
+    for process in processes:
+        process.join()
+
+    writes, reads, (_, partial, failed) = totals["writer"][0], totals["reader"][0], totals["reader"]
+    print(f"Backend: {args.backend}{' without locks' if args.without_locks else ''}, {args.writers} writer(s), "
+          f"{args.readers} reader(s), {args.seconds:g} s")
+    print(f"{'overwrites':<16}{writes:>8}{writes / args.seconds:>10.1f} /s")
+    print(f"{'reads':<16}{reads:>8}{reads / args.seconds:>10.1f} /s")
+    print(f"{'partial reads':<16}{partial:>8}")
+    print(f"{'failed reads':<16}{failed:>8}")
+    raise SystemExit(1 if partial or failed else 0)
+
+
+if __name__ == "__main__":
+    main()
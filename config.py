@@ -10,5 +10,32 @@ class Config:
     ACCESS_KEY_HEADER = "X-Dataset-Token"                   # Name of request header for passing dataset access token
     STORAGE_CLEANUP_INTERVAL_HOURS = 12                     # Dataset storage cleanup frequency in hours
     DATASET_STORAGE = os.path.join(basedir, "datasets")     # Path to dataset storage
+    DATASET_STORAGE_MAX_MB = 10240                          # Maximum size of stored datasets in MB (LRU eviction)
+    DATASET_BACKEND = "local"                               # Dataset storage backend ("local" - files, "sqlite" - one database)
+    DATASET_CHUNK_ROWS = 50_000                             # Rows per separately readable block of a stored dataset
+    PLOT_CACHE = os.path.join(basedir, "plot_cache")        # Path to rendered report figures cache
+    PLOT_CACHE_MAX_MB = 512                                 # Maximum size of rendered figures cache in MB
+    REPORT_CACHE = os.path.join(basedir, "report_cache")    # Path to generated PDF reports cache
+    REPORT_CACHE_MAX_MB = 512                               # Maximum size of PDF reports cache in MB
+    EXPORT_CACHE = os.path.join(basedir, "export_cache")    # Path to exported dataset files cache
+    EXPORT_CACHE_MAX_MB = 1024                              # Maximum size of exported dataset files cache in MB
+    REPORT_RENDER_WORKERS = os.cpu_count() or 1             # Processes rendering report figures (1 - render in-request)
+    REPORT_JOBS = os.path.join(basedir, "report_jobs")      # Path to report jobs queue database and finished reports
+    REPORT_JOB_WORKERS = 2                                  # Processes running report jobs (0 - run `flask report-workers`)
+    REPORT_JOB_QUEUE_LIMIT = 32                             # Maximum number of queued and running report jobs
+    REPORT_JOB_TIMEOUT_SECONDS = 600                        # Maximum running time of a report job in seconds
+    BATCH_WORKERS = 2                                       # Processes running files of batch requests (1 - in-request)
+    BATCH_MAX_FILES = 100                                   # Maximum number of files in a batch request (archives expanded)
+    BATCH_MAX_MEMBER_MB = 100                               # Maximum extracted size of a file from a batch archive in MB
+    BATCH_MAX_EXPANDED_MB = 1024                            # Maximum size of all files of a batch request in MB (archives expanded)
+    DATASET_PROFILING_WORKERS = 2                           # Threads profiling saved datasets in background (0 - disabled)
+    DATASET_PROFILING_QUEUE_LIMIT = 16                      # Maximum number of datasets waiting to be profiled
+    MEMORY_BUDGET_MB = 4096                                 # Memory reserved by heavy requests of a worker process in MB (0 - unlimited)
+    MEMORY_ADMISSION_WAIT_SECONDS = 30                      # Maximum time a request waits for memory before 503 in seconds
+    PROFILING_TOKEN = os.getenv("PROFILING_TOKEN")          # Header value that enables request profiling (unset - disabled)
+    PROFILING_HEADER = "X-Profile-Token"                    # Name of request header for profiling a request
+    REQUEST_PROFILES = os.path.join(basedir, "profiles")    # Path to captured request profiles
+    WARM_START = os.getenv("WARM_START") == "1"             # Preload libraries and fonts on app creation (prefork servers)
+    SERVER_TIMING_HEADER = True                             # Report durations of processing stages in Server-Timing header
     ENV = os.getenv("ENV", "dev")                           # Environment (suggested "dev" and "prod")
     DEBUG = ENV != "prod"                                   # Debug mode for non-production environments
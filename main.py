@@ -3,7 +3,7 @@ import threading
 import time
 
 from app import create_app
-from app.extensions import storage
+from app.extensions import storage, report_jobs
 
 app = create_app()
 
@@ -12,6 +12,7 @@ def interval_cleanup():
     while True:
         with app.app_context():
             storage.cleanup()
+            report_jobs.cleanup()
         time.sleep(app.config["STORAGE_CLEANUP_INTERVAL_HOURS"] * 3600)
 
 
@@ -0,0 +1,18 @@
+import pytest
+
+from app import create_app
+from config import Config
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """
+    Factory of apps storing everything under a temporary directory, with background workers disabled.
+    """
+    def make(**config):
+        settings = {name: str(tmp_path / name.lower()) for name in
+                    ("DATASET_STORAGE", "PLOT_CACHE", "REPORT_CACHE", "EXPORT_CACHE", "REPORT_JOBS", "REQUEST_PROFILES")}
+        settings.update(REPORT_RENDER_WORKERS=1, REPORT_JOB_WORKERS=0, BATCH_WORKERS=1, DATASET_PROFILING_WORKERS=0,
+                        **config)
+        return create_app(type("TestConfig", (Config,), settings))
+    return make
@@ -0,0 +1,70 @@
+import io
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+import pytest
+
+from app.errors import MemoryBudgetExceeded
+from app.extensions import admission
+
+CSV = b"a,b\n" + b"1,2\n" * 1000
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(MEMORY_BUDGET_MB=64, MEMORY_ADMISSION_WAIT_SECONDS=0)
+
+
+@pytest.fixture
+def dataset(app):
+    with app.test_client().post("/datasets", data={"file": (io.BytesIO(CSV), "data.csv")},
+                                content_type="multipart/form-data") as response:
+        return response.json["dataset_id"], {app.config["ACCESS_KEY_HEADER"]: response.json["access_key"]}
+
+
+@contextmanager
+def reserved(app, dataset_bytes: int) -> Iterator[None]:
+    """
+    Reservation held by a request of another thread while the block runs.
+    """
+    admitted, done = threading.Event(), threading.Event()
+
+    def hold() -> None:
+        with app.test_request_context():
+            admission.admit(dataset_bytes, 1)
+            admitted.set()
+            done.wait()
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    admitted.wait()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def test_request_over_remaining_budget_is_rejected(app):
+    with reserved(app, 20 * 1024 * 1024), app.test_request_context():
+        with pytest.raises(MemoryBudgetExceeded):
+            admission.admit(20 * 1024 * 1024, 1)
+    with app.test_request_context():
+        admission.admit(20 * 1024 * 1024, 1)  # fits once the first request finished
+
+
+def test_request_over_whole_budget_runs_alone(app):
+    with app.test_request_context():
+        admission.admit(1024 * 1024 * 1024, 1)
+        assert admission.stats()["running"] == 1
+
+
+@pytest.mark.parametrize("query", ["", "?limit=10", "?sample=10"])
+def test_downloads_are_admitted(app, dataset, query):
+    dataset_id, headers = dataset
+    with reserved(app, 20 * 1024 * 1024):
+        with app.test_client().get(f"/datasets/{dataset_id}/download{query}", headers=headers) as response:
+            assert response.status_code == 503
+    with app.test_client().get(f"/datasets/{dataset_id}/download{query}", headers=headers) as response:
+        assert response.status_code == 200 and response.data.startswith(b",a,b")
@@ -0,0 +1,47 @@
+import io
+import zipfile
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from app.controllers import DataFrameBatch
+from app.errors import ParameterError, ReadingError
+from app.models import BatchPipelineParams
+
+CSV = b"a,b\n1,2\n3,4\n" * 100
+
+
+def archive(members: dict[str, bytes]) -> FileStorage:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as z:
+        for name, content in members.items():
+            z.writestr(name, content)
+    buffer.seek(0)
+    return FileStorage(buffer, filename="data.zip")
+
+
+def from_uploads(uploads: list[FileStorage], max_member_size: int, max_expanded_size: int = 10 ** 9) -> DataFrameBatch:
+    params = BatchPipelineParams(analysis_task="classification", target_col="b")
+    return DataFrameBatch.from_uploads(uploads, params, 10, max_member_size, max_expanded_size, None)
+
+
+def test_member_declared_too_large_fails_alone():
+    batch = from_uploads([archive({"small.csv": CSV[:100], "large.csv": CSV})], max_member_size=1000)
+    small, large = batch.files
+    assert small.error is None and small.read() == CSV[:100]
+    assert isinstance(large.error, ReadingError) and large.size == 0
+
+
+def test_batch_expanded_too_large_is_rejected():
+    with pytest.raises(ParameterError):
+        from_uploads([archive({"one.csv": CSV, "two.csv": CSV})], max_member_size=len(CSV),
+                     max_expanded_size=len(CSV) * 2 - 1)
+
+
+@pytest.mark.parametrize("declared_size", [10, len(CSV)])
+def test_member_read_is_capped(declared_size):
+    z = zipfile.ZipFile(archive({"large.csv": CSV}).stream)
+    info = z.getinfo("large.csv")
+    info.file_size = declared_size  # archives may lie about the size of their members
+    with pytest.raises(ReadingError):
+        DataFrameBatch._member_reader(z, info, 100)()
@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from app.controllers import DataFrameExporter
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(DataFrameExporter, "CHUNK_ROWS", 3)
+
+
+def streamed_csv(data: pd.DataFrame) -> str:
+    return b"".join(DataFrameExporter(data).stream("csv")).decode()
+
+
+@pytest.mark.parametrize("values", [
+    ["2020-01-01", "2020-01-02", "2020-01-03", "2020-01-04 12:30", None],  # times only after the first chunk
+    ["2020-01-01 08:00", "2020-01-02", "2020-01-03", "2020-01-04", "2020-01-05"],  # times only in the first chunk
+    ["2020-01-01", "2020-01-02", None, "2020-01-04", "2020-01-05"],  # dates only
+    ["2020-01-01 00:00:00.5", "2020-01-02", "2020-01-03", "2020-01-04 00:00:00.25", None],  # fractional seconds
+])
+def test_csv_datetimes_match_single_write(values):
+    dates = pd.to_datetime(values, format="mixed")
+    data = pd.DataFrame({"date": dates, "aware": dates.tz_localize("UTC"), "x": range(len(values))})
+    assert streamed_csv(data) == data.to_csv()
+    assert streamed_csv(data.set_index("date")) == data.set_index("date").to_csv()
+
+
+def test_csv_columns_keep_own_datetime_format():
+    data = pd.DataFrame({"day": pd.date_range("2020-01-01", periods=7),
+                         "time": pd.date_range("2020-01-01", periods=7, freq="5h")})
+    assert streamed_csv(data) == data.to_csv()
+
+
+def test_csv_empty():
+    data = pd.DataFrame({"date": pd.to_datetime([])})
+    assert streamed_csv(data) == data.to_csv()
@@ -0,0 +1,28 @@
+import threading
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from app.controllers.dataframe_report import DataFrameReport
+
+
+def report() -> DataFrameReport:
+    pdf = DataFrameReport(show_time=False)
+    pdf.set_creation_date(datetime(2024, 1, 1, tzinfo=timezone.utc))
+    pdf.add_heading("Data")
+    for i in range(40):
+        pdf.add_dataframe(pd.DataFrame({"a": range(10), "b": [f"value {i}"] * 10}), title=f"Table {i}")
+    return pdf
+
+
+def test_stream_matches_output():
+    chunks = list(report().stream(chunk_size=4096))
+    assert len(chunks) > 1
+    assert b"".join(chunks) == report().to_bytes().getvalue()
+
+
+def test_closed_stream_stops_serialization():
+    stream = report().stream(chunk_size=1024, max_pending_chunks=1)
+    assert next(stream).startswith(b"%PDF-")
+    stream.close()
+    assert not any(thread.name == "pdf-stream" for thread in threading.enumerate())
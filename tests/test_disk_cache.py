@@ -0,0 +1,66 @@
+import os
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+from app.extensions.disk_cache import DiskCache
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(CACHE=str(tmp_path), CACHE_MAX_MB=1)
+    return app
+
+
+def coalesced_call(app, cache, key, results):
+    with app.app_context():
+        result = cache.get_or_stream(key, lambda: [b"waiter"])
+        results.append(result if isinstance(result, str) else b"".join(result))
+
+
+def fill_with_waiter(app, cache, key):
+    """
+    Produce `key` while a second caller waits for it; returns what the waiter got.
+    """
+    release = threading.Event()
+
+    def producer():
+        release.wait(5)
+        yield b"first"
+
+    results = []
+    with app.app_context():
+        stream = cache.get_or_stream(key, producer)
+        waiter = threading.Thread(target=coalesced_call, args=(app, cache, key, results))
+        waiter.start()
+        time.sleep(0.2)  # let the waiter block on the pending entry
+        release.set()
+        assert b"".join(stream) == b"first"
+    waiter.join(5)
+    return results
+
+
+def test_waiter_gets_stored_entry(app):
+    cache = DiskCache("CACHE", app)
+    results = fill_with_waiter(app, cache, "k1")
+    assert len(results) == 1 and os.path.isfile(results[0])
+
+
+def test_waiter_produces_entry_not_stored(app):
+    app.config["CACHE_MAX_MB"] = 0  # every entry is too large to keep
+    cache = DiskCache("CACHE", app)
+    assert fill_with_waiter(app, cache, "k2") == [b"waiter"]
+
+
+def test_abandoned_stream_is_not_stored(app):
+    cache = DiskCache("CACHE", app)
+    with app.app_context():
+        stream = cache.get_or_stream("k3", lambda: [b"a", b"b"])
+        next(stream)
+        stream.close()
+        assert cache.get_path("k3") is None
+        assert b"".join(cache.get_or_stream("k3", lambda: [b"a", b"b"])) == b"ab"
+        assert cache.get("k3") == b"ab"
@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from app.controllers import DataFramePreprocessor  # noqa: E402
+from app.controllers.arrow_engine import is_arrow  # noqa: E402
+from app.models import PreprocessingParams  # noqa: E402
+from app.models.request.engine_params import ARROW_ENGINE, NUMPY_ENGINE  # noqa: E402
+from benchmarks.datasets import SHAPES  # noqa: E402
+from benchmarks.engine_parity import differences, export_differences, frame_difference, run_engine  # noqa: E402
+from benchmarks.pipeline import preprocessing_steps  # noqa: E402
+
+
+@pytest.mark.parametrize("shape", list(SHAPES))
+def test_engines_agree(shape):
+    dataset = SHAPES[shape](300, 42)
+    csv = dataset.data.to_csv(index=False).encode()
+    steps = preprocessing_steps(dataset)
+    expected = run_engine(dataset, csv, NUMPY_ENGINE, steps)
+    actual = run_engine(dataset, csv, ARROW_ENGINE, steps)
+    for stage, (value, _) in expected.items():
+        arrow_value = actual[stage][0]
+        if isinstance(value, pd.DataFrame):
+            found = frame_difference(value, arrow_value)
+            assert not found, f"{stage}: {found}"
+            assert not export_differences(value, arrow_value), stage
+        else:
+            assert not differences(value, arrow_value), stage
+
+
+def test_failed_step_is_rerun_from_its_input():
+    data = pd.DataFrame({"x": [1.0, 2.0], "y": [3.0, 4.0]})
+    preprocessor = DataFramePreprocessor(data)
+    preprocessor.data = preprocessor.data.astype("double[pyarrow]")
+
+    def step(_: PreprocessingParams) -> None:
+        preprocessor.data["x"] = preprocessor.data["x"] * 10
+        if is_arrow(preprocessor.data["y"].dtype):
+            raise pa.ArrowNotImplementedError("not supported on Arrow-backed columns")
+
+    preprocessor._run(step, PreprocessingParams(engine=ARROW_ENGINE))
+    pd.testing.assert_frame_equal(preprocessor.data, pd.DataFrame({"x": [10.0, 20.0], "y": [3.0, 4.0]}))
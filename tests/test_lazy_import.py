@@ -0,0 +1,33 @@
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+# run in a fresh interpreter: the race only exists while the modules are imported for the first time
+CONCURRENT_IMPORTS = textwrap.dedent("""
+    import threading
+    from app.lazy_import import import_module
+
+    errors = []
+
+    def load(name):
+        try:
+            import_module(name)
+        except Exception as e:
+            errors.append(repr(e))
+
+    threads = [threading.Thread(target=load, args=(name,)) for name in
+               ("sklearn.decomposition", "sklearn.feature_selection", "sklearn.preprocessing", "seaborn")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(errors)
+""")
+
+
+def test_concurrent_first_imports_succeed():
+    for _ in range(3):
+        result = subprocess.run([sys.executable, "-c", CONCURRENT_IMPORTS], capture_output=True, text=True,
+                                check=True, cwd=Path(__file__).parents[1])
+        assert result.stdout.strip() == "[]"
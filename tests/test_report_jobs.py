@@ -0,0 +1,40 @@
+import sqlite3
+
+import pytest
+
+from app.extensions.report_jobs import ReportJobs, _WorkerPool
+
+
+def pool(tmp_path) -> _WorkerPool:
+    return _WorkerPool(str(tmp_path), 0, 600, {})
+
+
+def test_pool_keeps_polling_after_failure(tmp_path, monkeypatch):
+    worker_pool = pool(tmp_path)
+    polls = []
+
+    def collect() -> None:
+        polls.append(len(polls))
+        if len(polls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        worker_pool._stopped.set()
+
+    monkeypatch.setattr(worker_pool, "_collect", collect)
+    monkeypatch.setattr(worker_pool, "_enforce_limits", lambda: None)
+    monkeypatch.setattr(worker_pool, "_recover_stale", lambda: None)
+    monkeypatch.setattr(worker_pool, "_dispatch", lambda: None)
+    worker_pool.run()
+    assert polls == [0, 1]
+
+
+def test_stopped_pool_is_cleared(tmp_path, monkeypatch):
+    jobs = ReportJobs()
+    jobs._pool = worker_pool = pool(tmp_path)
+
+    def run() -> None:
+        raise OSError("cannot start worker")
+
+    monkeypatch.setattr(worker_pool, "run", run)
+    with pytest.raises(OSError):
+        jobs._run_started_pool(worker_pool)
+    assert jobs._pool is None and worker_pool._stopped.is_set()
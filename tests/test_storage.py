@@ -0,0 +1,63 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.extensions import storage
+from app.extensions.dataset_index import DatasetIndex
+from app.extensions.storage import DATASETS
+
+
+def dataset(seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"a": rng.normal(size=45_000), "b": rng.normal(size=45_000)})  # about 0.7 MB
+
+
+def stored(name: str) -> bool:
+    return storage.backend.size(DATASETS, name) is not None
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(DATASET_STORAGE_MAX_MB=2, DELETE_AGE_HOURS=1)
+    with app.test_request_context():
+        yield app
+
+
+def save(data: pd.DataFrame) -> str:
+    return "__".join(storage.save_dataset(data))
+
+
+def test_index_finds_expired_and_least_recently_used(tmp_path):
+    index = DatasetIndex(str(tmp_path))
+    now = time.time()
+    index.add("old", now - 7200)
+    index.add("recent", now - 600)
+    index.add("new", now)
+    assert index.saved_before(now - 3600) == ["old"]
+    assert index.least_recently_used() == "old"
+    index.touch("old")
+    assert index.least_recently_used() == "recent"
+    assert index.least_recently_used(exclude="recent") == "new"
+    assert index.remove("recent") and not index.remove("recent")
+
+
+def test_quota_evicts_least_recently_used(app):
+    first, second = save(dataset(1)), save(dataset(2))
+    storage.index.add(first, time.time() - 600)
+    storage.index.add(second, time.time() - 300)
+    storage.index.touch(first)
+    third = save(dataset(3))
+    assert stored(first) and not stored(second) and stored(third)
+    assert storage.blocks.total_size() <= storage.max_size
+
+
+def test_cleanup_deletes_expired(app, capsys):
+    expired, kept = save(dataset(1)), save(dataset(2))
+    storage.index.add(expired, time.time() - 7200)
+    storage.cleanup()
+    assert not stored(expired) and stored(kept)
+    assert storage.index.saved_before(time.time()) == [kept]
+    assert "1 expired" in capsys.readouterr().out
+
@@ -0,0 +1,82 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.extensions import storage
+from app.extensions.storage_backends import BACKENDS, shard
+
+
+@pytest.fixture(params=list(BACKENDS))
+def backend_name(request):
+    return request.param
+
+
+def test_backend_round_trip(tmp_path, backend_name):
+    backend = BACKENDS[backend_name](str(tmp_path))
+    with pytest.raises(FileNotFoundError):
+        backend.read("blocks", "x")
+    backend.write("blocks", "x", b"first")
+    backend.write("blocks", "x", b"second")
+    assert backend.read("blocks", "x") == b"second" and backend.size("blocks", "x") == 6
+    assert [(name, size) for name, _, size in backend.scan("blocks", shard("x"))] == [("x", 6)]
+    assert backend.delete("blocks", "x") == 6 and backend.size("blocks", "x") is None
+    assert backend.delete("blocks", "x") == 0
+
+
+def test_exclusive_lock_waits_for_readers(tmp_path, backend_name):
+    backend = BACKENDS[backend_name](str(tmp_path))
+    events = []
+    reading = threading.Event()
+
+    def write() -> None:
+        reading.wait()
+        with backend.lock("datasets", "x"):
+            events.append("write")
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    with backend.lock("datasets", "x", shared=True):
+        reading.set()
+        writer.join(0.2)
+        events.append("read")
+    writer.join()
+    assert events == ["read", "write"]
+
+
+def test_readers_never_see_partial_datasets(make_app, backend_name):
+    app = make_app(DATASET_BACKEND=backend_name, DATASET_CHUNK_ROWS=100)
+    headers = {app.config["ACCESS_KEY_HEADER"]: "key"}
+    rows = 1000  # ten row chunks, stored as separate blocks
+
+    def version(value: int) -> pd.DataFrame:
+        return pd.DataFrame({"a": np.full(rows, value), "b": np.full(rows, value)})
+
+    with app.test_request_context(headers=headers):
+        storage.save_dataset(version(0), "dataset")
+    stop = threading.Event()
+    seen, errors = set(), []
+
+    def overwrite() -> None:
+        with app.test_request_context(headers=headers):
+            for value in range(1, 30):
+                storage.save_dataset(version(value), "dataset")
+        stop.set()
+
+    def read() -> None:
+        with app.test_request_context(headers=headers):
+            while not stop.is_set():
+                data = storage.get_dataset("dataset")
+                values = set(np.unique(data.to_numpy()))
+                seen.update(values)
+                if len(values) != 1 or len(data) != rows:
+                    errors.append(values)
+
+    threads = [threading.Thread(target=overwrite)] + [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(seen) > 1